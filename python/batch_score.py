@@ -0,0 +1,315 @@
+"""
+Streaming batch scorer for the School Commute Fuzzy Logic Model
+
+Scores scenario files of any size in fixed-size chunks with the vectorized
+``predict_batch`` path. Input rows are read, scored and written one chunk at
+a time, so memory use does not grow with the file, and a checkpoint written
+after every chunk lets an interrupted run resume where it stopped.
+
+Usage:
+    python -m batch_score scenarios.csv scores.csv
+    python -m batch_score scenarios.parquet scores.parquet --chunk-size 500000 --resume
+
+Input files need the columns ``weather``, ``day_type``, ``parent_a_wake`` and
+``parent_b_wake``. CSV output is a single file; Parquet output is a directory
+of one part file per chunk. Parquet support requires ``pyarrow``.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Sequence
+
+import pandas as pd
+
+try:
+    from .school_commute_model import (BACKENDS, DEFUZZ_METHODS, DTYPES, ENGINES, INTERMEDIATE_OUTPUTS,
+                                       RUN_DECISION_METHODS, SchoolCommuteFuzzyModel)
+except ImportError:
+    from school_commute_model import (BACKENDS, DEFUZZ_METHODS, DTYPES, ENGINES, INTERMEDIATE_OUTPUTS,
+                                      RUN_DECISION_METHODS, SchoolCommuteFuzzyModel)
+
+
+INPUT_COLUMNS = ['weather', 'day_type', 'parent_a_wake', 'parent_b_wake']
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _import_parquet():
+    """Import pyarrow lazily; it is only needed for Parquet files."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError("Parquet files require pyarrow (pip install pyarrow)") from error
+    return pa, pq
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith(('.parquet', '.pq'))
+
+
+def _rechunk(frames: Iterator[pd.DataFrame], chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Regroup frames of arbitrary length into frames of exactly chunk_size rows (the last may be shorter)."""
+    
+    pending = []
+    pending_rows = 0
+    for frame in frames:
+        pending.append(frame)
+        pending_rows += len(frame)
+        while pending_rows >= chunk_size:
+            combined = pd.concat(pending, ignore_index=True)
+            yield combined.iloc[:chunk_size].reset_index(drop=True)
+            rest = combined.iloc[chunk_size:]
+            pending, pending_rows = [rest], len(rest)
+    if pending_rows:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def read_scenarios(path: str, chunk_size: int, columns: Sequence[str],
+                   skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV or Parquet scenario file as a stream of DataFrame chunks.
+    
+    Parameters:
+    -----------
+    path : str
+        Input file
+    chunk_size : int
+        Rows per chunk
+    columns : list
+        Columns to read
+    skip_rows : int
+        Leading data rows to skip (used when resuming)
+    """
+    
+    if _is_parquet(path):
+        _, pq = _import_parquet()
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=list(columns))
+        frames = (batch.to_pandas() for batch in batches)
+        for chunk in _rechunk(frames, chunk_size):
+            if skip_rows >= len(chunk):
+                skip_rows -= len(chunk)
+                continue
+            yield chunk.iloc[skip_rows:].reset_index(drop=True)
+            skip_rows = 0
+    else:
+        skip = (lambda line: 0 < line <= skip_rows) if skip_rows else None
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=list(columns), skiprows=skip)
+
+
+def score_chunks(model: SchoolCommuteFuzzyModel, chunks: Iterator[pd.DataFrame],
+                 outputs: Sequence[str] = (), keep_columns: Sequence[str] = ()) -> Iterator[pd.DataFrame]:
+    """
+    Score every chunk with ``evaluate_batch``.
+    
+    Yields one DataFrame per chunk with the ``keep_columns`` passed through
+    from the input, ``success_probability`` and the requested intermediates.
+    """
+    
+    for chunk in chunks:
+        values = model.evaluate_batch(
+            chunk['weather'].to_numpy(), chunk['day_type'].to_numpy(),
+            chunk['parent_a_wake'].to_numpy(), chunk['parent_b_wake'].to_numpy(),
+            outputs=['success_probability'] + list(outputs))
+        
+        scored = {column: chunk[column].to_numpy() for column in keep_columns}
+        scored.update(values)
+        yield pd.DataFrame(scored)
+
+
+class _CsvWriter:
+    """Appends scored chunks to one CSV file; the position is a byte offset."""
+    
+    def __init__(self, path: str, position: int = None):
+        if position is None:
+            self.handle = open(path, 'wb')
+            self.header = True
+        else:
+            self.handle = open(path, 'r+b')
+            self.handle.truncate(position)
+            self.handle.seek(position)
+            self.header = False
+    
+    def write(self, frame: pd.DataFrame) -> int:
+        self.handle.write(frame.to_csv(index=False, header=self.header).encode())
+        self.handle.flush()
+        self.header = False
+        return self.handle.tell()
+    
+    def close(self):
+        self.handle.close()
+
+
+class _ParquetWriter:
+    """Writes every scored chunk as its own part file; the position is the chunk count."""
+    
+    def __init__(self, path: str, position: int = None):
+        self.pa, self.pq = _import_parquet()
+        self.path = path
+        self.position = position or 0
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith('part-') and (position is None or int(name[5:11]) >= self.position):
+                os.remove(os.path.join(path, name))
+    
+    def write(self, frame: pd.DataFrame) -> int:
+        table = self.pa.Table.from_pandas(frame, preserve_index=False)
+        self.pq.write_table(table, os.path.join(self.path, f"part-{self.position:06d}.parquet"))
+        self.position += 1
+        return self.position
+    
+    def close(self):
+        pass
+
+
+def _write_checkpoint(path: str, checkpoint: Dict):
+    """Replace the checkpoint file atomically."""
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump(checkpoint, handle)
+    os.replace(temporary, path)
+
+
+def score_file(input_path: str, output_path: str, model: SchoolCommuteFuzzyModel = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, outputs: Sequence[str] = (),
+               keep_columns: Sequence[str] = (), resume: bool = False,
+               report: Callable[[int, float], None] = None) -> Dict:
+    """
+    Score a scenario file chunk by chunk and write the results incrementally.
+    
+    Parameters:
+    -----------
+    input_path : str
+        CSV or Parquet scenario file
+    output_path : str
+        CSV file or Parquet directory to write
+    model : SchoolCommuteFuzzyModel
+        Model to score with (a default model if None)
+    chunk_size : int
+        Rows read, scored and written at a time
+    outputs : list
+        Intermediate outputs to write next to ``success_probability``
+    keep_columns : list
+        Input columns copied to the output, e.g. an id column
+    resume : bool
+        Continue after the last completed chunk recorded in the
+        ``<output_path>.progress`` checkpoint instead of starting over
+    report : callable
+        Called after every chunk with (rows written so far, seconds elapsed)
+    
+    Returns:
+    --------
+    dict
+        rows scored in this run, total rows in the output, seconds and rows/sec
+    """
+    
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    unknown = set(outputs) - set(INTERMEDIATE_OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown outputs {sorted(unknown)}; "
+                         f"choose from {list(INTERMEDIATE_OUTPUTS)}")
+    model = model or SchoolCommuteFuzzyModel()
+    
+    checkpoint_path = output_path + '.progress'
+    settings = {
+        'input': os.path.abspath(input_path),
+        'chunk_size': chunk_size,
+        'outputs': list(outputs),
+        'keep_columns': list(keep_columns),
+    }
+    checkpoint = dict(settings, rows=0, chunks=0, position=None, complete=False)
+    
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as handle:
+            saved = json.load(handle)
+        if any(saved.get(key) != value for key, value in settings.items()):
+            raise ValueError(f"{checkpoint_path} was written with different settings; "
+                             "rerun without resume to start over")
+        checkpoint = saved
+    
+    start_rows = checkpoint['rows']
+    started = time.perf_counter()
+    if not checkpoint['complete']:
+        writer_class = _ParquetWriter if _is_parquet(output_path) else _CsvWriter
+        writer = writer_class(output_path, checkpoint['position'])
+        try:
+            chunks = read_scenarios(input_path, chunk_size, list(keep_columns) + INPUT_COLUMNS,
+                                    skip_rows=start_rows)
+            for scored in score_chunks(model, chunks, outputs, keep_columns):
+                checkpoint['position'] = writer.write(scored)
+                checkpoint['rows'] += len(scored)
+                checkpoint['chunks'] += 1
+                _write_checkpoint(checkpoint_path, checkpoint)
+                if report:
+                    report(checkpoint['rows'], time.perf_counter() - started)
+            
+            if checkpoint['position'] is None:
+                # Empty input: still leave a valid (header-only) output behind
+                checkpoint['position'] = writer.write(pd.DataFrame(
+                    columns=list(keep_columns) + ['success_probability'] + list(outputs)))
+        finally:
+            writer.close()
+        checkpoint['complete'] = True
+        _write_checkpoint(checkpoint_path, checkpoint)
+    
+    seconds = time.perf_counter() - started
+    rows = checkpoint['rows'] - start_rows
+    return {
+        'rows': rows,
+        'total_rows': checkpoint['rows'],
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else float('inf'),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    
+    parser = argparse.ArgumentParser(
+        prog='python -m batch_score',
+        description="Score a CSV or Parquet scenario file in streaming chunks.")
+    parser.add_argument('input', help="CSV or Parquet file with weather, day_type, "
+                                      "parent_a_wake and parent_b_wake columns")
+    parser.add_argument('output', help="CSV file or Parquet directory (.parquet) to write")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"rows per chunk (default {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--outputs', default='',
+                        help="comma-separated intermediates to write, or 'all'")
+    parser.add_argument('--keep-columns', default='',
+                        help="comma-separated input columns to copy to the output")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from the last completed chunk")
+    parser.add_argument('--engine', choices=ENGINES, default='crisp')
+    parser.add_argument('--run-decision-method', choices=RUN_DECISION_METHODS, default='inference')
+    parser.add_argument('--defuzz-method', choices=DEFUZZ_METHODS, default='analytic')
+    parser.add_argument('--dtype', choices=DTYPES, default='float64',
+                        help="float32 halves the memory per row (default float64)")
+    parser.add_argument('--backend', choices=BACKENDS, default='numpy',
+                        help="numba runs the fused compiled kernel when Numba is installed")
+    parser.add_argument('--quiet', action='store_true', help="only print the final summary")
+    args = parser.parse_args(argv)
+    
+    outputs = list(INTERMEDIATE_OUTPUTS) if args.outputs == 'all' else [
+        name for name in args.outputs.split(',') if name]
+    keep_columns = [name for name in args.keep_columns.split(',') if name]
+    model = SchoolCommuteFuzzyModel(defuzz_method=args.defuzz_method,
+                                    run_decision_method=args.run_decision_method,
+                                    engine=args.engine, dtype=args.dtype, backend=args.backend)
+    
+    def report(rows, seconds):
+        if not args.quiet:
+            print(f"{rows:,} rows scored, {rows / max(seconds, 1e-9):,.0f} rows/sec",
+                  file=sys.stderr)
+    
+    summary = score_file(args.input, args.output, model, args.chunk_size, outputs,
+                         keep_columns, args.resume, report)
+    print(f"Scored {summary['rows']:,} rows ({summary['total_rows']:,} in output) in "
+          f"{summary['seconds']:.2f}s: {summary['rows_per_second']:,.0f} rows/sec")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
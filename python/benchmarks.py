@@ -0,0 +1,308 @@
+"""
+Benchmark suite for the School Commute Fuzzy Logic Model
+
+Times every hierarchy node (scalar and batch), full scalar ``predict``,
+``predict_batch`` at 1 to 1e6 rows, the grids behind the sensitivity and
+system response plots, and the cold start (import plus first ``predict``
+in a fresh interpreter). Results are written as JSON baselines, and
+``compare`` flags benchmarks that slowed down by more than a threshold, as
+well as a cold start over STARTUP_BUDGET_SECONDS.
+
+Usage:
+    python -m benchmarks run --output baseline.json
+    python -m benchmarks run --output current.json --quick
+    python -m benchmarks compare baseline.json current.json --threshold 0.2
+
+``compare`` exits with status 1 when any benchmark regressed, so it can gate
+CI jobs. Baselines are machine specific; record and compare them on the
+same hardware.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+try:
+    from .parameter_sweep import parameter_sweep
+    from .school_commute_model import NODE_GRAPH, SchoolCommuteFuzzyModel
+except ImportError:
+    from parameter_sweep import parameter_sweep
+    from school_commute_model import NODE_GRAPH, SchoolCommuteFuzzyModel
+
+
+BATCH_SIZES = (1, 1_000, 100_000, 1_000_000)
+QUICK_BATCH_SIZES = (1, 1_000, 100_000)
+NODE_BATCH_SIZE = 100_000
+DEFAULT_THRESHOLD = 0.2
+
+# Cold start of a short-lived worker: importing the model and its first prediction
+STARTUP_BENCHMARK = 'startup/import_first_predict'
+STARTUP_BUDGET_SECONDS = 0.5
+STARTUP_SCRIPT = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "from school_commute_model import SchoolCommuteFuzzyModel\n"
+    "SchoolCommuteFuzzyModel().predict('clear', 'weekday', 6.5, 6.5)\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+WEATHER_CONDITIONS = ['clear', 'cloudy', 'light_rain', 'heavy_rain', 'snow']
+
+# Representative scenario whose intermediates feed the per-node benchmarks
+REFERENCE_SCENARIO = ('light_rain', 'weekday', 6.25, 6.5)
+
+
+def random_scenarios(n: int, seed: int = 0) -> Tuple[np.ndarray, ...]:
+    """Encoded batch inputs spread over the whole input space."""
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, 6, n), rng.integers(0, 2, n),
+            rng.uniform(5.5, 8.5, n), rng.uniform(5.5, 8.5, n))
+
+
+def _node_inputs(model: SchoolCommuteFuzzyModel, n: int = None) -> Dict:
+    """Values of every model input and node output, scalar or tiled to n rows."""
+    weather, day_type, parent_a_wake, parent_b_wake = REFERENCE_SCENARIO
+    success_prob, intermediate = model.predict(*REFERENCE_SCENARIO)
+    values = dict(intermediate, success_probability=success_prob, parent_a_wake=parent_a_wake,
+                  parent_b_wake=parent_b_wake, weather_num=model.weather_map[weather],
+                  day_type_num=1 if day_type == 'weekday' else 0)
+    if n is None:
+        return values
+    return {name: np.full(n, value) for name, value in values.items()}
+
+
+def sensitivity_grid(model: SchoolCommuteFuzzyModel) -> int:
+    """The predictions behind test_model.sensitivity_analysis, without plotting; returns their count."""
+    wake_times = np.arange(5.5, 8.51, 0.25)
+    for wake_time in wake_times:
+        model.predict('clear', 'weekday', wake_time, 6.5)
+        model.predict('clear', 'weekday', 6.5, wake_time)
+    for weather in WEATHER_CONDITIONS:
+        model.predict(weather, 'weekday', 6.5, 6.5)
+    parameter_sweep(['clear'], ['weekday'], wake_times, wake_times, model=model, workers=1)
+    return 2 * len(wake_times) + len(WEATHER_CONDITIONS) + len(wake_times) ** 2
+
+
+def system_response_grid(model: SchoolCommuteFuzzyModel) -> int:
+    """The predictions behind visualize_system.plot_system_responses, without plotting; returns their count."""
+    wake_times = np.linspace(5.5, 8.5, 20)
+    parameter_sweep(['clear'], ['weekday'], wake_times, wake_times, model=model, workers=1)
+    for wake_time in [6.0, 6.5, 7.0, 7.5]:
+        for weather in WEATHER_CONDITIONS:
+            model.predict(weather, 'weekday', wake_time, wake_time)
+    for day_type in ['weekday', 'weekend']:
+        for wake_time in wake_times[::2]:
+            model.predict('clear', day_type, wake_time, wake_time)
+    for pb_time in np.linspace(5.5, 8.0, 15):
+        model.predict('clear', 'weekday', 6.0, pb_time)
+    return len(wake_times) ** 2 + 4 * len(WEATHER_CONDITIONS) + 2 * len(wake_times[::2]) + 15
+
+
+def build_benchmarks(model: SchoolCommuteFuzzyModel = None,
+                     batch_sizes=BATCH_SIZES) -> List[Tuple[str, Callable, int]]:
+    """(name, zero-argument callable, rows per call) for every benchmark."""
+    
+    model = model or SchoolCommuteFuzzyModel()
+    benchmarks = []
+    
+    scalar = _node_inputs(model)
+    tiled = _node_inputs(model, NODE_BATCH_SIZE)
+    for name, (node, inputs) in NODE_GRAPH.items():
+        compute = getattr(model, f'_compute_{node}')
+        args = tuple(scalar[i] for i in inputs)
+        benchmarks.append((f'node/{node}', lambda compute=compute, args=args: compute(*args), 1))
+        
+        compute_batch = getattr(model, f'_compute_{node}_batch')
+        batch_args = tuple(tiled[i] for i in inputs)
+        benchmarks.append((f'node_batch/{node}[{NODE_BATCH_SIZE}]',
+                           lambda compute=compute_batch, args=batch_args: compute(*args),
+                           NODE_BATCH_SIZE))
+    
+    benchmarks.append(('predict/scalar', lambda: model.predict(*REFERENCE_SCENARIO), 1))
+    for n in batch_sizes:
+        inputs = random_scenarios(n)
+        benchmarks.append((f'predict_batch[{n}]', lambda inputs=inputs: model.predict_batch(*inputs), n))
+    
+    compact = SchoolCommuteFuzzyModel(model.defuzz_method, model.run_decision_method, model.engine,
+                                      dtype='float32')
+    n = max(batch_sizes)
+    inputs = random_scenarios(n)
+    benchmarks.append((f'predict_batch_float32[{n}]', lambda: compact.predict_batch(*inputs), n))
+    
+    for name, grid in [('sensitivity_analysis', sensitivity_grid), ('system_responses', system_response_grid)]:
+        benchmarks.append((f'grid/{name}', lambda grid=grid: grid(model), grid(model)))
+    return benchmarks
+
+
+def measure_startup() -> float:
+    """Seconds to import the model and make the first prediction in a fresh interpreter."""
+    completed = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    return float(completed.stdout)
+
+
+def time_call(function: Callable, min_time: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    """
+    Time a call like ``timeit``: loops are grown until one measurement
+    takes ``min_time``, then ``repeat`` measurements are taken.
+    
+    Returns:
+    --------
+    dict
+        Best and median seconds per call, and the loops per measurement
+    """
+    
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        samples.append((time.perf_counter() - start) / loops)
+    return {'best': min(samples), 'median': float(np.median(samples)), 'loops': loops}
+
+
+def run_benchmarks(pattern: str = None, quick: bool = False, min_time: float = 0.2,
+                   repeat: int = 5, report: Callable[[str, Dict], None] = None) -> Dict:
+    """
+    Run the suite and return a JSON-serializable result document.
+    
+    Parameters:
+    -----------
+    pattern : str
+        Regular expression; only benchmarks whose names match are run
+    quick : bool
+        Skip the 1e6-row batch
+    min_time : float
+        Minimum seconds per measurement
+    repeat : int
+        Measurements per benchmark
+    report : callable
+        Called with (name, result) after every benchmark
+    """
+    
+    results = {}
+    batch_sizes = QUICK_BATCH_SIZES if quick else BATCH_SIZES
+    for name, function, rows in build_benchmarks(batch_sizes=batch_sizes):
+        if pattern and not re.search(pattern, name):
+            continue
+        result = time_call(function, min_time, repeat)
+        result['rows'] = rows
+        result['rows_per_second'] = rows / result['best']
+        results[name] = result
+        if report:
+            report(name, result)
+    
+    if not pattern or re.search(pattern, STARTUP_BENCHMARK):
+        samples = [measure_startup() for _ in range(repeat)]
+        result = {'best': min(samples), 'median': float(np.median(samples)), 'loops': 1, 'rows': 1,
+                  'rows_per_second': 1 / min(samples), 'budget': STARTUP_BUDGET_SECONDS}
+        results[STARTUP_BENCHMARK] = result
+        if report:
+            report(STARTUP_BENCHMARK, result)
+    
+    return {
+        'metadata': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare best times of the benchmarks present in both documents.
+    
+    Returns one entry per benchmark with the time ratio current/baseline and
+    whether it exceeds ``1 + threshold`` (or, for benchmarks with a budget,
+    whether the current time is over budget).
+    """
+    
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        ratio = result['best'] / baseline['results'][name]['best']
+        over_budget = result['best'] > result.get('budget', float('inf'))
+        rows.append({'name': name, 'baseline': baseline['results'][name]['best'],
+                     'current': result['best'], 'ratio': ratio,
+                     'regressed': ratio > 1 + threshold or over_budget})
+    return rows
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run = commands.add_parser('run', help="run the suite and write a JSON baseline")
+    run.add_argument('--output', required=True, help="JSON file to write")
+    run.add_argument('--filter', help="regular expression selecting benchmark names")
+    run.add_argument('--quick', action='store_true', help="skip the 1e6-row batch")
+    run.add_argument('--min-time', type=float, default=0.2, help="seconds per measurement")
+    run.add_argument('--repeat', type=int, default=5, help="measurements per benchmark")
+    
+    compare = commands.add_parser('compare', help="flag regressions against a baseline")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help=f"allowed slowdown as a fraction (default {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+    
+    if args.command == 'run':
+        def report(name, result):
+            print(f"{name:55s} {_format_seconds(result['best']):>10s}  "
+                  f"{result['rows_per_second']:>14,.0f} rows/s")
+        
+        document = run_benchmarks(args.filter, args.quick, args.min_time, args.repeat, report)
+        with open(args.output, 'w') as handle:
+            json.dump(document, handle, indent=2)
+        print(f"Wrote {len(document['results'])} results to {args.output}")
+        return 0
+    
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.current) as handle:
+        current = json.load(handle)
+    
+    rows = compare_results(baseline, current, args.threshold)
+    for row in rows:
+        flag = 'REGRESSION' if row['regressed'] else ''
+        print(f"{row['name']:55s} {_format_seconds(row['baseline']):>10s} -> "
+              f"{_format_seconds(row['current']):>10s}  x{row['ratio']:.2f} {flag}")
+    regressions = [row['name'] for row in rows if row['regressed']]
+    print(f"{len(regressions)} of {len(rows)} benchmarks slower than {1 + args.threshold:.2f}x baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
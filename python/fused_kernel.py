@@ -0,0 +1,422 @@
+"""
+Fused Numba kernel for the School Commute Fuzzy Logic Model
+
+One compiled function evaluates the whole crisp pipeline row by row:
+fuzzification of the run decision inputs, rule evaluation, analytic or
+sampled centroid defuzzification (or the RunDecisionLookup table) and the
+Level 1-5 crisp logic. Rows are processed in blocks spread over all cores
+with ``numba.prange``; each block allocates its few small scratch arrays
+once, so no temporaries are created per row or per hierarchy level.
+
+Every operation mirrors the NumPy batch path in the same order, so float64
+results are identical to ``evaluate_batch`` with ``backend='numpy'``. The
+kernel always computes in float64; float32 models store its results in
+float32.
+
+Numba is optional. Without it ``NUMBA_AVAILABLE`` is False and models with
+``backend='numba'`` use the NumPy batch path.
+"""
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    from .fuzzy_kernels import interp_membership
+    from .mamdani_engine import trapezoid_membership
+    from .school_commute_model import (INTERMEDIATE_OUTPUTS, NO_RULE_FIRED_RUN_DURATION,
+                                       RUN_DECISION_INPUTS, WEATHER_TRAVEL_MULTIPLIERS)
+except ImportError:
+    from fuzzy_kernels import interp_membership
+    from mamdani_engine import trapezoid_membership
+    from school_commute_model import (INTERMEDIATE_OUTPUTS, NO_RULE_FIRED_RUN_DURATION,
+                                      RUN_DECISION_INPUTS, WEATHER_TRAVEL_MULTIPLIERS)
+
+
+NUMBA_AVAILABLE = numba is not None
+
+# Rows of the output array written by the kernel
+FUSED_OUTPUTS = ('success_probability',) + INTERMEDIATE_OUTPUTS
+
+# Rows per parallel block; each block reuses one set of scratch arrays
+BLOCK_ROWS = 1024
+
+# Run decision methods of the kernel
+ANALYTIC, SAMPLED, LOOKUP = 0, 1, 2
+
+
+def _fuzzify(x, xp, fps, out, offset):
+    """
+    ``np.interp(x, xp, fp, left=0, right=0)`` for every row of ``fps``, with
+    NumPy's arithmetic, written to ``out[offset:]``; one search for all terms.
+    """
+    
+    n = len(xp)
+    if x < xp[0] or x > xp[n - 1]:
+        for t in range(fps.shape[0]):
+            out[offset + t] = 0.0
+        return
+    
+    # Last sample <= x: guessed as on an evenly spaced universe, then corrected
+    low = min(max(np.int64((x - xp[0]) * (n - 1) / (xp[n - 1] - xp[0])), 0), n - 1)
+    while low < n - 1 and xp[low + 1] <= x:
+        low += 1
+    while low > 0 and xp[low] > x:
+        low -= 1
+    
+    for t in range(fps.shape[0]):
+        fp = fps[t]
+        if low == n - 1 or xp[low] == x:
+            out[offset + t] = fp[low]
+        else:
+            slope = (fp[low + 1] - fp[low]) / (xp[low + 1] - xp[low])
+            out[offset + t] = slope * (x - xp[low]) + fp[low]
+
+
+def _analytic_run_duration(strengths, knots, knot_membership, tri_interval, tri_first, tri_second,
+                           xs, ys):
+    """``_analytic_centroid`` for one row; ``xs`` and ``ys`` are scratch arrays of knots + triples."""
+    
+    n_knots = len(knots)
+    n_terms = len(strengths)
+    for k in range(n_knots):
+        y = strengths[0] * knot_membership[k, 0]
+        for o in range(1, n_terms):
+            y = max(y, strengths[o] * knot_membership[k, o])
+        xs[k] = knots[k]
+        ys[k] = y
+    
+    for i in range(len(tri_interval)):
+        interval, first, second = tri_interval[i], tri_first[i], tri_second[i]
+        start_first = strengths[first] * knot_membership[interval, first]
+        start_second = strengths[second] * knot_membership[interval, second]
+        slope_first = strengths[first] * knot_membership[interval + 1, first] - start_first
+        slope_second = strengths[second] * knot_membership[interval + 1, second] - start_second
+        t = -(start_first - start_second) / (slope_first - slope_second)
+        if not (t > 0 and t < 1):
+            t = 0.0
+        y = 0.0
+        for o in range(n_terms):
+            start = strengths[o] * knot_membership[interval, o]
+            value = start + t * (strengths[o] * knot_membership[interval + 1, o] - start)
+            y = value if o == 0 else max(y, value)
+        xs[n_knots + i] = knots[interval] + t * (knots[interval + 1] - knots[interval])
+        ys[n_knots + i] = y
+    
+    # Stable insertion sort by x, like argsort(kind='stable')
+    for i in range(1, len(xs)):
+        x, y = xs[i], ys[i]
+        j = i - 1
+        while j >= 0 and xs[j] > x:
+            xs[j + 1] = xs[j]
+            ys[j + 1] = ys[j]
+            j -= 1
+        xs[j + 1] = x
+        ys[j + 1] = y
+    
+    area = 0.0
+    moment = 0.0
+    for j in range(len(xs) - 1):
+        x1, x2, y1, y2 = xs[j], xs[j + 1], ys[j], ys[j + 1]
+        dx = x2 - x1
+        segment_area = 0.5 * dx * (y1 + y2)
+        segment_moment = dx * (x1 * (2 * y1 + y2) + x2 * (y1 + 2 * y2)) / 6.0
+        area = segment_area if j == 0 else area + segment_area
+        moment = segment_moment if j == 0 else moment + segment_moment
+    
+    if area > 0:
+        return moment / area, True
+    return np.nan, False
+
+
+def _sampled_run_duration(strengths, run_range, run_mfs, aggregated):
+    """Product implication, max aggregation and ``fuzzy_kernels.centroid`` for one row."""
+    
+    n = len(run_range)
+    for j in range(n):
+        aggregated[j] = 0.0
+    for o in range(len(strengths)):
+        for j in range(n):
+            aggregated[j] = np.fmax(aggregated[j], strengths[o] * run_mfs[o, j])
+    
+    fired = False
+    sum_moment_area = 0.0
+    sum_area = 0.0
+    for j in range(n - 1):
+        x1, x2, y1, y2 = run_range[j], run_range[j + 1], aggregated[j], aggregated[j + 1]
+        fired = fired or y1 != 0.0
+        dx = x2 - x1
+        if y1 == y2:
+            moment = 0.5 * (x1 + x2)
+            area = dx * y1
+        elif y1 == 0.0 and y2 != 0.0:
+            moment = 2.0 / 3.0 * dx + x1
+            area = 0.5 * dx * y2
+        elif y2 == 0.0 and y1 != 0.0:
+            moment = 1.0 / 3.0 * dx + x1
+            area = 0.5 * dx * y1
+        else:
+            moment = (2.0 / 3.0 * dx * (y2 + 0.5 * y1)) / (y1 + y2) + x1
+            area = 0.5 * dx * (y1 + y2)
+        if (y1 == y2 and y1 == 0.0) or dx == 0:
+            moment = 0.0
+            area = 0.0
+        else:
+            moment = moment * area
+        sum_moment_area = moment if j == 0 else sum_moment_area + moment
+        sum_area = area if j == 0 else sum_area + area
+    fired = fired or aggregated[n - 1] != 0.0
+    
+    return sum_moment_area / np.fmax(sum_area, np.finfo(np.float64).eps), fired
+
+
+def _fused_rows(weather_num, day_type_num, parent_a_wake, parent_b_wake,
+                wake_universe, wake_mfs, weather_memberships, day_memberships,
+                rule_index, rule_or, rule_weights, weighted, rule_consequent, n_outputs,
+                method, knots, knot_membership, tri_interval, tri_first, tri_second,
+                run_range, run_mfs, lookup_table, lookup_outside, lookup_lower, lookup_upper, lookup_step,
+                weather_multipliers, no_rule_fired, out, fired_out):
+    """Evaluate every row into ``out`` (FUSED_OUTPUTS x rows) and ``fired_out``."""
+    
+    n = len(parent_b_wake)
+    n_wake, n_weather, n_day = wake_mfs.shape[0], weather_memberships.shape[1], day_memberships.shape[1]
+    n_terms = n_wake + n_weather + n_day
+    n_blocks = (n + BLOCK_ROWS - 1) // BLOCK_ROWS
+    
+    for block in numba.prange(n_blocks):
+        columns = np.empty(2 * n_terms + 2)
+        columns[2 * n_terms] = 1.0
+        columns[2 * n_terms + 1] = 0.0
+        strengths = np.empty(n_outputs)
+        xs = np.empty(len(knots) + len(tri_interval))
+        ys = np.empty(len(knots) + len(tri_interval))
+        aggregated = np.empty(len(run_range))
+        
+        for row in range(block * BLOCK_ROWS, min(n, (block + 1) * BLOCK_ROWS)):
+            weather = weather_num[row]
+            day_type = day_type_num[row]
+            wake_a = np.float64(parent_a_wake[row])
+            wake_b = np.float64(parent_b_wake[row])
+            
+            # Level 1: run decision
+            if method == LOOKUP:
+                fired = True
+                if wake_b >= lookup_lower and wake_b <= lookup_upper:
+                    position = (wake_b - lookup_lower) / lookup_step
+                    index = min(max(np.int64(np.floor(position)), 0), lookup_table.shape[2] - 2)
+                    fraction = position - index
+                    start = lookup_table[weather - 1, day_type, index]
+                    end = lookup_table[weather - 1, day_type, index + 1]
+                    run_duration = start + fraction * (end - start)
+                else:
+                    run_duration = lookup_outside[weather - 1, day_type]
+            else:
+                _fuzzify(wake_b, wake_universe, wake_mfs, columns, 0)
+                for t in range(n_weather):
+                    columns[n_wake + t] = weather_memberships[weather, t]
+                for t in range(n_day):
+                    columns[n_wake + n_weather + t] = day_memberships[day_type, t]
+                for t in range(n_terms):
+                    columns[n_terms + t] = 1.0 - columns[t]
+                
+                for o in range(n_outputs):
+                    strengths[o] = 0.0
+                for r in range(rule_index.shape[0]):
+                    activation = columns[rule_index[r, 0]]
+                    for k in range(1, rule_index.shape[1]):
+                        value = columns[rule_index[r, k]]
+                        activation = max(activation, value) if rule_or[r] else min(activation, value)
+                    if weighted:
+                        activation *= rule_weights[r]
+                    strengths[rule_consequent[r]] = max(strengths[rule_consequent[r]], activation)
+                
+                if method == ANALYTIC:
+                    centroid, fired = _analytic_run_duration(
+                        strengths, knots, knot_membership, tri_interval, tri_first, tri_second, xs, ys)
+                else:
+                    centroid, fired = _sampled_run_duration(strengths, run_range, run_mfs, aggregated)
+                run_duration = centroid if fired else no_rule_fired
+                run_duration = min(max(run_duration, 0.0), 120.0)
+            
+            # Level 1: base availability
+            latest = max(wake_a, wake_b)
+            earliest = min(wake_a, wake_b)
+            if wake_a <= 6.5 and wake_b <= 6.5:
+                base = 8.5 + (6.5 - latest) * 1.0
+            elif wake_a <= 6.5 or wake_b <= 6.5:
+                base = 6.0 + (6.5 - earliest) * 0.5
+            else:
+                base = max(1.0, 5.0 - (latest - 7.0) * 2.0)
+            
+            # Level 2
+            if run_duration < 10:
+                reduction = 0.0
+            elif run_duration < 30:
+                reduction = 0.75
+            elif run_duration < 60:
+                reduction = 1.75
+            elif run_duration < 90:
+                reduction = 2.75
+            else:
+                reduction = 3.5
+            final = min(max(base - reduction, 0.0), 10.0)
+            multiplier = weather_multipliers[weather]
+            
+            # Level 3
+            if final >= 7:
+                breakfast, dressing = 15.0, 13.0
+            elif final >= 4:
+                breakfast, dressing = 27.5, 25.0
+            else:
+                breakfast, dressing = 40.0, 36.0
+            transport = final * 0.9 if day_type == 1 else final
+            transport = min(max(transport, 0.0), 10.0)
+            
+            # Level 4
+            total = breakfast + dressing
+            if total <= 30:
+                routine = 9.0
+            elif total <= 50:
+                routine = 6.0
+            else:
+                routine = 2.0
+            
+            # Level 5
+            mild = multiplier <= 1.3
+            if routine >= 7 and transport >= 7 and mild:
+                success = 92.0
+            elif routine >= 7 and transport >= 4 and mild:
+                success = 85.0
+            elif routine >= 4 and transport >= 7 and mild:
+                success = 85.0
+            elif routine >= 4 and transport >= 4 and mild:
+                success = 60.0
+            elif multiplier > 2.0:
+                success = max(10.0, 60.0 - (multiplier - 1.0) * 30)
+            else:
+                success = 30.0
+            very_early = wake_a <= 6.0 and wake_b <= 6.0
+            if very_early and weather <= 2 and run_duration < 30:
+                success = max(success, 90.0)
+            if very_early and weather == 1:
+                success = max(success, 85.0)
+            success = min(max(success, 0.0), 100.0)
+            
+            out[0, row] = success
+            out[1, row] = run_duration
+            out[2, row] = base
+            out[3, row] = final
+            out[4, row] = multiplier
+            out[5, row] = breakfast
+            out[6, row] = dressing
+            out[7, row] = transport
+            out[8, row] = routine
+            fired_out[row] = fired
+
+
+if NUMBA_AVAILABLE:
+    _kernel_options = dict(nogil=True, cache=True, error_model='numpy')
+    _fuzzify = numba.njit(**_kernel_options)(_fuzzify)
+    _analytic_run_duration = numba.njit(**_kernel_options)(_analytic_run_duration)
+    _sampled_run_duration = numba.njit(**_kernel_options)(_sampled_run_duration)
+    _fused_rows = numba.njit(parallel=True, **_kernel_options)(_fused_rows)
+
+
+class FusedPipeline:
+    """
+    Constant tables of one model, laid out for the fused kernel.
+    
+    Built from the model's compiled spec, defuzzification and run decision
+    methods; the model rebuilds it when any of these change.
+    
+    Parameters:
+    -----------
+    model : SchoolCommuteFuzzyModel
+        A crisp-engine model
+    """
+    
+    def __init__(self, model):
+        if not NUMBA_AVAILABLE:
+            raise ImportError("the fused kernel requires numba (pip install numba)")
+        if model.engine != 'crisp':
+            raise ValueError("the fused kernel covers the crisp engine only")
+        
+        spec = self.spec = model.spec
+        self.defuzz_method = model.defuzz_method
+        self.run_decision_method = model.run_decision_method
+        
+        def sampled(variable):
+            return (np.array(spec.universes[variable]),
+                    np.array([spec.mfs[variable][term] for term in spec.terms[variable]]))
+        
+        def code_memberships(variable, codes):
+            universe, mfs = sampled(variable)
+            return np.array([[interp_membership(universe, mf, code) for mf in mfs] for code in codes])
+        
+        # Weather and day type are integer codes, so their memberships are tabulated per code
+        wake, weather, day_type = RUN_DECISION_INPUTS
+        self.fuzzification = sampled(wake) + (
+            code_memberships(weather, np.arange(max(model.weather_map.values()) + 1)),
+            code_memberships(day_type, np.arange(2)))
+        
+        rule_base = spec.rule_base
+        consequent = np.empty(len(rule_base.index), dtype=np.int64)
+        for term, rules in enumerate(rule_base.rules_per_output):
+            consequent[rules] = term
+        rule_or = np.zeros(len(rule_base.index), dtype=np.bool_)
+        rule_or[rule_base.or_rules] = True
+        self.rules = (np.array(rule_base.index, dtype=np.int64), rule_or,
+                      np.array(rule_base.weights), rule_base.weighted, consequent,
+                      rule_base.n_outputs)
+        
+        # Analytic centroid: knots and crossing candidates depend only on the output MFs
+        corners = spec.corners['run_duration']
+        run_range = spec.universes['run_duration']
+        lower, upper = run_range[0], run_range[-1]
+        knots = np.unique(np.clip(np.append(corners.ravel(), [lower, upper]), lower, upper))
+        knot_membership = trapezoid_membership(knots, corners)
+        supported = (knot_membership[:-1] > 0) | (knot_membership[1:] > 0)
+        first, second = np.triu_indices(corners.shape[0], k=1)
+        interval, pair = np.nonzero(supported[:, first] & supported[:, second])
+        self.analytic = (knots, knot_membership, interval.astype(np.int64),
+                         first[pair].astype(np.int64), second[pair].astype(np.int64))
+        self.sampled = sampled('run_duration')
+        
+        if model.run_decision_method == 'lookup':
+            lookup = self.lookup_table = model.run_decision_lookup
+            self.method = LOOKUP
+            self.lookup = (np.array(lookup.table), np.array(lookup.outside), float(lookup.lower),
+                           float(lookup.upper), float(lookup.step))
+        else:
+            self.lookup_table = None
+            self.method = ANALYTIC if model.defuzz_method == 'analytic' else SAMPLED
+            self.lookup = (np.zeros((1, 2, 2)), np.zeros((1, 2)), 0.0, 0.0, 1.0)
+    
+    def matches(self, model) -> bool:
+        """Whether the tables still describe ``model``."""
+        return (self.spec is model.spec and self.defuzz_method == model.defuzz_method
+                and self.run_decision_method == model.run_decision_method
+                and (self.lookup_table is None or self.lookup_table is model.run_decision_lookup))
+    
+    def evaluate(self, weather_num: np.ndarray, day_type_num: np.ndarray, parent_a_wake: np.ndarray,
+                 parent_b_wake: np.ndarray):
+        """
+        Run the fused kernel on encoded batch inputs.
+        
+        Returns:
+        --------
+        tuple
+            (values, fired): float64 array of shape (len(FUSED_OUTPUTS), rows)
+            and a bool array, False where no run decision rule fired
+        """
+        
+        n = len(parent_b_wake)
+        values = np.empty((len(FUSED_OUTPUTS), n))
+        fired = np.empty(n, dtype=np.bool_)
+        _fused_rows(weather_num, day_type_num, parent_a_wake, parent_b_wake, *self.fuzzification,
+                    *self.rules, self.method, *self.analytic, *self.sampled, *self.lookup,
+                    WEATHER_TRAVEL_MULTIPLIERS, NO_RULE_FIRED_RUN_DURATION, values, fired)
+        return values, fired
@@ -0,0 +1,123 @@
+"""
+NumPy fuzzy logic kernels for the School Commute Fuzzy Logic Model
+
+Native replacements for the scikit-fuzzy primitives the model used:
+``trimf``, ``trapmf``, ``interp_membership`` and the centroid
+defuzzification. They only need NumPy, so importing the model does not pull
+in scikit-fuzzy (whose ``control`` package imports matplotlib and scipy),
+and they return the same values as scikit-fuzzy bit for bit.
+"""
+
+import numpy as np
+
+
+def trimf(x: np.ndarray, abc) -> np.ndarray:
+    """
+    Triangular membership function sampled at ``x``.
+    
+    Parameters:
+    -----------
+    x : ndarray
+        Universe samples
+    abc : sequence of 3 floats
+        Feet a and c and peak b, with a <= b <= c
+    """
+    
+    a, b, c = (float(v) for v in abc)
+    if not a <= b <= c:
+        raise ValueError("trimf requires a <= b <= c")
+    x = np.asarray(x, dtype=float)
+    y = np.zeros(x.shape)
+    
+    if a != b:
+        left = (a < x) & (x < b)
+        y[left] = (x[left] - a) / (b - a)
+    if b != c:
+        right = (b < x) & (x < c)
+        y[right] = (c - x[right]) / (c - b)
+    y[x == b] = 1.0
+    return y
+
+
+def trapmf(x: np.ndarray, abcd) -> np.ndarray:
+    """
+    Trapezoidal membership function sampled at ``x``.
+    
+    Parameters:
+    -----------
+    x : ndarray
+        Universe samples
+    abcd : sequence of 4 floats
+        Feet a and d and shoulders b and c, with a <= b <= c <= d
+    """
+    
+    a, b, c, d = (float(v) for v in abcd)
+    if not a <= b <= c <= d:
+        raise ValueError("trapmf requires a <= b <= c <= d")
+    x = np.asarray(x, dtype=float)
+    y = np.ones(x.shape)
+    
+    rising = x <= b
+    y[rising] = trimf(x[rising], (a, b, b))
+    falling = x >= c
+    y[falling] = trimf(x[falling], (c, c, d))
+    y[(x < a) | (x > d)] = 0.0
+    return y
+
+
+def interp_membership(x: np.ndarray, xmf: np.ndarray, xx, zero_outside_x: bool = True):
+    """
+    Membership of ``xx`` in a sampled membership function, by linear interpolation.
+    
+    Values outside the universe ``x`` get 0, or the edge membership when
+    ``zero_outside_x`` is False.
+    """
+    if zero_outside_x:
+        return np.interp(xx, x, xmf, left=0.0, right=0.0)
+    return np.interp(xx, x, xmf)
+
+
+def centroid(x: np.ndarray, mfx: np.ndarray) -> np.ndarray:
+    """
+    Row-wise centroid of sampled membership functions.
+    
+    Reproduces ``skfuzzy.defuzzify.centroid`` bit for bit: each segment's
+    moment and area use the same case analysis, and the sums are accumulated
+    sequentially with ``cumsum`` rather than pairwise.
+    
+    Parameters:
+    -----------
+    x : ndarray, shape (n,)
+        Universe samples
+    mfx : ndarray, shape (rows, n)
+        One sampled membership function per row
+    """
+    
+    x1, x2 = x[:-1], x[1:]
+    y1, y2 = mfx[:, :-1], mfx[:, 1:]
+    dx = x2 - x1
+    
+    rectangle = y1 == y2
+    rising = (y1 == 0.0) & (y2 != 0.0)
+    falling = (y2 == 0.0) & (y1 != 0.0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        moment = np.select(
+            [rectangle, rising, falling],
+            [np.broadcast_to(0.5 * (x1 + x2), y1.shape),
+             np.broadcast_to(2.0 / 3.0 * dx + x1, y1.shape),
+             np.broadcast_to(1.0 / 3.0 * dx + x1, y1.shape)],
+            (2.0 / 3.0 * dx * (y2 + 0.5 * y1)) / (y1 + y2) + x1)
+    area = np.select(
+        [rectangle, rising, falling],
+        [dx * y1, 0.5 * dx * y2, 0.5 * dx * y1],
+        0.5 * dx * (y1 + y2))
+    
+    skip = (rectangle & (y1 == 0.0)) | (dx == 0)
+    moment_area = np.where(skip, 0.0, moment * area)
+    area = np.where(skip, 0.0, area)
+    
+    sum_moment_area = np.cumsum(moment_area, axis=1)[:, -1]
+    sum_area = np.cumsum(area, axis=1)[:, -1]
+    # float64 epsilon in the array's dtype, so float32 rows keep tiny areas
+    return sum_moment_area / np.fmax(sum_area, sum_area.dtype.type(np.finfo(float).eps))
@@ -0,0 +1,196 @@
+"""
+Opt-in instrumentation for the School Commute Fuzzy Logic Model
+
+``SchoolCommuteFuzzyModel`` times every ``predict`` and ``evaluate_batch``
+call, each hierarchy level and each node, and counts run decision rows in
+which no rule fired (the NO_RULE_FIRED_RUN_DURATION fallback) when an
+``Instrumentation`` is attached:
+
+    sink = PrometheusSink()
+    model = SchoolCommuteFuzzyModel(instrumentation=Instrumentation(sink))
+    ...
+    print(sink.render())
+
+Observations of one call are collected in plain dicts and handed to the
+sinks once when the call returns. Without instrumentation the model only
+checks one attribute per call.
+
+Timing keys are (kind, name) pairs: ('call', 'predict'), ('level', '3'),
+('node', 'breakfast_efficiency'). Counter keys are ('rows', call) for batch
+rows and ('fallbacks', 'run_decision').
+"""
+
+import logging
+import time
+from typing import Callable, Dict, Hashable, Tuple
+
+Key = Tuple[str, str]
+
+
+class InMemorySink:
+    """
+    Aggregates observations in memory.
+    
+    Attributes:
+    -----------
+    timings : dict
+        key -> [observations, total seconds, max seconds]
+    counters : dict
+        key -> running total
+    """
+    
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+    
+    def record(self, timings: Dict[Key, float], counters: Dict[Key, int]):
+        """Fold the observations of one call into the aggregates."""
+        for key, seconds in timings.items():
+            stats = self.timings.get(key)
+            if stats is None:
+                self.timings[key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+        for key, amount in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Aggregates keyed by 'kind/name'.
+        
+        Returns:
+        --------
+        dict
+            'timings': {'count', 'total', 'mean', 'max'} per key (seconds),
+            'counters': running total per key
+        """
+        return {
+            'timings': {f'{kind}/{name}': {'count': count, 'total': total,
+                                           'mean': total / count, 'max': maximum}
+                        for (kind, name), (count, total, maximum) in self.timings.items()},
+            'counters': {f'{kind}/{name}': value for (kind, name), value in self.counters.items()},
+        }
+    
+    def reset(self):
+        """Drop every aggregate."""
+        self.timings.clear()
+        self.counters.clear()
+
+
+class PrometheusSink(InMemorySink):
+    """In-memory aggregates rendered in the Prometheus text exposition format."""
+    
+    def __init__(self, prefix: str = 'school_commute'):
+        super().__init__()
+        self.prefix = prefix
+    
+    def render(self) -> str:
+        """Text dump of every aggregate, e.g. for a /metrics endpoint."""
+        
+        lines = []
+        by_kind = {}
+        for (kind, name), stats in sorted(self.timings.items()):
+            by_kind.setdefault(kind, []).append((name, stats))
+        for kind, entries in by_kind.items():
+            metric = f'{self.prefix}_{kind}_seconds'
+            lines.append(f'# HELP {metric} Time spent per {kind}')
+            lines.append(f'# TYPE {metric} summary')
+            for name, (count, total, _) in entries:
+                lines.append(f'{metric}_sum{{{kind}="{name}"}} {total!r}')
+                lines.append(f'{metric}_count{{{kind}="{name}"}} {count}')
+        
+        by_kind = {}
+        for (kind, name), value in sorted(self.counters.items()):
+            by_kind.setdefault(kind, []).append((name, value))
+        for kind, entries in by_kind.items():
+            metric = f'{self.prefix}_{kind}_total'
+            lines.append(f'# HELP {metric} Running count of {kind}')
+            lines.append(f'# TYPE {metric} counter')
+            for name, value in entries:
+                lines.append(f'{metric}{{name="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class LogSink:
+    """
+    Writes one log line per instrumented call.
+    
+    Parameters:
+    -----------
+    logger : logging.Logger
+        Destination (the 'school_commute.instrumentation' logger if None)
+    level : int
+        Logging level of the lines
+    """
+    
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger('school_commute.instrumentation')
+        self.level = level
+    
+    def record(self, timings: Dict[Key, float], counters: Dict[Key, int]):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        parts = [f'{kind}/{name}={seconds * 1e6:.1f}us' for (kind, name), seconds in timings.items()]
+        parts += [f'{kind}/{name}={value}' for (kind, name), value in counters.items()]
+        self.logger.log(self.level, ' '.join(parts))
+
+
+class Instrumentation:
+    """
+    Collects timings and counters of model calls and forwards them to sinks.
+    
+    One call's observations are buffered on the instance, so an
+    Instrumentation must not be shared by models running in different
+    threads at the same time.
+    
+    Parameters:
+    -----------
+    *sinks :
+        Objects with ``record(timings, counters)``; an InMemorySink if none
+    """
+    
+    def __init__(self, *sinks):
+        self.sinks = sinks or (InMemorySink(),)
+        self._timings = None
+        self._counters = None
+    
+    def record_call(self, call: str, function: Callable, *args):
+        """Run ``function(*args)`` as one instrumented call and emit its observations."""
+        
+        if self._timings is not None:
+            # Nested call (e.g. predict_batch -> evaluate_batch): part of the outer one
+            return function(*args)
+        
+        timings, counters = self._timings, self._counters = {}, {}
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        except Exception:
+            counters[('errors', call)] = 1
+            raise
+        finally:
+            timings[('call', call)] = time.perf_counter() - started
+            self._timings = self._counters = None
+            for sink in self.sinks:
+                sink.record(timings, counters)
+    
+    def time_node(self, node: str, level: int, function: Callable, *args):
+        """Run one node computation, adding its time to the node and its level."""
+        
+        started = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - started
+        timings = self._timings
+        if timings is not None:
+            timings[('node', node)] = timings.get(('node', node), 0.0) + elapsed
+            level_key = ('level', str(level))
+            timings[level_key] = timings.get(level_key, 0.0) + elapsed
+        return result
+    
+    def count(self, kind: str, name: Hashable, amount: int = 1):
+        """Add to a counter of the current call (ignored outside instrumented calls)."""
+        counters = self._counters
+        if counters is not None:
+            counters[(kind, name)] = counters.get((kind, name), 0) + amount
@@ -0,0 +1,176 @@
+"""
+Inverse queries for the School Commute Fuzzy Logic Model
+
+Answers questions like "how late can Parent B wake on a rainy weekday and
+still have >= 85% success?" without brute-force scans over ``predict``.
+
+The success probability is piecewise in each wake time, with jumps at the
+membership breakpoints, and not monotonic overall. A coarse grid evaluated
+in one ``evaluate_batch`` call brackets every point where it crosses the
+target; the brackets are then refined together by bisection, one batched
+evaluation per step. Boundaries are reported on their feasible side, so
+every returned wake time reaches the target. Feasible or infeasible
+stretches narrower than the grid ``resolution`` can be missed.
+"""
+
+from collections import namedtuple
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from .school_commute_model import SchoolCommuteFuzzyModel
+except ImportError:
+    from school_commute_model import SchoolCommuteFuzzyModel
+
+
+WAKE_RANGE = (5.5, 8.5)
+DEFAULT_RESOLUTION = 1.0 / 60.0
+DEFAULT_TOLERANCE = 1e-4
+
+WAKE_INPUTS = ('parent_a_wake', 'parent_b_wake')
+
+# Feasible wake time intervals for every value of the other parent's wake time
+WakeRegion = namedtuple('WakeRegion', ['other_wake', 'intervals'])
+
+
+def _success(model: SchoolCommuteFuzzyModel, weather, day_type, solve_for: str,
+             other_wake: np.ndarray, wake: np.ndarray) -> np.ndarray:
+    """Success probabilities with ``solve_for`` set to ``wake`` and the other parent to ``other_wake``."""
+    n = len(wake)
+    parent_a, parent_b = (wake, other_wake) if solve_for == 'parent_a_wake' else (other_wake, wake)
+    return model.evaluate_batch(np.full(n, weather), np.full(n, day_type), parent_a, parent_b,
+                                outputs=('success_probability',))['success_probability']
+
+
+def _solve(target: float, weather, day_type, other_wakes, solve_for: str,
+           model: SchoolCommuteFuzzyModel, resolution: float, tolerance: float,
+           wake_range: Tuple[float, float]) -> List[WakeRegion]:
+    """Feasible intervals of ``solve_for`` for every other wake time, by bracketing and bisection."""
+    
+    if solve_for not in WAKE_INPUTS:
+        raise ValueError(f"solve_for must be one of {WAKE_INPUTS}")
+    if resolution <= 0 or tolerance <= 0:
+        raise ValueError("resolution and tolerance must be positive")
+    model = model or SchoolCommuteFuzzyModel()
+    other = np.asarray(other_wakes, dtype=float).ravel()
+    low, high = wake_range
+    grid = np.linspace(low, high, int(np.ceil((high - low) / resolution)) + 1)
+    
+    # Bracket: one batched evaluation of the grid for every other wake time
+    values = _success(model, weather, day_type, solve_for, np.repeat(other, len(grid)),
+                      np.tile(grid, len(other))).reshape(len(other), len(grid))
+    feasible = values >= target
+    rows, columns = np.nonzero(feasible[:, 1:] != feasible[:, :-1])
+    lower, upper = grid[columns], grid[columns + 1]
+    lower_feasible = feasible[rows, columns]
+    
+    # Bisect every bracket at once until it is narrower than the tolerance
+    while len(rows) and np.max(upper - lower) > tolerance:
+        middle = 0.5 * (lower + upper)
+        middle_feasible = _success(model, weather, day_type, solve_for, other[rows], middle) >= target
+        same = middle_feasible == lower_feasible
+        lower = np.where(same, middle, lower)
+        upper = np.where(same, upper, middle)
+    
+    # Feasible side of every crossing: an interval ends at ``lower`` or starts at ``upper``
+    boundaries = np.where(lower_feasible, lower, upper)
+    regions = []
+    for row, other_wake in enumerate(other):
+        crossings = boundaries[rows == row]
+        edges = list(crossings)
+        if feasible[row, 0]:
+            edges.insert(0, grid[0])
+        if feasible[row, -1]:
+            edges.append(grid[-1])
+        intervals = [(float(start), float(end)) for start, end in zip(edges[::2], edges[1::2])]
+        regions.append(WakeRegion(float(other_wake), intervals))
+    return regions
+
+
+def feasible_wake_intervals(target: float, weather: str, day_type: str, other_wake: float,
+                            solve_for: str = 'parent_b_wake', model: SchoolCommuteFuzzyModel = None,
+                            resolution: float = DEFAULT_RESOLUTION, tolerance: float = DEFAULT_TOLERANCE,
+                            wake_range: Tuple[float, float] = WAKE_RANGE) -> List[Tuple[float, float]]:
+    """
+    Wake time intervals in which the success probability is at least ``target``.
+    
+    Parameters:
+    -----------
+    target : float
+        Required success probability (0-100)
+    weather, day_type : str
+        Fixed conditions, as for ``predict``
+    other_wake : float
+        Fixed wake time of the other parent (decimal hours)
+    solve_for : str
+        'parent_b_wake' or 'parent_a_wake'
+    model : SchoolCommuteFuzzyModel
+        Model to query (a default model if None)
+    resolution : float
+        Bracketing grid step in hours
+    tolerance : float
+        Bisection tolerance in hours; every boundary lies within it of the
+        true crossing, on its feasible side
+    wake_range : tuple
+        Wake times searched
+    
+    Returns:
+    --------
+    list
+        (start, end) intervals in increasing order; empty if the target is
+        unreachable
+    """
+    return _solve(target, weather, day_type, [other_wake], solve_for, model, resolution, tolerance,
+                  wake_range)[0].intervals
+
+
+def latest_wake_time(target: float, weather: str, day_type: str, other_wake: float,
+                     solve_for: str = 'parent_b_wake', model: SchoolCommuteFuzzyModel = None,
+                     resolution: float = DEFAULT_RESOLUTION, tolerance: float = DEFAULT_TOLERANCE,
+                     wake_range: Tuple[float, float] = WAKE_RANGE):
+    """
+    Latest wake time that still reaches ``target`` (None if none does).
+    
+    Parameters are those of ``feasible_wake_intervals``.
+    """
+    intervals = feasible_wake_intervals(target, weather, day_type, other_wake, solve_for, model,
+                                        resolution, tolerance, wake_range)
+    return intervals[-1][1] if intervals else None
+
+
+def feasible_wake_regions(target: float, weather: str, day_type: str, other_wakes,
+                          solve_for: str = 'parent_b_wake', model: SchoolCommuteFuzzyModel = None,
+                          resolution: float = DEFAULT_RESOLUTION, tolerance: float = DEFAULT_TOLERANCE,
+                          wake_range: Tuple[float, float] = WAKE_RANGE) -> List[WakeRegion]:
+    """
+    Feasible intervals for many wake times of the other parent, solved together.
+    
+    Parameters are those of ``feasible_wake_intervals``, with ``other_wakes``
+    an array of the other parent's wake times.
+    
+    Returns:
+    --------
+    list of WakeRegion
+        (other_wake, intervals) per entry of ``other_wakes``
+    """
+    return _solve(target, weather, day_type, other_wakes, solve_for, model, resolution, tolerance,
+                  wake_range)
+
+
+def latest_wake_curve(target: float, weather: str, day_type: str, other_wakes,
+                      solve_for: str = 'parent_b_wake', model: SchoolCommuteFuzzyModel = None,
+                      resolution: float = DEFAULT_RESOLUTION, tolerance: float = DEFAULT_TOLERANCE,
+                      wake_range: Tuple[float, float] = WAKE_RANGE) -> np.ndarray:
+    """
+    Boundary curve: latest feasible wake time for every other wake time.
+    
+    Returns:
+    --------
+    ndarray
+        Latest wake time per entry of ``other_wakes``, NaN where the target
+        is unreachable
+    """
+    regions = _solve(target, weather, day_type, other_wakes, solve_for, model, resolution, tolerance,
+                     wake_range)
+    return np.array([region.intervals[-1][1] if region.intervals else np.nan for region in regions])
@@ -0,0 +1,373 @@
+"""
+Vectorized Mamdani inference for the School Commute Fuzzy Logic Model
+
+This module runs the MATLAB ``mamfis`` definitions of the Level 2-5 nodes
+(``matlab/compute_*.m``) with NumPy on whole batches. It follows the MATLAB
+defaults: AND = min, OR = max, min implication, max aggregation and a
+centroid over a shared grid of 101 output samples, as used by ``evalfis``.
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Output samples used by MATLAB's evalfis for centroid defuzzification
+NUM_SAMPLE_POINTS = 101
+
+# Rows evaluated at once; bounds the (rows x samples) aggregation matrix
+CHUNK_SIZE = 4096
+
+_AVAILABILITY_TERMS = {
+    'low': ('trapmf', (0, 0, 2, 3)),
+    'medium': ('trimf', (2, 5, 8)),
+    'high': ('trapmf', (7, 8, 10, 10)),
+}
+
+_EFFICIENCY_TERMS = {
+    'poor': ('trapmf', (0, 0, 2, 3)),
+    'moderate': ('trimf', (2, 5, 8)),
+    'excellent': ('trapmf', (7, 8, 10, 10)),
+}
+
+_BREAKFAST_TERMS = {
+    'quick': ('trapmf', (10, 10, 15, 20)),
+    'normal': ('trimf', (18, 27.5, 37)),
+    'slow': ('trapmf', (35, 40, 45, 45)),
+}
+
+_DRESSING_TERMS = {
+    'quick': ('trapmf', (10, 10, 15, 18)),
+    'normal': ('trimf', (16, 25, 34)),
+    'slow': ('trapmf', (32, 36, 40, 40)),
+}
+
+_TRAVEL_TERMS = {
+    'normal': ('trapmf', (1.0, 1.0, 1.1, 1.3)),
+    'moderate_delay': ('trimf', (1.2, 1.4, 1.7)),
+    'major_delay': ('trapmf', (1.5, 2.0, 2.5, 2.5)),
+}
+
+# FIS definitions transcribed from the MATLAB implementation. Each input and
+# the output is (name, range, terms); rule rows follow MATLAB's ruleList
+# layout: one MF index per input (1-based, 0 = don't care, negative = NOT),
+# the output MF index, the rule weight and the connection (1 = AND, 2 = OR).
+LEVEL_FIS_DEFINITIONS = {
+    'final_parent_availability': {
+        'inputs': [
+            ('base_availability', (0, 10), _AVAILABILITY_TERMS),
+            ('run_duration', (0, 120), {
+                'none': ('trapmf', (0, 0, 5, 10)),
+                'short': ('trimf', (5, 20, 35)),
+                'medium': ('trimf', (30, 45, 60)),
+                'long': ('trimf', (55, 75, 95)),
+                'very_long': ('trapmf', (90, 100, 120, 120)),
+            }),
+        ],
+        'output': ('final_availability', (0, 10), _AVAILABILITY_TERMS),
+        'rules': [
+            [1, 1, 1, 1, 1], [2, 1, 2, 1, 1], [3, 1, 3, 1, 1],
+            [1, 2, 1, 1, 1], [2, 2, 2, 0.9, 1], [3, 2, 3, 0.85, 1],
+            [1, 3, 1, 1, 1], [2, 3, 2, 0.8, 1], [3, 3, 2, 1, 1],
+            [1, 4, 1, 1, 1], [2, 4, 1, 0.8, 1], [3, 4, 2, 0.7, 1],
+            [1, 5, 1, 1, 1], [2, 5, 1, 1, 1], [3, 5, 1, 0.5, 1], [3, 5, 2, 0.5, 1],
+        ],
+    },
+    'weather_travel_impact': {
+        'inputs': [
+            ('weather', (1, 5), {
+                'clear': ('trapmf', (1, 1, 2, 2.5)),
+                'light_rain': ('trimf', (2.5, 3, 3.5)),
+                'heavy_rain': ('trimf', (3.5, 4, 4.5)),
+                'snow': ('trapmf', (4.5, 5, 5, 5)),
+            }),
+        ],
+        'output': ('travel_multiplier', (1.0, 2.5), _TRAVEL_TERMS),
+        'rules': [
+            [1, 1, 1, 1], [2, 2, 1, 1], [3, 2, 0.5, 1], [3, 3, 0.5, 1], [4, 3, 1, 1],
+        ],
+    },
+    'breakfast_efficiency': {
+        'inputs': [('final_availability', (0, 10), _AVAILABILITY_TERMS)],
+        'output': ('breakfast_time', (10, 45), _BREAKFAST_TERMS),
+        'rules': [[3, 1, 1, 1], [2, 2, 1, 1], [1, 3, 1, 1]],
+    },
+    'dressing_efficiency': {
+        'inputs': [('final_availability', (0, 10), _AVAILABILITY_TERMS)],
+        'output': ('dressing_time', (10, 40), _DRESSING_TERMS),
+        'rules': [[3, 1, 1, 1], [2, 2, 1, 1], [1, 3, 1, 1]],
+    },
+    'transportation_logistics': {
+        'inputs': [
+            ('final_availability', (0, 10), _AVAILABILITY_TERMS),
+            ('day_type', (0, 1), {
+                'weekend': ('trimf', (-0.5, 0, 0.5)),
+                'weekday': ('trimf', (0.5, 1, 1.5)),
+            }),
+        ],
+        'output': ('transport_efficiency', (0, 10), _EFFICIENCY_TERMS),
+        'rules': [
+            [3, 1, 3, 1, 1], [3, 2, 3, 0.9, 1],
+            [2, 1, 2, 1, 1], [2, 2, 2, 0.8, 1],
+            [1, 1, 1, 0.8, 1], [1, 2, 1, 1, 1],
+            [3, 2, 2, 0.3, 1], [1, 1, 2, 0.2, 1],
+        ],
+    },
+    'morning_routine_efficiency': {
+        'inputs': [
+            ('breakfast_time', (10, 45), _BREAKFAST_TERMS),
+            ('dressing_time', (10, 40), _DRESSING_TERMS),
+        ],
+        'output': ('routine_efficiency', (0, 10), _EFFICIENCY_TERMS),
+        'rules': [
+            [1, 1, 3, 1, 1],
+            [1, 2, 3, 0.8, 1], [2, 1, 3, 0.8, 1],
+            [2, 2, 2, 1, 1],
+            [1, 3, 2, 0.9, 1], [3, 1, 2, 0.9, 1],
+            [2, 3, 2, 0.5, 1], [3, 2, 2, 0.5, 1], [2, 3, 1, 0.5, 1], [3, 2, 1, 0.5, 1],
+            [3, 3, 1, 1, 1],
+        ],
+    },
+    'school_arrival_probability': {
+        'inputs': [
+            ('routine_efficiency', (0, 10), _EFFICIENCY_TERMS),
+            ('transport_efficiency', (0, 10), _EFFICIENCY_TERMS),
+            ('weather_impact', (1.0, 2.5), _TRAVEL_TERMS),
+        ],
+        'output': ('success_probability', (0, 100), {
+            'very_low': ('trapmf', (0, 0, 15, 25)),
+            'low': ('trimf', (20, 35, 50)),
+            'medium': ('trimf', (45, 60, 75)),
+            'high': ('trimf', (70, 85, 95)),
+            'very_high': ('trapmf', (80, 90, 100, 100)),
+        }),
+        'rules': [
+            [3, 3, 1, 5, 1, 1],
+            [3, 2, 1, 4, 1, 1],
+            [2, 3, 1, 4, 1, 1],
+            [2, 2, 1, 3, 1, 1],
+            [3, 3, 2, 4, 1, 1], [3, 3, 3, 3, 1, 1],
+            [3, 2, 2, 3, 1, 1], [3, 2, 3, 2, 1, 1],
+            [2, 3, 2, 3, 1, 1], [2, 3, 3, 2, 1, 1],
+            [2, 2, 2, 2, 1, 1], [2, 2, 3, 1, 1, 1],
+            [1, 3, 1, 3, 1, 1], [3, 1, 1, 3, 1, 1],
+            [1, 2, 1, 2, 1, 1], [2, 1, 1, 2, 1, 1], [1, 1, 1, 1, 1, 1],
+            [1, 3, 2, 2, 1, 1], [1, 3, 3, 1, 1, 1],
+            [3, 1, 2, 2, 1, 1], [3, 1, 3, 1, 1, 1],
+            [1, 2, 2, 1, 1, 1], [2, 1, 2, 1, 1, 1],
+            [1, 1, 2, 1, 1, 1], [1, 1, 3, 1, 1, 1],
+        ],
+    },
+}
+
+
+def mf_corners(terms: Dict) -> np.ndarray:
+    """Write trimf/trapmf terms as an (n_terms, 4) table of trapezoid corners."""
+    
+    corners = []
+    for name, (kind, params) in terms.items():
+        if kind == 'trimf':
+            a, b, c = params
+            corners.append((a, b, b, c))
+        elif kind == 'trapmf':
+            corners.append(tuple(params))
+        else:
+            raise ValueError(f"Unsupported membership function '{kind}' for term '{name}'")
+    return np.array(corners, dtype=float)
+
+
+def trapezoid_membership(x: np.ndarray, corners: np.ndarray) -> np.ndarray:
+    """
+    Exact trapezoidal membership of ``x`` in every term of a corner table.
+    
+    Returns an array of shape ``x.shape + (n_terms,)``. Vertical shoulders
+    (a == b or c == d) count as full membership from the shoulder inwards,
+    like MATLAB's trimf/trapmf.
+    """
+    
+    a, b, c, d = corners.T
+    x = np.asarray(x, dtype=float)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rise = np.where(b > a, (x - a) / (b - a), 1.0)
+        fall = np.where(d > c, (d - x) / (d - c), 1.0)
+    membership = np.clip(np.minimum(rise, fall), 0.0, 1.0)
+    return np.where((x < a) | (x > d), 0.0, membership)
+
+
+class RuleBase:
+    """
+    A MATLAB-style rule table compiled into gather + min/max reductions.
+    
+    Each rule row holds one antecedent MF index per input (1-based, 0 for
+    "don't care", negative for NOT), then the consequent MF index, the
+    weight and the connection (1 = AND, 2 = OR). Compiling turns the table
+    into an index array into the concatenated memberships, their
+    complements and constant 1/0 columns, so firing every rule of a batch is
+    one gather into a (rows x rules x inputs) tensor followed by a min or
+    max over the inputs.
+    
+    Parameters:
+    -----------
+    rules : list
+        Rule rows
+    input_sizes : list
+        Number of MF terms per input variable
+    n_outputs : int
+        Number of output MF terms
+    """
+    
+    def __init__(self, rules: List[List[float]], input_sizes: List[int], n_outputs: int):
+        table = np.array(rules, dtype=float).reshape(len(rules), -1)
+        n_inputs = len(input_sizes)
+        if table.shape[1] != n_inputs + 3:
+            raise ValueError(f"every rule needs {n_inputs + 3} columns")
+        
+        antecedents = table[:, :n_inputs].astype(int)
+        consequents = table[:, n_inputs].astype(int)
+        connections = table[:, n_inputs + 2].astype(int)
+        if np.any(np.abs(antecedents) > np.array(input_sizes)):
+            raise ValueError("rule antecedents must be input MF indices")
+        if np.any((consequents < 1) | (consequents > n_outputs)):
+            raise ValueError(f"rule consequents must be output MF indices 1-{n_outputs}")
+        if not np.all(np.isin(connections, (1, 2))):
+            raise ValueError("rule connections must be 1 (AND) or 2 (OR)")
+        if np.any(np.all(antecedents == 0, axis=1)):
+            raise ValueError("every rule needs at least one antecedent")
+        
+        # Columns: memberships, complements, then constant 1 and 0 that make
+        # a "don't care" neutral under AND and OR respectively
+        offsets = np.concatenate([[0], np.cumsum(input_sizes)[:-1]])
+        n_terms = int(np.sum(input_sizes))
+        neutral = np.where(connections == 1, 2 * n_terms, 2 * n_terms + 1)
+        index = np.select([antecedents > 0, antecedents < 0, antecedents == 0],
+                          [offsets + antecedents - 1, n_terms + offsets - antecedents - 1,
+                           np.broadcast_to(neutral[:, None], antecedents.shape)])
+        
+        self.n_terms = n_terms
+        self.n_outputs = n_outputs
+        self.and_rules = np.flatnonzero(connections == 1)
+        self.or_rules = np.flatnonzero(connections == 2)
+        self.index = index
+        self.weights = table[:, n_inputs + 1]
+        self.weighted = bool(np.any(self.weights != 1.0))
+        self.rules_per_output = [np.flatnonzero(consequents == term + 1) for term in range(n_outputs)]
+    
+    def activations(self, memberships: List[np.ndarray]) -> np.ndarray:
+        """Firing strength of every rule, shape (rows, rules)."""
+        
+        membership = np.concatenate(memberships, axis=1)
+        rows = len(membership)
+        columns = np.concatenate(
+            [membership, 1.0 - membership, np.ones((rows, 1)), np.zeros((rows, 1))], axis=1)
+        
+        activation = np.empty((rows, len(self.index)))
+        if len(self.and_rules):
+            activation[:, self.and_rules] = np.min(columns[:, self.index[self.and_rules]], axis=2)
+        if len(self.or_rules):
+            activation[:, self.or_rules] = np.max(columns[:, self.index[self.or_rules]], axis=2)
+        if self.weighted:
+            activation *= self.weights
+        return activation
+    
+    def strengths(self, memberships: List[np.ndarray]) -> np.ndarray:
+        """
+        Strongest rule activation per output term, shape (rows, n_outputs).
+        
+        Parameters:
+        -----------
+        memberships : list
+            One (rows, n_terms) membership array per input variable
+        """
+        
+        activation = self.activations(memberships)
+        strengths = np.zeros((len(activation), self.n_outputs))
+        for term, rules in enumerate(self.rules_per_output):
+            if len(rules):
+                strengths[:, term] = np.max(activation[:, rules], axis=1)
+        return strengths
+
+
+class MamdaniFIS:
+    """
+    A Mamdani fuzzy inference system evaluated on batches of inputs.
+    
+    Parameters:
+    -----------
+    name : str
+        System name
+    inputs : list
+        (name, range, terms) per input variable
+    output : tuple
+        (name, range, terms) of the output variable
+    rules : list
+        MATLAB-style rule rows
+    num_sample_points : int
+        Output samples for the shared-grid centroid
+    """
+    
+    def __init__(self, name: str, inputs: List[Tuple], output: Tuple, rules: List[List[float]],
+                 num_sample_points: int = NUM_SAMPLE_POINTS):
+        self.name = name
+        self.input_names = [input_name for input_name, _, _ in inputs]
+        self.input_corners = [mf_corners(terms) for _, _, terms in inputs]
+        
+        self.output_name, self.output_range, output_terms = output
+        self.output_grid = np.linspace(*self.output_range, num_sample_points)
+        self.output_mfs = trapezoid_membership(self.output_grid, mf_corners(output_terms)).T
+        
+        try:
+            self.rule_base = RuleBase(rules, [len(corners) for corners in self.input_corners],
+                                      len(output_terms))
+        except ValueError as error:
+            raise ValueError(f"{name}: {error}") from None
+    
+    def fuzzify(self, inputs: List[np.ndarray]) -> List[np.ndarray]:
+        """Membership of every input value in every term, one (rows, n_terms) array per input."""
+        return [trapezoid_membership(values, corners)
+                for values, corners in zip(inputs, self.input_corners)]
+    
+    def term_strengths(self, inputs: List[np.ndarray]) -> np.ndarray:
+        """Fire every rule and keep the strongest activation per output term."""
+        return self.rule_base.strengths(self.fuzzify(inputs))
+    
+    def defuzzify(self, strengths: np.ndarray) -> np.ndarray:
+        """
+        Centroid of the min-implied, max-aggregated output on the shared grid.
+        
+        Rows in which no rule fires return the middle of the output range,
+        as MATLAB's evalfis does.
+        """
+        
+        aggregated = np.zeros((len(strengths), len(self.output_grid)))
+        for term, output_mf in enumerate(self.output_mfs):
+            np.maximum(aggregated, np.minimum(strengths[:, term, None], output_mf), out=aggregated)
+        
+        # Sequential sums keep every row independent of the batch size
+        total = np.cumsum(aggregated, axis=1)[:, -1]
+        moment = np.cumsum(aggregated * self.output_grid, axis=1)[:, -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centroid = moment / total
+        return np.where(total > 0, centroid, 0.5 * sum(self.output_range))
+    
+    def evaluate(self, *inputs) -> np.ndarray:
+        """Evaluate the FIS for equal-length arrays, one per input variable."""
+        
+        inputs = [np.atleast_1d(np.asarray(values, dtype=float)) for values in inputs]
+        if len(inputs) != len(self.input_names):
+            raise ValueError(f"{self.name} takes inputs {self.input_names}")
+        
+        output = np.empty(len(inputs[0]))
+        for start in range(0, len(output), CHUNK_SIZE):
+            chunk = slice(start, start + CHUNK_SIZE)
+            output[chunk] = self.defuzzify(self.term_strengths([values[chunk] for values in inputs]))
+        return output
+
+
+def build_level_systems(definitions: Dict = None,
+                        num_sample_points: int = NUM_SAMPLE_POINTS) -> Dict[str, MamdaniFIS]:
+    """Build a MamdaniFIS for every Level 2-5 node definition."""
+    
+    definitions = definitions or LEVEL_FIS_DEFINITIONS
+    return {
+        name: MamdaniFIS(name, definition['inputs'], definition['output'],
+                         definition['rules'], num_sample_points)
+        for name, definition in definitions.items()
+    }
@@ -0,0 +1,118 @@
+"""
+Parallel parameter sweeps for the School Commute Fuzzy Logic Model
+
+Evaluates the model on the Cartesian product of weather, day type and both
+wake times. The flattened grid is cut into tiles that a process pool scores
+with ``evaluate_batch``, evaluating only the nodes the requested outputs
+need. Every worker writes its results straight into a shared-memory array,
+so only tile bounds travel between processes.
+"""
+
+import os
+from multiprocessing import get_context, shared_memory
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .school_commute_model import SchoolCommuteFuzzyModel
+except ImportError:
+    from school_commute_model import SchoolCommuteFuzzyModel
+
+
+DEFAULT_TILE_SIZE = 16384
+
+# Per-process state set by _init_worker
+_worker = {}
+
+
+def _score_tile(model: SchoolCommuteFuzzyModel, axes: Sequence[np.ndarray], outputs: Sequence[str],
+                results: np.ndarray, start: int, stop: int):
+    """Score flat grid indices [start, stop) into ``results`` of shape (n_outputs, n_points)."""
+    
+    shape = tuple(len(axis) for axis in axes)
+    index = np.unravel_index(np.arange(start, stop), shape)
+    values = model.evaluate_batch(*(axis[i] for axis, i in zip(axes, index)), outputs=outputs)
+    
+    for row, name in enumerate(outputs):
+        results[row, start:stop] = values[name]
+
+
+def _init_worker(model: SchoolCommuteFuzzyModel, axes: Sequence[np.ndarray], outputs: Sequence[str],
+                 shm_name: str, n_points: int):
+    """Attach the shared result array once per worker process."""
+    block = shared_memory.SharedMemory(name=shm_name)
+    _worker.update(model=model, axes=axes, outputs=outputs, block=block,
+                   results=np.ndarray((len(outputs), n_points), dtype=model.dtype, buffer=block.buf))
+
+
+def _run_tile(bounds: Tuple[int, int]) -> int:
+    start, stop = bounds
+    _score_tile(_worker['model'], _worker['axes'], _worker['outputs'], _worker['results'], start, stop)
+    return stop - start
+
+
+def parameter_sweep(weather: Sequence, day_type: Sequence, parent_a_wake: Sequence,
+                    parent_b_wake: Sequence, model: SchoolCommuteFuzzyModel = None,
+                    outputs: Sequence[str] = ('success_probability',), workers: int = None,
+                    tile_size: int = DEFAULT_TILE_SIZE) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the model on a weather x day type x Parent A x Parent B grid.
+    
+    Parameters:
+    -----------
+    weather, day_type : sequence
+        Axis values, as names or integer codes (see ``predict_batch``)
+    parent_a_wake, parent_b_wake : sequence of float
+        Wake time axes in decimal hours, at any resolution
+    model : SchoolCommuteFuzzyModel
+        Model to evaluate (a default model if None); it is sent to each
+        worker once
+    outputs : sequence of str
+        'success_probability' and/or names of intermediate outputs
+    workers : int
+        Worker processes (os.cpu_count() if None); 1 evaluates in-process
+    tile_size : int
+        Grid points per task
+    
+    Returns:
+    --------
+    dict
+        One array of shape (len(weather), len(day_type), len(parent_a_wake),
+        len(parent_b_wake)) of the model's dtype per requested output
+    """
+    
+    if tile_size < 1:
+        raise ValueError("tile_size must be positive")
+    model = model or SchoolCommuteFuzzyModel()
+    axes = [np.asarray(axis).ravel() for axis in (weather, day_type, parent_a_wake, parent_b_wake)]
+    shape = tuple(len(axis) for axis in axes)
+    n_points = int(np.prod(shape))
+    outputs = list(outputs)
+    
+    # Validate axes and output names on one point before starting workers
+    if n_points:
+        model.evaluate_batch(*(axis[:1] for axis in axes), outputs=outputs)
+    
+    tiles = [(start, min(start + tile_size, n_points)) for start in range(0, n_points, tile_size)]
+    workers = min(workers or os.cpu_count() or 1, max(len(tiles), 1))
+    
+    if workers == 1:
+        results = np.empty((len(outputs), n_points), dtype=model.dtype)
+        for start, stop in tiles:
+            _score_tile(model, axes, outputs, results, start, stop)
+    else:
+        block = shared_memory.SharedMemory(create=True, size=max(len(outputs) * n_points * model.dtype.itemsize, 1))
+        try:
+            shared = np.ndarray((len(outputs), n_points), dtype=model.dtype, buffer=block.buf)
+            with get_context().Pool(workers, _init_worker,
+                                    (model, axes, outputs, block.name, n_points)) as pool:
+                for _ in pool.imap_unordered(_run_tile, tiles):
+                    pass
+            results = shared.copy()
+            del shared
+        finally:
+            block.close()
+            block.unlink()
+    
+    return {name: results[row].reshape(shape) for row, name in enumerate(outputs)}
@@ -0,0 +1,61 @@
+"""
+Memoization for the School Commute Fuzzy Logic Model
+
+Provides a small least-recently-used cache with hit, miss and eviction
+counters. ``SchoolCommuteFuzzyModel`` keeps one per hierarchy node when
+caching is enabled (see its ``cache_size`` argument).
+"""
+
+from collections import OrderedDict, namedtuple
+from typing import Callable, Hashable
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'size', 'capacity'])
+
+
+class LRUCache:
+    """
+    A bounded mapping that evicts the least recently used entry.
+    
+    Parameters:
+    -----------
+    capacity : int
+        Maximum number of stored entries (at least 1)
+    """
+    
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = int(capacity)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable, compute: Callable):
+        """Return the value cached for ``key``, calling ``compute(*key)`` on a miss."""
+        
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = self._entries[key] = compute(*key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return value
+        
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+    
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+    
+    def info(self) -> CacheInfo:
+        """Counters and occupancy, like ``functools.lru_cache``'s ``cache_info``."""
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self._entries), self.capacity)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
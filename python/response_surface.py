@@ -0,0 +1,348 @@
+"""
+Precomputed response surfaces for the School Commute Fuzzy Logic Model
+
+The model's input space is small: 5 weathers x 2 day types x a square of
+wake times. ``build_response_surface`` tabulates the success probability
+and every intermediate output on a fine wake time grid and writes them to a
+single versioned file. ``ResponseSurface.load`` memory-maps that file, so
+any number of worker processes share one page-cached copy, and answers
+queries in constant time by bilinear interpolation or nearest grid point.
+
+File layout (little endian):
+    8 bytes   magic b'SCSURF\\0\\0'
+    4 bytes   format version (uint32)
+    4 bytes   metadata length in bytes (uint32)
+    metadata  UTF-8 JSON, padded with spaces so the table starts on a
+              64-byte boundary
+    table     float64, shape (outputs, weathers, day types, wake A, wake B)
+
+The metadata records the grid, the model settings and a fingerprint of its
+MF parameters and rules, and the maximum (and p99 and mean) absolute
+deviation of both lookup methods from the live model, measured at random
+off-grid points when the file is built. The crisp model has jumps in the
+wake times, so the maximum deviation near a jump is the jump height even
+on a fine grid; the p99 and mean show how rare such points are.
+
+Usage:
+    python -m response_surface build surface.scsurf --step-minutes 1
+    python -m response_surface info surface.scsurf
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+try:
+    from .parameter_sweep import parameter_sweep
+    from .school_commute_model import (DEFUZZ_METHODS, ENGINES, INTERMEDIATE_OUTPUTS,
+                                       RUN_DECISION_METHODS, SchoolCommuteFuzzyModel)
+except ImportError:
+    from parameter_sweep import parameter_sweep
+    from school_commute_model import (DEFUZZ_METHODS, ENGINES, INTERMEDIATE_OUTPUTS,
+                                      RUN_DECISION_METHODS, SchoolCommuteFuzzyModel)
+
+
+MAGIC = b'SCSURF\0\0'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+MODEL_OUTPUTS = ('success_probability',) + INTERMEDIATE_OUTPUTS
+LOOKUP_METHODS = ('linear', 'nearest')
+DAY_TYPES = {'weekend': 0, 'weekday': 1}
+WAKE_RANGE = (5.5, 8.5)
+
+
+def model_fingerprint(model: SchoolCommuteFuzzyModel) -> str:
+    """Hash of everything the tabulated values depend on."""
+    settings = {
+        'mf_params': model.mf_params,
+        'rules': model.run_decision_rules,
+        'defuzz_method': model.defuzz_method,
+        'run_decision_method': model.run_decision_method,
+        'engine': model.engine,
+        'weather_map': model.weather_map,
+        'dtype': model.dtype.name,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseSurface:
+    """
+    Tabulated model outputs with constant-time lookup.
+    
+    Parameters:
+    -----------
+    table : ndarray, shape (outputs, weathers, 2, n, n)
+        Output values (usually a read-only memory map from ``load``)
+    metadata : dict
+        Grid and provenance, as written by ``build_response_surface``
+    """
+    
+    def __init__(self, table: np.ndarray, metadata: Dict):
+        self.table = table
+        self.metadata = metadata
+        self.outputs = tuple(metadata['outputs'])
+        self.weather_map = metadata['weather_map']
+        self.wake_min = metadata['wake_min']
+        self.step = metadata['wake_step']
+        self.n_points = metadata['wake_points']
+    
+    @classmethod
+    def load(cls, path: str) -> 'ResponseSurface':
+        """Memory-map a surface file; pages are shared between processes via the page cache."""
+        
+        with open(path, 'rb') as handle:
+            magic = handle.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a response surface file")
+            version, length = struct.unpack('<II', handle.read(8))
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {version}; "
+                                 f"this code reads version {FORMAT_VERSION}")
+            metadata = json.loads(handle.read(length))
+        table = np.memmap(path, dtype='<f8', mode='r', offset=metadata['offset'],
+                          shape=tuple(metadata['shape']))
+        return cls(table, metadata)
+    
+    def matches(self, model: SchoolCommuteFuzzyModel) -> bool:
+        """Whether the surface was built from a model with the same settings."""
+        return self.metadata['fingerprint'] == model_fingerprint(model)
+    
+    def _encode(self, weather, day_type):
+        weather = np.asarray(weather).ravel()
+        day_type = np.asarray(day_type).ravel()
+        if weather.dtype.kind in 'iu':
+            weather_num = weather.astype(int)
+            if np.any((weather_num < 1) | (weather_num > len(self.weather_map))):
+                raise KeyError(f"Unknown weather codes: {np.unique(weather_num).tolist()}")
+        else:
+            names, inverse = np.unique(weather.astype(str), return_inverse=True)
+            unknown = [name for name in names if name not in self.weather_map]
+            if unknown:
+                raise KeyError(f"Unknown weather conditions: {unknown}")
+            weather_num = np.array([self.weather_map[name] for name in names], dtype=int)[inverse]
+        if day_type.dtype.kind in 'iub':
+            day_type_num = (day_type == 1).astype(int)
+        else:
+            day_type_num = (day_type.astype(str) == 'weekday').astype(int)
+        return weather_num, day_type_num
+    
+    def lookup(self, weather, day_type, parent_a_wake, parent_b_wake,
+               outputs: Sequence[str] = ('success_probability',),
+               method: str = 'linear') -> Dict[str, np.ndarray]:
+        """
+        Look up outputs for arrays of scenarios.
+        
+        Parameters:
+        -----------
+        weather, day_type, parent_a_wake, parent_b_wake : array-like
+            Scenario inputs, as for ``predict_batch``; wake times outside the
+            tabulated range are clamped to its edges
+        outputs : sequence of str
+            Tabulated outputs to return
+        method : str
+            'linear' interpolates bilinearly in the two wake times,
+            'nearest' returns the closest grid point
+        
+        Returns:
+        --------
+        dict
+            One float array per requested output
+        """
+        
+        if method not in LOOKUP_METHODS:
+            raise ValueError(f"method must be one of {LOOKUP_METHODS}")
+        unknown = set(outputs) - set(self.outputs)
+        if unknown:
+            raise ValueError(f"Outputs {sorted(unknown)} are not tabulated; choose from {list(self.outputs)}")
+        
+        weather_num, day_type_num = self._encode(weather, day_type)
+        weather_index = weather_num - 1
+        position_a = np.clip((np.asarray(parent_a_wake, dtype=float).ravel() - self.wake_min) / self.step,
+                             0, self.n_points - 1)
+        position_b = np.clip((np.asarray(parent_b_wake, dtype=float).ravel() - self.wake_min) / self.step,
+                             0, self.n_points - 1)
+        
+        results = {}
+        if method == 'nearest':
+            index_a = np.rint(position_a).astype(int)
+            index_b = np.rint(position_b).astype(int)
+            for name in outputs:
+                table = self.table[self.outputs.index(name)]
+                results[name] = np.asarray(table[weather_index, day_type_num, index_a, index_b])
+            return results
+        
+        index_a = np.minimum(np.floor(position_a).astype(int), self.n_points - 2)
+        index_b = np.minimum(np.floor(position_b).astype(int), self.n_points - 2)
+        fraction_a = position_a - index_a
+        fraction_b = position_b - index_b
+        for name in outputs:
+            table = self.table[self.outputs.index(name)]
+            
+            def corner(da, db):
+                return np.asarray(table[weather_index, day_type_num, index_a + da, index_b + db])
+            
+            low = corner(0, 0) + fraction_b * (corner(0, 1) - corner(0, 0))
+            high = corner(1, 0) + fraction_b * (corner(1, 1) - corner(1, 0))
+            results[name] = low + fraction_a * (high - low)
+        return results
+
+
+def _deviation(surface: ResponseSurface, model: SchoolCommuteFuzzyModel, n_samples: int,
+               seed: int) -> Dict:
+    """Absolute deviation of both lookup methods from the live model at random off-grid points."""
+    
+    rng = np.random.default_rng(seed)
+    low, high = surface.wake_min, surface.wake_min + surface.step * (surface.n_points - 1)
+    inputs = (rng.integers(1, len(surface.weather_map) + 1, n_samples), rng.integers(0, 2, n_samples),
+              rng.uniform(low, high, n_samples), rng.uniform(low, high, n_samples))
+    live = model.evaluate_batch(*inputs, outputs=surface.outputs)
+    
+    deviation = {}
+    for method in LOOKUP_METHODS:
+        approx = surface.lookup(*inputs, outputs=surface.outputs, method=method)
+        deviation[method] = {}
+        for name in surface.outputs:
+            error = np.abs(approx[name] - live[name])
+            deviation[method][name] = {'max': float(error.max()),
+                                       'p99': float(np.percentile(error, 99)),
+                                       'mean': float(error.mean())}
+    return deviation
+
+
+def build_response_surface(path: str, model: SchoolCommuteFuzzyModel = None,
+                           step_minutes: float = 1.0, outputs: Sequence[str] = MODEL_OUTPUTS,
+                           validation_samples: int = 100_000, seed: int = 0,
+                           workers: int = None) -> Dict:
+    """
+    Tabulate the model on a wake time grid and write a surface file.
+    
+    Parameters:
+    -----------
+    path : str
+        File to write (replaced atomically)
+    model : SchoolCommuteFuzzyModel
+        Model to tabulate (a default model if None)
+    step_minutes : float
+        Wake time grid step; the grid spans WAKE_RANGE for both parents
+    outputs : sequence of str
+        Outputs to tabulate
+    validation_samples : int
+        Random off-grid points at which the deviation from the live model
+        is measured and recorded
+    seed : int
+        Seed of the validation points
+    workers : int
+        Processes for the tabulation (see ``parameter_sweep``)
+    
+    Returns:
+    --------
+    dict
+        The metadata written to the file
+    """
+    
+    model = model or SchoolCommuteFuzzyModel()
+    outputs = list(outputs)
+    unknown = set(outputs) - set(MODEL_OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown outputs {sorted(unknown)}; choose from {list(MODEL_OUTPUTS)}")
+    low, high = WAKE_RANGE
+    n_points = int(round((high - low) * 60.0 / step_minutes)) + 1
+    if n_points < 2 or not np.isclose(low + (n_points - 1) * step_minutes / 60.0, high):
+        raise ValueError("step_minutes must divide the wake range into whole steps")
+    wake_grid = np.linspace(low, high, n_points)
+    weather_codes = np.arange(1, len(model.weather_map) + 1)
+    
+    started = time.perf_counter()
+    values = parameter_sweep(weather_codes, np.array([0, 1]), wake_grid, wake_grid, model=model,
+                             outputs=outputs, workers=workers)
+    table = np.stack([values[name] for name in outputs]).astype('<f8')
+    
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'outputs': outputs,
+        'weather_map': model.weather_map,
+        'day_types': DAY_TYPES,
+        'wake_min': low,
+        'wake_step': (high - low) / (n_points - 1),
+        'wake_points': n_points,
+        'shape': list(table.shape),
+        'defuzz_method': model.defuzz_method,
+        'run_decision_method': model.run_decision_method,
+        'engine': model.engine,
+        'dtype': model.dtype.name,
+        'fingerprint': model_fingerprint(model),
+        'validation_samples': validation_samples,
+    }
+    surface = ResponseSurface(table, metadata)
+    metadata['max_deviation'] = _deviation(surface, model, validation_samples, seed) \
+        if validation_samples else None
+    metadata['build_seconds'] = time.perf_counter() - started
+    
+    # The table offset depends on the metadata length, which includes the offset
+    metadata['offset'] = 0
+    while True:
+        header_length = len(MAGIC) + 8 + len(json.dumps(metadata).encode())
+        offset = -(-header_length // ALIGNMENT) * ALIGNMENT
+        if offset == metadata['offset']:
+            break
+        metadata['offset'] = offset
+    encoded = json.dumps(metadata).encode()
+    encoded += b' ' * (offset - len(MAGIC) - 8 - len(encoded))
+    
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as handle:
+        handle.write(MAGIC + struct.pack('<II', FORMAT_VERSION, len(encoded)) + encoded)
+        handle.write(np.ascontiguousarray(table).tobytes())
+    os.replace(temporary, path)
+    return metadata
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    
+    parser = argparse.ArgumentParser(prog='python -m response_surface',
+                                     description="Build or inspect precomputed response surfaces.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    build = commands.add_parser('build', help="tabulate the model and write a surface file")
+    build.add_argument('output')
+    build.add_argument('--step-minutes', type=float, default=1.0, help="wake time grid step (default 1)")
+    build.add_argument('--validation-samples', type=int, default=100_000)
+    build.add_argument('--workers', type=int, help="tabulation processes (default: all CPUs)")
+    build.add_argument('--engine', choices=ENGINES, default='crisp')
+    build.add_argument('--run-decision-method', choices=RUN_DECISION_METHODS, default='inference')
+    build.add_argument('--defuzz-method', choices=DEFUZZ_METHODS, default='analytic')
+    
+    info = commands.add_parser('info', help="print the metadata of a surface file")
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+    
+    if args.command == 'info':
+        print(json.dumps(ResponseSurface.load(args.path).metadata, indent=2))
+        return 0
+    
+    model = SchoolCommuteFuzzyModel(defuzz_method=args.defuzz_method,
+                                    run_decision_method=args.run_decision_method, engine=args.engine)
+    metadata = build_response_surface(args.output, model, args.step_minutes,
+                                      validation_samples=args.validation_samples, workers=args.workers)
+    print(f"Wrote {args.output}: {metadata['wake_points']}x{metadata['wake_points']} wake grid, "
+          f"{os.path.getsize(args.output) / 1e6:.1f} MB in {metadata['build_seconds']:.1f}s")
+    if metadata['max_deviation']:
+        for method, deviations in metadata['max_deviation'].items():
+            error = deviations['success_probability']
+            print(f"  {method}: success_probability deviation max {error['max']:.3g}, "
+                  f"p99 {error['p99']:.3g}, mean {error['mean']:.3g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
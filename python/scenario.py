@@ -0,0 +1,121 @@
+"""
+Incremental what-if scenarios for the School Commute Fuzzy Logic Model
+
+A ``Scenario`` keeps the value of every node of the hierarchy (NODE_GRAPH)
+for one set of inputs. When inputs change, only the nodes downstream of
+them are re-evaluated, in evaluation order, and propagation stops at nodes
+whose value did not change. Changing ``parent_a_wake`` therefore leaves the
+run decision and the weather travel impact alone, and changing the weather
+never touches base availability.
+"""
+
+from typing import Dict, Tuple
+
+try:
+    from .school_commute_model import MODEL_INPUTS, NODE_GRAPH, SchoolCommuteFuzzyModel
+except ImportError:
+    from school_commute_model import MODEL_INPUTS, NODE_GRAPH, SchoolCommuteFuzzyModel
+
+
+# Scenario inputs (as accepted by predict) and the encoded model input each sets
+SCENARIO_INPUTS = dict(zip(('weather', 'day_type', 'parent_a_wake', 'parent_b_wake'), MODEL_INPUTS))
+
+
+class Scenario:
+    """
+    Stateful scenario that re-evaluates only invalidated nodes.
+    
+    Values are identical to ``predict`` of a model without caching (node
+    caches of the model are used when enabled, but wake times are not
+    quantized).
+    
+    Parameters:
+    -----------
+    model : SchoolCommuteFuzzyModel
+        Model whose nodes are evaluated (a default model if None)
+    weather, day_type, parent_a_wake, parent_b_wake :
+        Initial inputs, as for ``predict``
+    
+    Attributes:
+    -----------
+    values : dict
+        Current value of every encoded input and node output
+    recomputed : tuple
+        Node outputs evaluated by the last update, in evaluation order
+    """
+    
+    def __init__(self, model: SchoolCommuteFuzzyModel = None, weather: str = 'clear',
+                 day_type: str = 'weekday', parent_a_wake: float = 6.5, parent_b_wake: float = 6.5):
+        self.model = model or SchoolCommuteFuzzyModel()
+        self.inputs = {}
+        self.values = {}
+        self.recomputed = ()
+        self._state = None
+        self.update(weather=weather, day_type=day_type, parent_a_wake=parent_a_wake,
+                    parent_b_wake=parent_b_wake)
+    
+    def update(self, **changes) -> Tuple[str, ...]:
+        """
+        Change inputs and re-evaluate the nodes that depend on them.
+        
+        Parameters:
+        -----------
+        **changes :
+            New values for any of 'weather', 'day_type', 'parent_a_wake' and
+            'parent_b_wake'
+        
+        Returns:
+        --------
+        tuple
+            Node outputs that were re-evaluated (also kept in ``recomputed``)
+        """
+        
+        unknown = set(changes) - set(SCENARIO_INPUTS)
+        if unknown:
+            raise ValueError(f"Unknown inputs {sorted(unknown)}; choose from {list(SCENARIO_INPUTS)}")
+        
+        encoded = {}
+        for name, value in changes.items():
+            if name == 'weather':
+                encoded['weather_num'] = self.model.weather_map[value]
+            elif name == 'day_type':
+                encoded['day_type_num'] = 1 if value == 'weekday' else 0
+            else:
+                encoded[SCENARIO_INPUTS[name]] = value
+        self.inputs.update(changes)
+        
+        # Editing the model's MF parameters or rules invalidates every node
+        state = self.model._cache_key_state()
+        if state != self._state:
+            self._state = state
+            self.values = {name: value for name, value in self.values.items() if name in MODEL_INPUTS}
+        
+        changed = {name for name, value in encoded.items()
+                   if name not in self.values or self.values[name] != value}
+        self.values.update(encoded)
+        
+        recomputed = []
+        for name, (node, inputs) in NODE_GRAPH.items():
+            if name in self.values and not changed.intersection(inputs):
+                continue
+            value = self.model._evaluate_node(node, *(self.values[i] for i in inputs))
+            recomputed.append(name)
+            if name not in self.values or self.values[name] != value:
+                changed.add(name)
+            self.values[name] = value
+        
+        self.recomputed = tuple(recomputed)
+        return self.recomputed
+    
+    @property
+    def success_probability(self) -> float:
+        return self.values['success_probability']
+    
+    @property
+    def intermediate(self) -> Dict[str, float]:
+        """Intermediate outputs, as returned by ``predict``."""
+        return {name: self.values[name] for name in NODE_GRAPH if name != 'success_probability'}
+    
+    def predict(self) -> Tuple[float, Dict]:
+        """(success_probability, intermediate_outputs) for the current inputs."""
+        return self.success_probability, self.intermediate
@@ -7,28 +7,577 @@ family morning routine parameters and environmental conditions.
 """
 
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-from typing import Dict, Tuple, Union
-import warnings
+from typing import Dict, Tuple
+
+try:
+    from .fuzzy_kernels import centroid, interp_membership, trapmf, trimf
+    from .mamdani_engine import RuleBase, build_level_systems, trapezoid_membership
+    from .instrumentation import Instrumentation
+    from .prediction_cache import CacheInfo, LRUCache
+except ImportError:
+    from fuzzy_kernels import centroid, interp_membership, trapmf, trimf
+    from mamdani_engine import RuleBase, build_level_systems, trapezoid_membership
+    from instrumentation import Instrumentation
+    from prediction_cache import CacheInfo, LRUCache
+
+
+WEATHER_TRAVEL_MULTIPLIERS = np.array([1.0, 1.0, 1.0, 1.2, 1.6, 2.2])  # indexed by weather_num
+
+# Run duration reported when no run decision rule fires (e.g. wake times
+# outside the 5.5-8.5 universe in good or poor weather)
+NO_RULE_FIRED_RUN_DURATION = 5.0
+
+DEFUZZ_METHODS = ('analytic', 'sampled')
+RUN_DECISION_METHODS = ('inference', 'lookup')
+ENGINES = ('crisp', 'mamdani')
+DTYPES = ('float64', 'float32')
+BACKENDS = ('numpy', 'numba')
+
+# Rows per chunk in the batch run decision at float64; bounds the
+# (rows x 1201) aggregation matrix to a few tens of MB. float32 batches use
+# chunks of twice as many rows in the same memory.
+BATCH_CHUNK_SIZE = 2048
+
+# Intermediate outputs reported by predict and predict_batch, in hierarchy order
+INTERMEDIATE_OUTPUTS = (
+    'run_duration', 'base_availability', 'final_availability', 'weather_travel_multiplier',
+    'breakfast_time', 'dressing_time', 'transport_efficiency', 'routine_efficiency',
+)
+
+# Hierarchy of the model as output -> (node, inputs), in evaluation order.
+# Inputs are the encoded model inputs or outputs of earlier nodes.
+MODEL_INPUTS = ('weather_num', 'day_type_num', 'parent_a_wake', 'parent_b_wake')
+NODE_GRAPH = {
+    # Level 1: primary decisions
+    'run_duration': ('run_decision', ('parent_b_wake', 'weather_num', 'day_type_num')),
+    'base_availability': ('base_parent_availability', ('parent_a_wake', 'parent_b_wake')),
+    # Level 2: adjusted assessments
+    'final_availability': ('final_parent_availability', ('base_availability', 'run_duration')),
+    'weather_travel_multiplier': ('weather_travel_impact', ('weather_num',)),
+    # Level 3: routine efficiency
+    'breakfast_time': ('breakfast_efficiency', ('final_availability',)),
+    'dressing_time': ('dressing_efficiency', ('final_availability',)),
+    'transport_efficiency': ('transportation_logistics', ('final_availability', 'day_type_num')),
+    # Level 4: consolidation
+    'routine_efficiency': ('morning_routine_efficiency', ('breakfast_time', 'dressing_time')),
+    # Level 5: final assessment
+    'success_probability': ('school_arrival_probability', (
+        'routine_efficiency', 'transport_efficiency', 'weather_travel_multiplier',
+        'parent_a_wake', 'parent_b_wake', 'weather_num', 'run_duration')),
+}
+
+# Hierarchy level of every node, as reported by instrumentation
+NODE_LEVELS = {
+    'run_decision': 1, 'base_parent_availability': 1,
+    'final_parent_availability': 2, 'weather_travel_impact': 2,
+    'breakfast_efficiency': 3, 'dressing_efficiency': 3, 'transportation_logistics': 3,
+    'morning_routine_efficiency': 4,
+    'school_arrival_probability': 5,
+}
+
+
+def required_nodes(outputs) -> Tuple[str, ...]:
+    """Outputs of NODE_GRAPH needed to compute ``outputs``, in evaluation order."""
+    
+    unknown = set(outputs) - set(NODE_GRAPH)
+    if unknown:
+        raise ValueError(f"Unknown outputs {sorted(unknown)}; choose from {list(NODE_GRAPH)}")
+    
+    needed = set()
+    pending = list(outputs)
+    while pending:
+        name = pending.pop()
+        if name in NODE_GRAPH and name not in needed:
+            needed.add(name)
+            pending.extend(NODE_GRAPH[name][1])
+    return tuple(name for name in NODE_GRAPH if name in needed)
+
+
+def dependent_nodes(inputs) -> Tuple[str, ...]:
+    """Outputs of NODE_GRAPH affected by a change of ``inputs``, in evaluation order."""
+    
+    unknown = set(inputs) - set(MODEL_INPUTS) - set(NODE_GRAPH)
+    if unknown:
+        raise ValueError(f"Unknown inputs {sorted(unknown)}; "
+                         f"choose from {list(MODEL_INPUTS) + list(NODE_GRAPH)}")
+    
+    affected = set(inputs)
+    for name, (_, node_inputs) in NODE_GRAPH.items():
+        if affected.intersection(node_inputs):
+            affected.add(name)
+    return tuple(name for name in NODE_GRAPH if name in affected and name not in inputs)
+
+
+# Wake time grid (minutes) that cached predictions are snapped to, and the
+# nodes that get their own cache next to the whole-prediction cache
+CACHE_RESOLUTION_MINUTES = 1.0
+CACHED_NODES = (
+    'run_decision', 'base_parent_availability', 'final_parent_availability',
+    'weather_travel_impact', 'breakfast_efficiency', 'dressing_efficiency',
+    'transportation_logistics', 'morning_routine_efficiency', 'school_arrival_probability',
+)
+
+
+# Membership function parameters of the run decision FIS. Each variable has
+# an ``np.arange`` universe (start, stop, step) and named terms given as
+# (generator, parameters) pairs.
+RUN_DECISION_MF_PARAMS = {
+    'parent_b_wake': {
+        'universe': (5.5, 8.51, 0.01),
+        'terms': {
+            'very_early': ('trapmf', (5.5, 5.5, 6.0, 6.25)),
+            'early': ('trimf', (6.0, 6.5, 7.0)),
+            'normal': ('trimf', (6.5, 7.0, 7.5)),
+            'late': ('trapmf', (7.0, 7.5, 8.5, 8.5)),
+        },
+    },
+    'weather': {
+        'universe': (1, 5.01, 0.01),
+        'terms': {
+            'good': ('trapmf', (1, 1, 2, 2.5)),
+            'poor': ('trimf', (2.5, 3, 3.5)),
+            'bad': ('trapmf', (3.5, 4, 5, 5)),
+        },
+    },
+    'day_type': {
+        'universe': (0, 1.01, 0.01),
+        'terms': {
+            'weekend': ('trimf', (-0.5, 0, 0.5)),
+            'weekday': ('trimf', (0.5, 1, 1.5)),
+        },
+    },
+    'run_duration': {
+        'universe': (0, 120.01, 0.1),
+        'terms': {
+            'none': ('trapmf', (0, 0, 5, 10)),
+            'short': ('trimf', (10, 20, 30)),
+            'medium': ('trimf', (25, 37.5, 50)),
+            'long': ('trimf', (45, 67.5, 90)),
+            'very_long': ('trapmf', (80, 100, 120, 120)),
+        },
+    },
+}
+
+
+# Run decision rule table in MATLAB ruleList layout over the inputs
+# (parent_b_wake, weather, day_type): one 1-based term index per input
+# (0 = don't care), then the run_duration term, weight and connection
+# (1 = AND, 2 = OR). Term indices follow RUN_DECISION_MF_PARAMS order.
+RUN_DECISION_INPUTS = ('parent_b_wake', 'weather', 'day_type')
+RUN_DECISION_RULES = (
+    # Bad weather overrides everything - no running
+    (0, 3, 0, 1, 1, 1),
+    # VeryEarly: Good/Weekend -> VeryLong, Good/Weekday -> Long,
+    # Poor/Weekend -> Medium, Poor/Weekday -> Short
+    (1, 1, 1, 5, 1, 1),
+    (1, 1, 2, 4, 1, 1),
+    (1, 2, 1, 3, 1, 1),
+    (1, 2, 2, 2, 1, 1),
+    # Early: Good/Weekend -> Long, Good/Weekday -> Medium, Poor -> Short
+    (2, 1, 1, 4, 1, 1),
+    (2, 1, 2, 3, 1, 1),
+    (2, 2, 0, 2, 1, 1),
+    # Normal: Good/Weekend -> Medium, Good/Weekday -> Short,
+    # Poor/Weekend -> Short, Poor/Weekday -> None
+    (3, 1, 1, 3, 1, 1),
+    (3, 1, 2, 2, 1, 1),
+    (3, 2, 1, 2, 1, 1),
+    (3, 2, 2, 1, 1, 1),
+    # Late: Good/Weekend -> Short; Late AND (Poor OR Bad OR Weekday) -> None,
+    # written as one rule per disjunct
+    (4, 1, 1, 2, 1, 1),
+    (4, 2, 0, 1, 1, 1),
+    (4, 3, 0, 1, 1, 1),
+    (4, 0, 2, 1, 1, 1),
+)
+
+def _freeze_mf_params(mf_params: Dict) -> Dict:
+    """Copy MF parameters into a canonical form of plain tuples."""
+    
+    return {
+        variable: {
+            'universe': tuple(float(v) for v in definition['universe']),
+            'terms': {
+                term: (kind, tuple(float(v) for v in params))
+                for term, (kind, params) in definition['terms'].items()
+            },
+        }
+        for variable, definition in mf_params.items()
+    }
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class CompiledModelSpec:
+    """
+    Universes and membership functions of the run decision FIS, built once.
+    
+    Attributes:
+    -----------
+    mf_params : dict
+        Canonical copy of the MF parameters the spec was compiled from
+    universes : dict
+        Read-only sampled universe per variable
+    mfs : dict
+        Read-only sampled membership function per variable and term
+    terms : dict
+        Term names per variable, in definition order
+    corners : dict
+        Read-only (n_terms, 4) parameter table per variable, with every
+        membership function written as trapezoid corners (a, b, c, d);
+        a triangle (a, b, c) becomes (a, b, b, c)
+    rules : tuple
+        Run decision rule table the spec was compiled from
+    rule_base : RuleBase
+        The rule table compiled over RUN_DECISION_INPUTS
+    """
+    
+    def __init__(self, mf_params: Dict = None, rules: Tuple = None):
+        """Sample every universe and membership function and compile the rules."""
+        self.mf_params = _freeze_mf_params(mf_params or RUN_DECISION_MF_PARAMS)
+        self.rules = tuple(tuple(float(v) for v in rule) for rule in (rules or RUN_DECISION_RULES))
+        self.universes = {}
+        self.mfs = {}
+        self.terms = {}
+        self.corners = {}
+        
+        for variable, definition in self.mf_params.items():
+            universe = _read_only(np.arange(*definition['universe']))
+            self.universes[variable] = universe
+            self.terms[variable] = tuple(definition['terms'])
+            self.mfs[variable] = {}
+            corners = []
+            
+            for term, (kind, params) in definition['terms'].items():
+                if kind == 'trimf':
+                    self.mfs[variable][term] = _read_only(trimf(universe, params))
+                    corners.append((params[0], params[1], params[1], params[2]))
+                elif kind == 'trapmf':
+                    self.mfs[variable][term] = _read_only(trapmf(universe, params))
+                    corners.append(params)
+                else:
+                    raise ValueError(f"Unsupported membership function '{kind}' "
+                                     f"for {variable}.{term}")
+            
+            self.corners[variable] = _read_only(np.array(corners, dtype=float))
+        
+        input_sizes = [len(self.terms[variable]) for variable in RUN_DECISION_INPUTS]
+        self.rule_base = RuleBase(self.rules, input_sizes, len(self.terms['run_duration']))
+
+
+def _analytic_centroid(corners: np.ndarray, lower: float, upper: float,
+                       strengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact centroid of max-aggregated, activation-scaled trapezoids.
+    
+    Between consecutive MF corners every scaled term is linear, so the
+    aggregated shape is piecewise linear with kinks only at the corners and
+    where two scaled terms cross. Those points are found in closed form,
+    the shape is evaluated at them and its area and first moment are
+    integrated exactly over [lower, upper].
+    
+    Parameters:
+    -----------
+    corners : ndarray, shape (n_terms, 4)
+        Trapezoid corners of the output terms
+    lower, upper : float
+        Bounds of the output universe
+    strengths : ndarray, shape (rows, n_terms)
+        Activation of each output term; the computation runs in its dtype
+    
+    Returns:
+    --------
+    tuple
+        (centroid, fired); centroid is NaN where no term is active
+    """
+    
+    dtype = strengths.dtype
+    knots = np.unique(np.clip(np.append(corners.ravel(), [lower, upper]), lower, upper))
+    knot_membership = trapezoid_membership(knots, corners).astype(dtype, copy=False)
+    knots = knots.astype(dtype, copy=False)
+    
+    # Term pairs that can cross: both terms non-zero somewhere on the same
+    # knot interval. Only these (interval, term, term) triples need solving.
+    supported = (knot_membership[:-1] > 0) | (knot_membership[1:] > 0)
+    first, second = np.triu_indices(corners.shape[0], k=1)
+    interval, pair = np.nonzero(supported[:, first] & supported[:, second])
+    first, second = first[pair], second[pair]
+    
+    # Each scaled term is a line from start to start + slope on the interval
+    start = strengths[:, None, :] * knot_membership[None, interval, :]
+    slope = strengths[:, None, :] * knot_membership[None, interval + 1, :] - start
+    
+    rows = np.arange(len(strengths))[:, None]
+    triple = np.arange(len(interval))
+    gap_start = start[rows, triple, first] - start[rows, triple, second]
+    gap_slope = slope[rows, triple, first] - slope[rows, triple, second]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = -gap_start / gap_slope
+    t = np.where((t > 0) & (t < 1), t, 0.0)
+    
+    crossing_x = knots[interval] + t * (knots[interval + 1] - knots[interval])
+    crossing_y = np.max(start + t[..., None] * slope, axis=2)
+    knot_y = np.max(strengths[:, None, :] * knot_membership[None, :, :], axis=2)
+    
+    # The aggregated shape is linear between consecutive points
+    x = np.concatenate([np.broadcast_to(knots, knot_y.shape), crossing_x], axis=1)
+    y = np.concatenate([knot_y, crossing_y], axis=1)
+    order = np.argsort(x, axis=1, kind='stable')
+    x = np.take_along_axis(x, order, axis=1)
+    y = np.take_along_axis(y, order, axis=1)
+    
+    x1, x2 = x[:, :-1], x[:, 1:]
+    y1, y2 = y[:, :-1], y[:, 1:]
+    dx = x2 - x1
+    area = np.cumsum(0.5 * dx * (y1 + y2), axis=1)[:, -1]
+    moment = np.cumsum(dx * (x1 * (2 * y1 + y2) + x2 * (y1 + 2 * y2)) / 6.0, axis=1)[:, -1]
+    
+    fired = area > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centroid = np.where(fired, moment / area, np.nan)
+    return centroid, fired
+
+class RunDecisionLookup:
+    """
+    Run duration curves tabulated per (weather, day type).
+    
+    With weather and day type fixed, the run decision is a function of the
+    Parent B wake time alone. Each of the curves is sampled over the wake
+    universe at ``step`` hours and queried by linear interpolation in O(1).
+    The default step of 2**-10 h is exact in binary and divides 0.25, so
+    every wake MF breakpoint (5.5, 6.0, 6.25, ..., 8.5) is a grid node and
+    the kinks of the curves are reproduced exactly.
+    
+    ``max_error`` is measured when the table is built: the largest absolute
+    difference from full inference at the midpoint of every grid cell, where
+    linear interpolation error peaks. At the default step it is about
+    1e-3 minutes (0.06 s) for the default MF parameters.
+    
+    Attributes:
+    -----------
+    wake_grid : ndarray
+        Parent B wake times at which the curves are tabulated
+    table : ndarray, shape (n_weather, 2, n_points)
+        Run durations indexed by [weather_num - 1, day_type_num, grid point]
+    outside : ndarray, shape (n_weather, 2)
+        Run duration for wake times outside the wake universe
+    max_error : float
+        Measured maximum interpolation error in minutes
+    """
+    
+    def __init__(self, model: 'SchoolCommuteFuzzyModel', step: float = 2.0 ** -10):
+        """Tabulate the run decision of ``model`` for every weather and day type."""
+        self.spec = model.spec
+        self.defuzz_method = model.defuzz_method
+        self.step = step
+        
+        universe = model.spec.universes['parent_b_wake']
+        self.lower, self.upper = universe[0], universe[-1]
+        n_points = int(np.ceil((self.upper - self.lower) / step)) + 1
+        self.wake_grid = np.minimum(self.lower + step * np.arange(n_points), self.upper)
+        
+        weather_codes = np.arange(1, max(model.weather_map.values()) + 1)
+        self.table = np.empty((len(weather_codes), 2, n_points))
+        self.outside = np.empty((len(weather_codes), 2))
+        midpoints = 0.5 * (self.wake_grid[:-1] + self.wake_grid[1:])
+        self.max_error = 0.0
+        
+        for weather_num in weather_codes:
+            for day_type_num in (0, 1):
+                curve = model._infer_run_decision_batch(
+                    np.append(self.wake_grid, self.lower - 1.0),
+                    np.full(n_points + 1, weather_num), np.full(n_points + 1, day_type_num))[0]
+                self.table[weather_num - 1, day_type_num] = curve[:-1]
+                self.outside[weather_num - 1, day_type_num] = curve[-1]
+                
+                exact = model._infer_run_decision_batch(
+                    midpoints, np.full(len(midpoints), weather_num),
+                    np.full(len(midpoints), day_type_num))[0]
+                approx = self.lookup(midpoints, np.full(len(midpoints), weather_num),
+                                     np.full(len(midpoints), day_type_num))
+                self.max_error = max(self.max_error, float(np.max(np.abs(approx - exact))))
+        
+        _read_only(self.table)
+        _read_only(self.outside)
+    
+    def lookup(self, parent_b_wake: np.ndarray, weather_num: np.ndarray,
+               day_type_num: np.ndarray) -> np.ndarray:
+        """Interpolate run durations for arrays of inputs."""
+        
+        position = (parent_b_wake - self.lower) / self.step
+        index = np.clip(np.floor(position).astype(int), 0, len(self.wake_grid) - 2)
+        fraction = position - index
+        start = self.table[weather_num - 1, day_type_num, index]
+        end = self.table[weather_num - 1, day_type_num, index + 1]
+        run_duration = start + fraction * (end - start)
+        
+        inside = (parent_b_wake >= self.lower) & (parent_b_wake <= self.upper)
+        return np.where(inside, run_duration, self.outside[weather_num - 1, day_type_num])
+
 
 class SchoolCommuteFuzzyModel:
     """
     Hierarchical fuzzy logic model for school commute success prediction.
     """
     
-    def __init__(self):
-        """Initialize the fuzzy logic model with all subsystems."""
+    def __init__(self, defuzz_method: str = 'analytic', run_decision_method: str = 'inference',
+                 engine: str = 'crisp', cache_size: int = 0,
+                 cache_resolution: float = CACHE_RESOLUTION_MINUTES,
+                 instrumentation: Instrumentation = None, dtype: str = 'float64',
+                 backend: str = 'numpy'):
+        """
+        Initialize the fuzzy logic model with all subsystems.
+        
+        Parameters:
+        -----------
+        defuzz_method : str
+            Run duration defuzzification: 'analytic' computes the exact
+            centroid from the MF breakpoints, 'sampled' integrates the
+            aggregated output over the 1201-point run duration universe
+        run_decision_method : str
+            'inference' evaluates the run decision FIS on every call,
+            'lookup' interpolates the precomputed RunDecisionLookup curves
+        engine : str
+            Levels 2-5: 'crisp' uses the step approximations below,
+            'mamdani' runs the MATLAB FIS definitions (see mamdani_engine)
+        cache_size : int
+            Capacity of the LRU caches in front of ``predict`` and of each
+            hierarchy node; 0 disables caching
+        cache_resolution : float
+            With caching enabled, wake times are snapped to this grid (in
+            minutes) before they are used as cache keys and evaluated
+        instrumentation : Instrumentation
+            Receives per-call, per-level and per-node timings and run
+            decision fallback counts; None (the default) disables it
+        dtype : str
+            Floating point type of the batch APIs: inputs, node values,
+            outputs and the run decision matrices. 'float32' halves their
+            memory, so batch run decisions use chunks of twice as many rows;
+            values can differ from float64 near the model's thresholds
+            (see README). Mamdani systems compute in float64 and ``predict``
+            is always float64.
+        backend : str
+            Batch evaluation: 'numpy' runs the vectorized node functions,
+            'numba' one fused compiled kernel per batch (see fused_kernel).
+            'numba' uses the NumPy path when Numba is not installed or the
+            engine is 'mamdani'; ``fused_pipeline`` tells which is active.
+        """
+        if defuzz_method not in DEFUZZ_METHODS:
+            raise ValueError(f"defuzz_method must be one of {DEFUZZ_METHODS}")
+        if run_decision_method not in RUN_DECISION_METHODS:
+            raise ValueError(f"run_decision_method must be one of {RUN_DECISION_METHODS}")
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}")
+        if cache_size < 0 or cache_resolution <= 0:
+            raise ValueError("cache_size must be >= 0 and cache_resolution > 0")
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}")
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+        self.defuzz_method = defuzz_method
+        self.run_decision_method = run_decision_method
+        self.engine = engine
+        self.dtype = np.dtype(dtype)
+        self.backend = backend
+        self._fused_pipeline = None
+        self.level_systems = build_level_systems() if engine == 'mamdani' else None
+        self._run_decision_lookup = None
         self.weather_map = {
             'clear': 1, 'cloudy': 2, 'light_rain': 3, 
             'heavy_rain': 4, 'snow': 5
         }
+        self.spec = CompiledModelSpec(RUN_DECISION_MF_PARAMS)
         
+        self.instrumentation = instrumentation
+        self.cache_resolution = cache_resolution
+        self._caches = None
+        if cache_size:
+            self._caches = {name: LRUCache(cache_size) for name in ('predict',) + CACHED_NODES}
+            self._cache_state = self._cache_key_state()
+    
+    @property
+    def mf_params(self) -> Dict:
+        """Membership function parameters the model is compiled from."""
+        return _freeze_mf_params(self.spec.mf_params)
+    
+    @mf_params.setter
+    def mf_params(self, mf_params: Dict):
+        """Replace the MF parameters; the spec is rebuilt only if they changed."""
+        if _freeze_mf_params(mf_params) != self.spec.mf_params:
+            self.spec = CompiledModelSpec(mf_params, self.spec.rules)
+    
+    @property
+    def run_decision_rules(self) -> Tuple:
+        """Run decision rule table (see RUN_DECISION_RULES)."""
+        return self.spec.rules
+    
+    @run_decision_rules.setter
+    def run_decision_rules(self, rules: Tuple):
+        """Replace the run decision rules; the spec is rebuilt only if they changed."""
+        if tuple(tuple(float(v) for v in rule) for rule in rules) != self.spec.rules:
+            self.spec = CompiledModelSpec(self.spec.mf_params, rules)
+    
+    @property
+    def run_decision_lookup(self) -> RunDecisionLookup:
+        """Run decision lookup table, built on first use for the current spec."""
+        lookup = self._run_decision_lookup
+        if lookup is None or lookup.spec is not self.spec or lookup.defuzz_method != self.defuzz_method:
+            lookup = self._run_decision_lookup = RunDecisionLookup(self)
+        return lookup
+    
+    @property
+    def fused_pipeline(self):
+        """
+        Fused kernel tables used by the batch APIs, built on first use.
+        
+        None unless ``backend`` is 'numba', Numba is installed and the
+        engine is 'crisp'; the NumPy batch path is used then.
+        """
+        
+        if self.backend != 'numba' or self.engine != 'crisp':
+            return None
+        try:
+            from .fused_kernel import NUMBA_AVAILABLE, FusedPipeline
+        except ImportError:
+            from fused_kernel import NUMBA_AVAILABLE, FusedPipeline
+        if not NUMBA_AVAILABLE:
+            return None
+        pipeline = self._fused_pipeline
+        if pipeline is None or not pipeline.matches(self):
+            pipeline = self._fused_pipeline = FusedPipeline(self)
+        return pipeline
+    
+    @property
+    def _batch_chunk_size(self) -> int:
+        """Rows per batch run decision chunk: BATCH_CHUNK_SIZE scaled to the same bytes at the model's dtype."""
+        return BATCH_CHUNK_SIZE * 8 // self.dtype.itemsize
+    
+    def cache_info(self) -> Dict[str, CacheInfo]:
+        """Hit, miss and eviction counters of the 'predict' cache and every node cache."""
+        return {name: cache.info() for name, cache in (self._caches or {}).items()}
+    
+    def cache_clear(self):
+        """Empty every cache and reset its counters."""
+        for cache in (self._caches or {}).values():
+            cache.clear()
+    
+    def _cache_key_state(self) -> Tuple:
+        """Settings that cached results depend on."""
+        return (self.spec, self.defuzz_method, self.run_decision_method, self.engine)
+    
+    
     def predict(self, weather: str, day_type: str, 
                 parent_a_wake: float, parent_b_wake: float) -> Tuple[float, Dict]:
         """
         Predict school commute success probability.
         
+        When the model was created with ``cache_size``, wake times are
+        snapped to ``cache_resolution`` minutes and results are memoized per
+        input tuple and per hierarchy node (see ``cache_info``).
+        
         Parameters:
         -----------
         weather : str
@@ -39,194 +588,310 @@ class SchoolCommuteFuzzyModel:
             Parent A wake time in decimal hours (5.5-8.5)
         parent_b_wake : float
             Parent B wake time in decimal hours (5.5-8.5)
-            
+        
         Returns:
         --------
         tuple
             (success_probability, intermediate_outputs)
         """
         
+        if self.instrumentation is not None:
+            return self.instrumentation.record_call(
+                'predict', self._predict, weather, day_type, parent_a_wake, parent_b_wake)
+        return self._predict(weather, day_type, parent_a_wake, parent_b_wake)
+    
+    def _predict(self, weather: str, day_type: str,
+                 parent_a_wake: float, parent_b_wake: float) -> Tuple[float, Dict]:
+        """``predict`` without instrumentation."""
+        
         # Convert inputs
         weather_num = self.weather_map[weather]
         day_type_num = 1 if day_type == 'weekday' else 0
         
+        if self._caches is None:
+            return self._predict_levels(weather_num, day_type_num, parent_a_wake, parent_b_wake)
+        
+        if self._cache_state != self._cache_key_state():
+            self.cache_clear()
+            self._cache_state = self._cache_key_state()
+        
+        # Quantized wake times make repeated requests share cache entries
+        steps_per_hour = 60.0 / self.cache_resolution
+        key = (weather_num, day_type_num,
+               int(round(parent_a_wake * steps_per_hour)), int(round(parent_b_wake * steps_per_hour)))
+        success_prob, intermediate = self._caches['predict'].get(key, self._predict_quantized)
+        return success_prob, dict(intermediate)
+    
+    def _predict_quantized(self, weather_num: int, day_type_num: int,
+                           parent_a_step: int, parent_b_step: int) -> Tuple[float, Dict]:
+        """Evaluate a prediction whose wake times are given in cache_resolution steps."""
+        steps_per_hour = 60.0 / self.cache_resolution
+        return self._predict_levels(weather_num, day_type_num,
+                                    parent_a_step / steps_per_hour, parent_b_step / steps_per_hour)
+    
+    def _predict_levels(self, weather_num: int, day_type_num: int,
+                        parent_a_wake: float, parent_b_wake: float) -> Tuple[float, Dict]:
+        """Evaluate every hierarchy level for encoded inputs."""
+        
+        node = self._evaluate_node
+        if self.instrumentation is not None:
+            node = self._timed_node
+        
         # Initialize outputs dictionary
         intermediate = {}
         
         # LEVEL 1: Primary Decision Nodes
-        run_duration = self._compute_run_decision(parent_b_wake, weather_num, day_type_num)
-        base_availability = self._compute_base_parent_availability(parent_a_wake, parent_b_wake)
+        run_duration = node('run_decision', parent_b_wake, weather_num, day_type_num)
+        base_availability = node('base_parent_availability', parent_a_wake, parent_b_wake)
         
         intermediate['run_duration'] = run_duration
         intermediate['base_availability'] = base_availability
         
         # LEVEL 2: Adjusted Availability Assessment
-        final_availability = self._compute_final_parent_availability(base_availability, run_duration)
-        weather_travel_multiplier = self._compute_weather_travel_impact(weather_num)
+        final_availability = node('final_parent_availability', base_availability, run_duration)
+        weather_travel_multiplier = node('weather_travel_impact', weather_num)
         
         intermediate['final_availability'] = final_availability
         intermediate['weather_travel_multiplier'] = weather_travel_multiplier
         
         # LEVEL 3: Morning Routine Efficiency
-        breakfast_time = self._compute_breakfast_efficiency(final_availability)
-        dressing_time = self._compute_dressing_efficiency(final_availability)
-        transport_efficiency = self._compute_transportation_logistics(final_availability, day_type_num)
+        breakfast_time = node('breakfast_efficiency', final_availability)
+        dressing_time = node('dressing_efficiency', final_availability)
+        transport_efficiency = node('transportation_logistics', final_availability, day_type_num)
         
         intermediate['breakfast_time'] = breakfast_time
         intermediate['dressing_time'] = dressing_time
         intermediate['transport_efficiency'] = transport_efficiency
         
         # LEVEL 4: Consolidated Assessments
-        routine_efficiency = self._compute_morning_routine_efficiency(breakfast_time, dressing_time)
+        routine_efficiency = node('morning_routine_efficiency', breakfast_time, dressing_time)
         
         intermediate['routine_efficiency'] = routine_efficiency
         
         # LEVEL 5: Final Assessment
-        success_prob = self._compute_school_arrival_probability(
-            routine_efficiency, transport_efficiency, weather_travel_multiplier,
-            parent_a_wake, parent_b_wake, weather_num, run_duration
+        success_prob = node(
+            'school_arrival_probability', routine_efficiency, transport_efficiency,
+            weather_travel_multiplier, parent_a_wake, parent_b_wake, weather_num, run_duration
         )
         
         return success_prob, intermediate
     
-    def _compute_run_decision(self, parent_b_wake: float, weather_num: int, day_type_num: int) -> float:
-        """Compute Parent B's running decision based on inputs."""
+    def predict_batch(self, weather, day_type, parent_a_wake, parent_b_wake) -> Tuple[np.ndarray, Dict]:
+        """
+        Predict school commute success probability for many scenarios at once.
         
-        # Create fuzzy variables
-        parent_b_wake_range = np.arange(5.5, 8.51, 0.01)
-        weather_range = np.arange(1, 5.01, 0.01)
-        day_type_range = np.arange(0, 1.01, 0.01)
-        run_duration_range = np.arange(0, 120.01, 0.1)
-        
-        # Parent B Wake Time membership functions
-        pb_very_early = fuzz.trapmf(parent_b_wake_range, [5.5, 5.5, 6.0, 6.25])
-        pb_early = fuzz.trimf(parent_b_wake_range, [6.0, 6.5, 7.0])
-        pb_normal = fuzz.trimf(parent_b_wake_range, [6.5, 7.0, 7.5])
-        pb_late = fuzz.trapmf(parent_b_wake_range, [7.0, 7.5, 8.5, 8.5])
-        
-        # Weather membership functions
-        weather_good = fuzz.trapmf(weather_range, [1, 1, 2, 2.5])
-        weather_poor = fuzz.trimf(weather_range, [2.5, 3, 3.5])
-        weather_bad = fuzz.trapmf(weather_range, [3.5, 4, 5, 5])
-        
-        # Day type membership functions
-        day_weekend = fuzz.trimf(day_type_range, [-0.5, 0, 0.5])
-        day_weekday = fuzz.trimf(day_type_range, [0.5, 1, 1.5])
-        
-        # Run duration membership functions
-        run_none = fuzz.trapmf(run_duration_range, [0, 0, 5, 10])
-        run_short = fuzz.trimf(run_duration_range, [10, 20, 30])
-        run_medium = fuzz.trimf(run_duration_range, [25, 37.5, 50])
-        run_long = fuzz.trimf(run_duration_range, [45, 67.5, 90])
-        run_very_long = fuzz.trapmf(run_duration_range, [80, 100, 120, 120])
-        
-        # Compute membership values
-        pb_wake_memberships = {
-            'very_early': fuzz.interp_membership(parent_b_wake_range, pb_very_early, parent_b_wake),
-            'early': fuzz.interp_membership(parent_b_wake_range, pb_early, parent_b_wake),
-            'normal': fuzz.interp_membership(parent_b_wake_range, pb_normal, parent_b_wake),
-            'late': fuzz.interp_membership(parent_b_wake_range, pb_late, parent_b_wake)
-        }
+        Every level of the hierarchy is evaluated on whole arrays, and the
+        results are identical to calling ``predict`` row by row.
         
-        weather_memberships = {
-            'good': fuzz.interp_membership(weather_range, weather_good, weather_num),
-            'poor': fuzz.interp_membership(weather_range, weather_poor, weather_num),
-            'bad': fuzz.interp_membership(weather_range, weather_bad, weather_num)
-        }
+        Parameters:
+        -----------
+        weather : array-like of str or int
+            Weather conditions, either names from ``weather_map`` or their
+            integer codes (1-5)
+        day_type : array-like of str or int
+            Day types ('weekday', 'weekend') or codes (1 = weekday, 0 = weekend)
+        parent_a_wake : array-like of float
+            Parent A wake times in decimal hours (5.5-8.5)
+        parent_b_wake : array-like of float
+            Parent B wake times in decimal hours (5.5-8.5)
         
-        day_memberships = {
-            'weekend': fuzz.interp_membership(day_type_range, day_weekend, day_type_num),
-            'weekday': fuzz.interp_membership(day_type_range, day_weekday, day_type_num)
-        }
+        Returns:
+        --------
+        tuple
+            (success_probability, intermediate_outputs) with one array entry
+            per scenario in the probability and in every intermediate
+        """
         
-        # Apply fuzzy rules
-        rules_output = np.zeros_like(run_duration_range)
+        results = self.evaluate_batch(weather, day_type, parent_a_wake, parent_b_wake,
+                                      ('success_probability',) + INTERMEDIATE_OUTPUTS)
+        success_prob = results.pop('success_probability')
+        return success_prob, results
+    
+    def evaluate_batch(self, weather, day_type, parent_a_wake, parent_b_wake,
+                       outputs=('success_probability',), structured: bool = False):
+        """
+        Evaluate selected outputs for many scenarios, pruning unused nodes.
         
-        # Bad weather overrides everything - no running
-        bad_weather_activation = weather_memberships['bad']
-        rules_output = np.fmax(rules_output, bad_weather_activation * run_none)
+        Only the nodes of the hierarchy that the requested outputs depend on
+        are evaluated (see NODE_GRAPH); e.g. ``run_duration`` alone needs just
+        the run decision. Values are identical to ``predict_batch``.
         
-        # Very early wake time rules
-        if pb_wake_memberships['very_early'] > 0:
-            # VeryEarly AND Good AND Weekend -> VeryLong
-            activation = np.fmin(pb_wake_memberships['very_early'], 
-                               np.fmin(weather_memberships['good'], day_memberships['weekend']))
-            rules_output = np.fmax(rules_output, activation * run_very_long)
-            
-            # VeryEarly AND Good AND Weekday -> Long
-            activation = np.fmin(pb_wake_memberships['very_early'], 
-                               np.fmin(weather_memberships['good'], day_memberships['weekday']))
-            rules_output = np.fmax(rules_output, activation * run_long)
-            
-            # VeryEarly AND Poor AND Weekend -> Medium
-            activation = np.fmin(pb_wake_memberships['very_early'], 
-                               np.fmin(weather_memberships['poor'], day_memberships['weekend']))
-            rules_output = np.fmax(rules_output, activation * run_medium)
-            
-            # VeryEarly AND Poor AND Weekday -> Short
-            activation = np.fmin(pb_wake_memberships['very_early'], 
-                               np.fmin(weather_memberships['poor'], day_memberships['weekday']))
-            rules_output = np.fmax(rules_output, activation * run_short)
-        
-        # Early wake time rules
-        if pb_wake_memberships['early'] > 0:
-            # Early AND Good AND Weekend -> Long
-            activation = np.fmin(pb_wake_memberships['early'], 
-                               np.fmin(weather_memberships['good'], day_memberships['weekend']))
-            rules_output = np.fmax(rules_output, activation * run_long)
-            
-            # Early AND Good AND Weekday -> Medium
-            activation = np.fmin(pb_wake_memberships['early'], 
-                               np.fmin(weather_memberships['good'], day_memberships['weekday']))
-            rules_output = np.fmax(rules_output, activation * run_medium)
-            
-            # Early AND Poor -> Short
-            activation = np.fmin(pb_wake_memberships['early'], weather_memberships['poor'])
-            rules_output = np.fmax(rules_output, activation * run_short)
-        
-        # Normal wake time rules
-        if pb_wake_memberships['normal'] > 0:
-            # Normal AND Good AND Weekend -> Medium
-            activation = np.fmin(pb_wake_memberships['normal'], 
-                               np.fmin(weather_memberships['good'], day_memberships['weekend']))
-            rules_output = np.fmax(rules_output, activation * run_medium)
-            
-            # Normal AND Good AND Weekday -> Short
-            activation = np.fmin(pb_wake_memberships['normal'], 
-                               np.fmin(weather_memberships['good'], day_memberships['weekday']))
-            rules_output = np.fmax(rules_output, activation * run_short)
-            
-            # Normal AND Poor AND Weekend -> Short
-            activation = np.fmin(pb_wake_memberships['normal'], 
-                               np.fmin(weather_memberships['poor'], day_memberships['weekend']))
-            rules_output = np.fmax(rules_output, activation * run_short)
-            
-            # Normal AND Poor AND Weekday -> None
-            activation = np.fmin(pb_wake_memberships['normal'], 
-                               np.fmin(weather_memberships['poor'], day_memberships['weekday']))
-            rules_output = np.fmax(rules_output, activation * run_none)
-        
-        # Late wake time rules
-        if pb_wake_memberships['late'] > 0:
-            # Late AND Good AND Weekend -> Short
-            activation = np.fmin(pb_wake_memberships['late'], 
-                               np.fmin(weather_memberships['good'], day_memberships['weekend']))
-            rules_output = np.fmax(rules_output, activation * run_short)
-            
-            # Late AND (Poor OR Bad OR Weekday) -> None
-            activation = np.fmin(pb_wake_memberships['late'], 
-                               np.fmax(weather_memberships['poor'], 
-                                      np.fmax(weather_memberships['bad'], day_memberships['weekday'])))
-            rules_output = np.fmax(rules_output, activation * run_none)
+        Parameters:
+        -----------
+        weather, day_type, parent_a_wake, parent_b_wake : array-like
+            Scenario inputs, as for ``predict_batch``
+        outputs : sequence of str
+            'success_probability' and/or intermediate output names
+        structured : bool
+            Return one NumPy structured array with a field per output
+            instead of a dict of arrays
+        
+        Returns:
+        --------
+        dict or numpy.ndarray
+            Contiguous array of the model's ``dtype`` per requested output,
+            in request order, or a structured array with those fields
+        """
+        
+        if self.instrumentation is not None:
+            return self.instrumentation.record_call(
+                'evaluate_batch', self._evaluate_batch, weather, day_type, parent_a_wake,
+                parent_b_wake, outputs, structured)
+        return self._evaluate_batch(weather, day_type, parent_a_wake, parent_b_wake, outputs, structured)
+    
+    def _evaluate_batch(self, weather, day_type, parent_a_wake, parent_b_wake, outputs, structured):
+        """``evaluate_batch`` without the instrumentation wrapper."""
+        
+        recorder = self.instrumentation
+        nodes = required_nodes(outputs)
+        values = dict(zip(MODEL_INPUTS, self._encode_batch_inputs(
+            weather, day_type, parent_a_wake, parent_b_wake)))
+        
+        if recorder is not None:
+            recorder.count('rows', 'evaluate_batch', len(values['weather_num']))
+        
+        pipeline = self.fused_pipeline
+        if pipeline is not None:
+            return self._evaluate_fused(pipeline, values, nodes, outputs, structured)
+        
+        for name in nodes:
+            node, inputs = NODE_GRAPH[name]
+            compute = getattr(self, f'_compute_{node}_batch')
+            args = (values[i] for i in inputs)
+            if recorder is None:
+                result = compute(*args)
+            else:
+                result = recorder.time_node(node, NODE_LEVELS[node], compute, *args)
+            values[name] = np.ascontiguousarray(result, dtype=self.dtype)
+        
+        return self._collect_outputs(values, outputs, structured)
+    
+    def _evaluate_fused(self, pipeline, values, nodes, outputs, structured):
+        """``_evaluate_batch`` through the fused kernel, which computes every node."""
         
-        # Defuzzify using centroid method
         try:
-            run_duration = fuzz.defuzz(run_duration_range, rules_output, 'centroid')
-        except:
-            # Fallback if no rules fired
-            run_duration = 5.0  # Default to minimal run
+            from .fused_kernel import FUSED_OUTPUTS
+        except ImportError:
+            from fused_kernel import FUSED_OUTPUTS
         
-        return np.clip(run_duration, 0, 120)
+        fused, fired = pipeline.evaluate(*(values[name] for name in MODEL_INPUTS))
+        recorder = self.instrumentation
+        if recorder is not None and 'run_duration' in nodes and self.run_decision_method == 'inference':
+            recorder.count('fallbacks', 'run_decision', int(np.count_nonzero(~fired)))
+        for row, name in enumerate(FUSED_OUTPUTS):
+            if name in outputs:
+                values[name] = np.ascontiguousarray(fused[row], dtype=self.dtype)
+        return self._collect_outputs(values, outputs, structured)
+    
+    def _collect_outputs(self, values, outputs, structured):
+        """Requested outputs as a dict of arrays or one structured array."""
+        
+        if not structured:
+            return {name: values[name] for name in outputs}
+        
+        table = np.empty(len(values['weather_num']), dtype=[(name, self.dtype) for name in outputs])
+        for name in outputs:
+            table[name] = values[name]
+        return table
+    
+    def _evaluate_node(self, name: str, *args):
+        """Compute one hierarchy node, through its cache when caching is enabled."""
+        compute = getattr(self, '_compute_' + name)
+        if self._caches is None:
+            return compute(*args)
+        return self._caches[name].get(args, compute)
+    
+    def _timed_node(self, name: str, *args):
+        """``_evaluate_node`` timed by the attached instrumentation."""
+        return self.instrumentation.time_node(name, NODE_LEVELS[name], self._evaluate_node, name, *args)
+    
+    def _encode_batch_inputs(self, weather, day_type, parent_a_wake, parent_b_wake):
+        """Convert batch inputs to equal-length arrays: uint8 codes and wake times of the model's dtype."""
+        
+        weather = np.asarray(weather).ravel()
+        day_type = np.asarray(day_type).ravel()
+        parent_a_wake = np.asarray(parent_a_wake, dtype=self.dtype).ravel()
+        parent_b_wake = np.asarray(parent_b_wake, dtype=self.dtype).ravel()
+        
+        lengths = {len(weather), len(day_type), len(parent_a_wake), len(parent_b_wake)}
+        if len(lengths) != 1:
+            raise ValueError("weather, day_type, parent_a_wake and parent_b_wake "
+                             "must have the same length")
+        
+        if weather.dtype.kind in 'iu':
+            unknown = np.setdiff1d(weather, list(self.weather_map.values()))
+            if unknown.size:
+                raise KeyError(f"Unknown weather codes: {unknown.tolist()}")
+            weather_num = weather.astype(np.uint8)
+        else:
+            names, inverse = np.unique(weather.astype(str), return_inverse=True)
+            unknown = [name for name in names if name not in self.weather_map]
+            if unknown:
+                raise KeyError(f"Unknown weather conditions: {unknown}")
+            weather_num = np.array([self.weather_map[name] for name in names], dtype=np.uint8)[inverse]
+        
+        if day_type.dtype.kind in 'iub':
+            day_type_num = (day_type == 1).astype(np.uint8)
+        else:
+            day_type_num = (day_type.astype(str) == 'weekday').astype(np.uint8)
+        
+        return weather_num, day_type_num, parent_a_wake, parent_b_wake
+    
+    def compare_defuzzification(self, weather, day_type, parent_b_wake) -> Dict:
+        """
+        Compare analytic and sampled centroid run durations.
+        
+        The sampled centroid misses the kinks where scaled terms cross
+        between universe samples; over the 5.5-8.5 wake range the two
+        differ by less than 2e-4 minutes.
+        
+        Parameters:
+        -----------
+        weather, day_type, parent_b_wake : array-like
+            Run decision inputs, as accepted by ``predict_batch``
+        
+        Returns:
+        --------
+        dict
+            'analytic' and 'sampled' run durations, their 'difference' and
+            the 'max_abs_difference'
+        """
+        
+        weather_num, day_type_num, _, parent_b_wake = self._encode_batch_inputs(
+            weather, day_type, parent_b_wake, parent_b_wake)
+        strengths = self._run_decision_strengths(parent_b_wake, weather_num, day_type_num)
+        
+        analytic = np.empty(len(strengths), dtype=self.dtype)
+        sampled = np.empty(len(strengths), dtype=self.dtype)
+        chunk_size = self._batch_chunk_size
+        for start in range(0, len(strengths), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            analytic[chunk], _ = self._defuzzify_run_duration(strengths[chunk], 'analytic')
+            sampled[chunk], _ = self._defuzzify_run_duration(strengths[chunk], 'sampled')
+        
+        difference = analytic - sampled
+        return {
+            'analytic': analytic,
+            'sampled': sampled,
+            'difference': difference,
+            'max_abs_difference': float(np.max(np.abs(difference), initial=0.0)),
+        }
+    
+    def _compute_run_decision(self, parent_b_wake: float, weather_num: int, day_type_num: int) -> float:
+        """Compute Parent B's running decision based on inputs."""
+        
+        if self.run_decision_method == 'lookup':
+            return self.run_decision_lookup.lookup(
+                np.array([parent_b_wake], dtype=float), np.array([weather_num]),
+                np.array([day_type_num]))[0]
+        
+        strengths = self._run_decision_strengths(
+            np.array([parent_b_wake], dtype=float), np.array([weather_num]), np.array([day_type_num]))
+        run_duration, fired = self._defuzzify_run_duration(strengths)
+        if self.instrumentation is not None and not fired[0]:
+            self.instrumentation.count('fallbacks', 'run_decision')
+        
+        return run_duration[0]
     
     def _compute_base_parent_availability(self, parent_a_wake: float, parent_b_wake: float) -> float:
         """Compute base parent availability from wake times."""
@@ -246,6 +911,9 @@ class SchoolCommuteFuzzyModel:
     def _compute_final_parent_availability(self, base_availability: float, run_duration: float) -> float:
         """Adjust base availability for time lost to running."""
         
+        if self.engine == 'mamdani':
+            return self.level_systems['final_parent_availability'].evaluate(base_availability, run_duration)[0]
+        
         # Reduce availability based on run duration
         if run_duration < 10:
             reduction = 0
@@ -263,6 +931,9 @@ class SchoolCommuteFuzzyModel:
     def _compute_weather_travel_impact(self, weather_num: int) -> float:
         """Compute weather impact on travel time."""
         
+        if self.engine == 'mamdani':
+            return self.level_systems['weather_travel_impact'].evaluate(weather_num)[0]
+        
         weather_impacts = {
             1: 1.0,   # clear
             2: 1.0,   # cloudy
@@ -276,6 +947,9 @@ class SchoolCommuteFuzzyModel:
     def _compute_breakfast_efficiency(self, final_availability: float) -> float:
         """Compute breakfast completion time."""
         
+        if self.engine == 'mamdani':
+            return self.level_systems['breakfast_efficiency'].evaluate(final_availability)[0]
+        
         if final_availability >= 7:
             return 15.0  # Quick breakfast
         elif final_availability >= 4:
@@ -286,6 +960,9 @@ class SchoolCommuteFuzzyModel:
     def _compute_dressing_efficiency(self, final_availability: float) -> float:
         """Compute dressing completion time."""
         
+        if self.engine == 'mamdani':
+            return self.level_systems['dressing_efficiency'].evaluate(final_availability)[0]
+        
         if final_availability >= 7:
             return 13.0  # Quick dressing
         elif final_availability >= 4:
@@ -296,6 +973,9 @@ class SchoolCommuteFuzzyModel:
     def _compute_transportation_logistics(self, final_availability: float, day_type_num: int) -> float:
         """Compute transportation efficiency."""
         
+        if self.engine == 'mamdani':
+            return self.level_systems['transportation_logistics'].evaluate(final_availability, day_type_num)[0]
+        
         base_score = final_availability
         
         # Weekdays are more challenging
@@ -307,6 +987,9 @@ class SchoolCommuteFuzzyModel:
     def _compute_morning_routine_efficiency(self, breakfast_time: float, dressing_time: float) -> float:
         """Consolidate breakfast and dressing times into routine efficiency."""
         
+        if self.engine == 'mamdani':
+            return self.level_systems['morning_routine_efficiency'].evaluate(breakfast_time, dressing_time)[0]
+        
         total_time = breakfast_time + dressing_time
         
         # Convert total time to efficiency score (lower time = higher efficiency)
@@ -327,7 +1010,10 @@ class SchoolCommuteFuzzyModel:
         """Compute final school arrival probability."""
         
         # Base calculation using fuzzy logic approach
-        if routine_efficiency >= 7 and transport_efficiency >= 7 and weather_travel_multiplier <= 1.3:
+        if self.engine == 'mamdani':
+            success_prob = self.level_systems['school_arrival_probability'].evaluate(
+                routine_efficiency, transport_efficiency, weather_travel_multiplier)[0]
+        elif routine_efficiency >= 7 and transport_efficiency >= 7 and weather_travel_multiplier <= 1.3:
             success_prob = 92.0  # Very high
         elif routine_efficiency >= 7 and transport_efficiency >= 4 and weather_travel_multiplier <= 1.3:
             success_prob = 85.0  # High
@@ -352,7 +1038,204 @@ class SchoolCommuteFuzzyModel:
                 success_prob = max(success_prob, 85.0)
         
         return np.clip(success_prob, 0, 100)
-
+    
+    
+    # ------------------------------------------------------------------
+    # Vectorized counterparts of the node computations (used by predict_batch)
+    # ------------------------------------------------------------------
+    
+    def _compute_run_decision_batch(self, parent_b_wake: np.ndarray, weather_num: np.ndarray,
+                                    day_type_num: np.ndarray) -> np.ndarray:
+        """Compute Parent B's running decision for arrays of inputs."""
+        
+        if self.run_decision_method == 'lookup':
+            return self.run_decision_lookup.lookup(parent_b_wake, weather_num, day_type_num)
+        
+        run_duration, fired = self._infer_run_decision_batch(parent_b_wake, weather_num, day_type_num)
+        if self.instrumentation is not None:
+            self.instrumentation.count('fallbacks', 'run_decision', int(np.count_nonzero(~fired)))
+        return run_duration
+    
+    def _infer_run_decision_batch(self, parent_b_wake: np.ndarray, weather_num: np.ndarray,
+                                  day_type_num: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Run the full run decision inference in chunks of rows; returns (run_duration, fired)."""
+        
+        run_duration = np.empty(len(parent_b_wake), dtype=self.dtype)
+        fired = np.empty(len(parent_b_wake), dtype=bool)
+        chunk_size = self._batch_chunk_size
+        
+        for start in range(0, len(parent_b_wake), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            strengths = self._run_decision_strengths(
+                parent_b_wake[chunk], weather_num[chunk], day_type_num[chunk])
+            run_duration[chunk], fired[chunk] = self._defuzzify_run_duration(strengths)
+        
+        return run_duration, fired
+    
+    def _run_decision_strengths(self, parent_b_wake: np.ndarray, weather_num: np.ndarray,
+                                day_type_num: np.ndarray) -> np.ndarray:
+        """Fuzzify the inputs and fire the run decision rules for arrays of rows."""
+        
+        universes, mfs = self.spec.universes, self.spec.mfs
+        memberships = [
+            np.column_stack([interp_membership(universes[variable], mfs[variable][term], values)
+                             for term in self.spec.terms[variable]])
+            for variable, values in zip(RUN_DECISION_INPUTS, (parent_b_wake, weather_num, day_type_num))
+        ]
+        
+        # Strongest activation per run duration term
+        return self.spec.rule_base.strengths(memberships).astype(self.dtype, copy=False)
+    
+    def _defuzzify_run_duration(self, strengths: np.ndarray,
+                                method: str = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Defuzzify run durations from the activation strength of each term.
+        
+        Parameters:
+        -----------
+        strengths : ndarray, shape (rows, n_terms)
+            Strongest rule activation per run duration term, in spec order
+        method : str, optional
+            'analytic' or 'sampled'; defaults to the model's defuzz_method
+        
+        Returns:
+        --------
+        tuple
+            (run_duration, fired) where ``fired`` is False for rows in which
+            no rule fired; those rows get NO_RULE_FIRED_RUN_DURATION
+        """
+        
+        method = method or self.defuzz_method
+        dtype = strengths.dtype
+        corners = self.spec.corners['run_duration']
+        run_range = self.spec.universes['run_duration']
+        
+        if method == 'analytic':
+            centroids, fired = _analytic_centroid(corners, run_range[0], run_range[-1], strengths)
+        else:
+            # Product implication: each term is scaled by its activation,
+            # then the terms are combined with max
+            rules_output = np.zeros((len(strengths), len(run_range)), dtype=dtype)
+            for term, activation in zip(self.spec.terms['run_duration'], strengths.T):
+                np.fmax(rules_output, activation[:, None] * self.spec.mfs['run_duration'][term].astype(dtype),
+                        out=rules_output)
+            centroids = centroid(run_range.astype(dtype), rules_output)
+            fired = rules_output.any(axis=1)
+        
+        run_duration = np.where(fired, centroids, NO_RULE_FIRED_RUN_DURATION)
+        
+        return np.clip(run_duration, 0, 120), fired
+    
+    def _compute_base_parent_availability_batch(self, parent_a_wake: np.ndarray,
+                                                parent_b_wake: np.ndarray) -> np.ndarray:
+        """Compute base parent availability for arrays of wake times."""
+        
+        latest = np.maximum(parent_a_wake, parent_b_wake)
+        earliest = np.minimum(parent_a_wake, parent_b_wake)
+        a_early = parent_a_wake <= 6.5
+        b_early = parent_b_wake <= 6.5
+        
+        return np.select(
+            [a_early & b_early, a_early | b_early],
+            [8.5 + (6.5 - latest) * 1.0, 6.0 + (6.5 - earliest) * 0.5],
+            np.maximum(1.0, 5.0 - (latest - 7.0) * 2.0))
+    
+    def _compute_final_parent_availability_batch(self, base_availability: np.ndarray,
+                                                 run_duration: np.ndarray) -> np.ndarray:
+        """Adjust base availability for time lost to running, for arrays of inputs."""
+        
+        if self.engine == 'mamdani':
+            return self.level_systems['final_parent_availability'].evaluate(base_availability, run_duration)
+        
+        reduction = np.select(
+            [run_duration < 10, run_duration < 30, run_duration < 60, run_duration < 90],
+            [0.0, 0.75, 1.75, 2.75], 3.5)
+        
+        return np.clip(base_availability - reduction, 0, 10)
+    
+    def _compute_weather_travel_impact_batch(self, weather_num: np.ndarray) -> np.ndarray:
+        """Compute weather impact on travel time for arrays of weather codes."""
+        
+        if self.engine == 'mamdani':
+            return self.level_systems['weather_travel_impact'].evaluate(weather_num)
+        
+        return WEATHER_TRAVEL_MULTIPLIERS[weather_num]
+    
+    def _compute_breakfast_efficiency_batch(self, final_availability: np.ndarray) -> np.ndarray:
+        """Compute breakfast completion time for arrays of availability scores."""
+        
+        if self.engine == 'mamdani':
+            return self.level_systems['breakfast_efficiency'].evaluate(final_availability)
+        
+        return np.select([final_availability >= 7, final_availability >= 4], [15.0, 27.5], 40.0)
+    
+    def _compute_dressing_efficiency_batch(self, final_availability: np.ndarray) -> np.ndarray:
+        """Compute dressing completion time for arrays of availability scores."""
+        
+        if self.engine == 'mamdani':
+            return self.level_systems['dressing_efficiency'].evaluate(final_availability)
+        
+        return np.select([final_availability >= 7, final_availability >= 4], [13.0, 25.0], 36.0)
+    
+    def _compute_transportation_logistics_batch(self, final_availability: np.ndarray,
+                                                day_type_num: np.ndarray) -> np.ndarray:
+        """Compute transportation efficiency for arrays of inputs."""
+        
+        if self.engine == 'mamdani':
+            return self.level_systems['transportation_logistics'].evaluate(final_availability, day_type_num)
+        
+        base_score = np.where(day_type_num == 1, final_availability * 0.9, final_availability)
+        
+        return np.clip(base_score, 0, 10)
+    
+    def _compute_morning_routine_efficiency_batch(self, breakfast_time: np.ndarray,
+                                                  dressing_time: np.ndarray) -> np.ndarray:
+        """Consolidate breakfast and dressing times for arrays of inputs."""
+        
+        if self.engine == 'mamdani':
+            return self.level_systems['morning_routine_efficiency'].evaluate(breakfast_time, dressing_time)
+        
+        total_time = breakfast_time + dressing_time
+        
+        return np.select([total_time <= 30, total_time <= 50], [9.0, 6.0], 2.0)
+    
+    def _compute_school_arrival_probability_batch(self, routine_efficiency: np.ndarray,
+                                                  transport_efficiency: np.ndarray,
+                                                  weather_travel_multiplier: np.ndarray,
+                                                  parent_a_wake: np.ndarray = None,
+                                                  parent_b_wake: np.ndarray = None,
+                                                  weather_num: np.ndarray = None,
+                                                  run_duration: np.ndarray = None) -> np.ndarray:
+        """Compute final school arrival probability for arrays of inputs."""
+        
+        if self.engine == 'mamdani':
+            success_prob = self.level_systems['school_arrival_probability'].evaluate(
+                routine_efficiency, transport_efficiency, weather_travel_multiplier)
+        else:
+            mild_weather = weather_travel_multiplier <= 1.3
+            success_prob = np.select(
+                [(routine_efficiency >= 7) & (transport_efficiency >= 7) & mild_weather,
+                 (routine_efficiency >= 7) & (transport_efficiency >= 4) & mild_weather,
+                 (routine_efficiency >= 4) & (transport_efficiency >= 7) & mild_weather,
+                 (routine_efficiency >= 4) & (transport_efficiency >= 4) & mild_weather,
+                 weather_travel_multiplier > 2.0],
+                [92.0, 85.0, 85.0, 60.0,
+                 np.maximum(10.0, 60.0 - (weather_travel_multiplier - 1.0) * 30)],
+                30.0)
+        
+        # Apply special rules if parameters provided
+        if all(param is not None for param in [parent_a_wake, parent_b_wake, weather_num, run_duration]):
+            very_early = (parent_a_wake <= 6.0) & (parent_b_wake <= 6.0)
+            
+            # Special rule 1: Very early wake + clear weather + short/no run
+            rule_1 = very_early & (weather_num <= 2) & (run_duration < 30)
+            success_prob = np.where(rule_1, np.maximum(success_prob, 90.0), success_prob)
+            
+            # Special rule 2: Very early wake + clear weather (general boost)
+            rule_2 = very_early & (weather_num == 1)
+            success_prob = np.where(rule_2, np.maximum(success_prob, 85.0), success_prob)
+        
+        return np.clip(success_prob, 0, 100)
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,419 @@
+"""
+Micro-batching scoring server for the School Commute Fuzzy Logic Model
+
+Concurrent single-scenario requests are queued and scored together with
+one ``evaluate_batch`` call. A batch is flushed as soon as it holds
+``max_batch_size`` requests or ``max_delay`` seconds after its first request
+arrived; while a batch is being scored new requests keep queueing, so
+batches grow with load and throughput scales with it instead of with the
+request count.
+
+At most ``max_pending`` requests are accepted but not yet answered; beyond
+that requests are rejected (HTTP 503) rather than queued without bound.
+Stopping the server stops accepting requests, answers every accepted one
+and then closes the connections.
+
+Usage:
+    python -m scoring_server --port 8080
+    python -m scoring_server --unix /tmp/school_commute.sock --max-batch-size 512
+    
+    curl -X POST localhost:8080/predict -d '{"weather": "clear", "day_type": "weekday",
+                                             "parent_a_wake": 6.0, "parent_b_wake": 6.5}'
+    curl localhost:8080/stats
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+try:
+    from .school_commute_model import (DEFUZZ_METHODS, ENGINES, INTERMEDIATE_OUTPUTS,
+                                       RUN_DECISION_METHODS, SchoolCommuteFuzzyModel)
+except ImportError:
+    from school_commute_model import (DEFUZZ_METHODS, ENGINES, INTERMEDIATE_OUTPUTS,
+                                      RUN_DECISION_METHODS, SchoolCommuteFuzzyModel)
+
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_DELAY = 0.002
+DEFAULT_MAX_PENDING = 10_000
+LATENCY_WINDOW = 10_000
+
+DAY_TYPES = {'weekday': 1, 'weekend': 0}
+
+# Marks the end of the request stream in the queue
+_STOP = object()
+
+
+class ServerBusy(Exception):
+    """Raised when ``max_pending`` requests are already waiting."""
+
+
+class ServerClosed(Exception):
+    """Raised for requests submitted after the batcher started draining."""
+
+
+class MicroBatcher:
+    """
+    Collects single predictions and scores them in vectorized batches.
+    
+    The model runs on one background thread, so the event loop keeps
+    accepting requests while a batch is scored and the model is never used
+    concurrently.
+    
+    Parameters:
+    -----------
+    model : SchoolCommuteFuzzyModel
+        Model to score with (a default model if None)
+    max_batch_size : int
+        Requests per batch at most
+    max_delay : float
+        Seconds a batch waits for more requests after its first one
+    max_pending : int
+        Accepted but unanswered requests at most; more are rejected with
+        ServerBusy
+    outputs : sequence of str
+        Outputs returned per request ('success_probability' and/or
+        intermediate output names)
+    """
+    
+    def __init__(self, model: SchoolCommuteFuzzyModel = None,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_delay: float = DEFAULT_MAX_DELAY,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 outputs: Sequence[str] = ('success_probability',)):
+        if max_batch_size < 1 or max_pending < 1 or max_delay < 0:
+            raise ValueError("max_batch_size and max_pending must be positive and max_delay >= 0")
+        self.model = model or SchoolCommuteFuzzyModel()
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.outputs = list(outputs)
+        # Validates the output names
+        self.model.evaluate_batch([1], [1], [6.5], [6.5], outputs=self.outputs)
+        
+        self.pending = 0
+        self.closing = False
+        self._queue = None
+        self._worker = None
+        self._executor = None
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._counts = {'requests': 0, 'rejected': 0, 'failed': 0, 'batches': 0, 'max_batch_size': 0}
+    
+    async def start(self):
+        """Start the batching task on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scoring')
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+    
+    async def close(self):
+        """Stop accepting requests, answer every accepted one and stop the worker."""
+        if self._worker is None:
+            return
+        if not self.closing:
+            self.closing = True
+            self._queue.put_nowait(_STOP)
+        await self._worker
+        self._executor.shutdown()
+    
+    def encode(self, weather, day_type, parent_a_wake, parent_b_wake) -> tuple:
+        """Validate one scenario and encode it as (weather_num, day_type_num, wake, wake)."""
+        
+        if isinstance(weather, str):
+            if weather not in self.model.weather_map:
+                raise ValueError(f"Unknown weather '{weather}'; choose from {list(self.model.weather_map)}")
+            weather = self.model.weather_map[weather]
+        elif weather not in self.model.weather_map.values() or isinstance(weather, bool):
+            raise ValueError(f"Unknown weather code {weather!r}")
+        
+        if isinstance(day_type, str):
+            if day_type not in DAY_TYPES:
+                raise ValueError(f"day_type must be one of {list(DAY_TYPES)}")
+            day_type = DAY_TYPES[day_type]
+        elif day_type not in (0, 1):
+            raise ValueError("day_type code must be 0 (weekend) or 1 (weekday)")
+        
+        wake_times = []
+        for name, value in (('parent_a_wake', parent_a_wake), ('parent_b_wake', parent_b_wake)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+                raise ValueError(f"{name} must be a finite number of decimal hours")
+            wake_times.append(float(value))
+        return (int(weather), int(day_type), *wake_times)
+    
+    async def submit(self, weather, day_type, parent_a_wake, parent_b_wake) -> Dict[str, float]:
+        """
+        Score one scenario as part of the next batch.
+        
+        Raises ValueError for invalid inputs, ServerBusy when ``max_pending``
+        requests are waiting and ServerClosed while draining.
+        """
+        
+        if self.closing or self._queue is None:
+            raise ServerClosed("The scoring server is not accepting requests")
+        scenario = self.encode(weather, day_type, parent_a_wake, parent_b_wake)
+        if self.pending >= self.max_pending:
+            self._counts['rejected'] += 1
+            raise ServerBusy(f"{self.pending} requests are already pending")
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending += 1
+        self._queue.put_nowait((scenario, future, loop.time()))
+        return await future
+    
+    async def _run(self):
+        """Collect requests into batches and score them until stopped."""
+        
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = first[2] + self.max_delay
+            
+            while len(batch) < self.max_batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._flush(batch)
+    
+    async def _flush(self, batch: List[tuple]):
+        """Score one batch on the model thread and answer its requests."""
+        
+        loop = asyncio.get_running_loop()
+        columns = [np.array(column) for column in zip(*(scenario for scenario, _, _ in batch))]
+        try:
+            values = await loop.run_in_executor(
+                self._executor, lambda: self.model.evaluate_batch(*columns, outputs=self.outputs))
+        except Exception as error:
+            self._counts['failed'] += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            finished = loop.time()
+            for row, (_, future, arrived) in enumerate(batch):
+                self._latencies.append(finished - arrived)
+                # The requester may have given up (e.g. a dropped connection)
+                if not future.done():
+                    future.set_result({name: float(values[name][row]) for name in self.outputs})
+        finally:
+            self.pending -= len(batch)
+            self._counts['requests'] += len(batch)
+            self._counts['batches'] += 1
+            self._counts['max_batch_size'] = max(self._counts['max_batch_size'], len(batch))
+    
+    def stats(self) -> Dict:
+        """
+        Request counters, batch sizes and latency percentiles.
+        
+        Latencies (milliseconds, from submission to answer) cover the last
+        LATENCY_WINDOW requests.
+        """
+        
+        counts = dict(self._counts)
+        latencies = np.array(self._latencies) * 1000.0
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (float('nan'),) * 2
+        counts.update(
+            pending=self.pending,
+            mean_batch_size=counts['requests'] / counts['batches'] if counts['batches'] else 0.0,
+            latency_p50_ms=float(p50),
+            latency_p99_ms=float(p99),
+        )
+        return counts
+
+
+class ScoringServer:
+    """
+    Minimal HTTP/1.1 front end of a MicroBatcher on TCP or a Unix socket.
+    
+    Routes:
+        POST /predict   JSON scenario -> JSON outputs
+        GET  /stats     MicroBatcher.stats()
+        GET  /healthz   "ok", or 503 while draining
+    
+    Parameters:
+    -----------
+    batcher : MicroBatcher
+        Batcher that scores the requests
+    host, port : str, int
+        TCP address (port 0 picks a free port)
+    unix_path : str
+        Unix socket path; overrides host and port
+    """
+    
+    def __init__(self, batcher: MicroBatcher, host: str = '127.0.0.1', port: int = 8080,
+                 unix_path: str = None):
+        self.batcher = batcher
+        self.host, self.port, self.unix_path = host, port, unix_path
+        self._server = None
+        self._handlers = set()
+        self._idle = set()
+    
+    async def start(self):
+        """Start the batcher and listen for connections."""
+        await self.batcher.start()
+        if self.unix_path:
+            self._server = await asyncio.start_unix_server(self._handle, self.unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+    
+    @property
+    def address(self):
+        """Bound (host, port) or Unix socket path."""
+        return self._server.sockets[0].getsockname()
+    
+    async def close(self):
+        """Graceful drain: stop listening, answer accepted requests, close connections."""
+        self._server.close()
+        await self.batcher.close()
+        # Connections waiting for their next request are closed; the others
+        # close themselves once their response is written
+        for writer in list(self._idle):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one (keep-alive) connection."""
+        
+        self._handlers.add(asyncio.current_task())
+        try:
+            while not self.batcher.closing:
+                self._idle.add(writer)
+                try:
+                    request_line = await reader.readline()
+                finally:
+                    self._idle.discard(writer)
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                
+                status, payload = await self._route(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close' and not self.batcher.closing
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+    
+    async def _route(self, method: str, path: str, body: bytes) -> tuple:
+        """(HTTP status, JSON-serializable payload) for one request."""
+        
+        if path == '/predict':
+            if method != 'POST':
+                return 405, {'error': "use POST"}
+            try:
+                scenario = json.loads(body or b'{}')
+                return 200, await self.batcher.submit(
+                    scenario['weather'], scenario['day_type'],
+                    scenario['parent_a_wake'], scenario['parent_b_wake'])
+            except (ValueError, KeyError, TypeError) as error:
+                return 400, {'error': f"invalid scenario: {error}"}
+            except (ServerBusy, ServerClosed) as error:
+                return 503, {'error': str(error)}
+        if path == '/stats' and method == 'GET':
+            return 200, self.batcher.stats()
+        if path == '/healthz' and method == 'GET':
+            return (503, 'draining') if self.batcher.closing else (200, 'ok')
+        return 404, {'error': f"no route for {method} {path}"}
+    
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   503: 'Service Unavailable'}
+        body = json.dumps(payload).encode()
+        head = [f"HTTP/1.1 {status} {reasons[status]}", "Content-Type: application/json",
+                f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == 503:
+            head.append("Retry-After: 1")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+
+
+async def serve(server: ScoringServer, stop: asyncio.Event = None):
+    """Run ``server`` until ``stop`` is set (or SIGINT/SIGTERM), then drain it."""
+    
+    stop = stop or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # e.g. Windows or not the main thread
+    
+    await server.start()
+    print(f"Serving on {server.address}", file=sys.stderr)
+    await stop.wait()
+    await server.close()
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    
+    parser = argparse.ArgumentParser(
+        prog='python -m scoring_server',
+        description="Serve single predictions over HTTP, scored in micro-batches.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"requests per batch (default {DEFAULT_MAX_BATCH_SIZE})")
+    parser.add_argument('--max-delay-ms', type=float, default=DEFAULT_MAX_DELAY * 1000,
+                        help=f"batching deadline in ms (default {DEFAULT_MAX_DELAY * 1000:g})")
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help=f"unanswered requests before rejecting (default {DEFAULT_MAX_PENDING})")
+    parser.add_argument('--outputs', default='',
+                        help="comma-separated intermediates to return, or 'all'")
+    parser.add_argument('--engine', choices=ENGINES, default='crisp')
+    parser.add_argument('--run-decision-method', choices=RUN_DECISION_METHODS, default='inference')
+    parser.add_argument('--defuzz-method', choices=DEFUZZ_METHODS, default='analytic')
+    args = parser.parse_args(argv)
+    
+    outputs = list(INTERMEDIATE_OUTPUTS) if args.outputs == 'all' else [
+        name for name in args.outputs.split(',') if name]
+    model = SchoolCommuteFuzzyModel(defuzz_method=args.defuzz_method,
+                                    run_decision_method=args.run_decision_method,
+                                    engine=args.engine)
+    batcher = MicroBatcher(model, args.max_batch_size, args.max_delay_ms / 1000, args.max_pending,
+                           ['success_probability'] + outputs)
+    server = ScoringServer(batcher, args.host, args.port, args.unix)
+    
+    asyncio.run(serve(server))
+    print(json.dumps(batcher.stats()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Global sensitivity analysis for the School Commute Fuzzy Logic Model
+
+Morris elementary effects and Sobol first/total-order indices of the four
+model inputs, for the success probability and every intermediate node.
+Samples are drawn on the unit hypercube, mapped to the input ranges and
+evaluated with ``predict_batch`` in large chunks.
+
+Sobol indices use Saltelli's A/B/AB_i sampling scheme on a scrambled Sobol
+sequence with the Saltelli (2010) first-order and Jansen total-order
+estimators; confidence intervals come from bootstrap resampling.
+"""
+
+import numpy as np
+from scipy.stats import norm, qmc
+from typing import Dict, Sequence, Tuple
+
+try:
+    from .school_commute_model import INTERMEDIATE_OUTPUTS, SchoolCommuteFuzzyModel
+except ImportError:
+    from school_commute_model import INTERMEDIATE_OUTPUTS, SchoolCommuteFuzzyModel
+
+
+# Input factors in predict_batch order: ('discrete', (first, last code)) or
+# ('continuous', (low, high))
+INPUT_FACTORS = {
+    'weather': ('discrete', (1, 5)),
+    'day_type': ('discrete', (0, 1)),
+    'parent_a_wake': ('continuous', (5.5, 8.5)),
+    'parent_b_wake': ('continuous', (5.5, 8.5)),
+}
+
+MODEL_OUTPUTS = ('success_probability',) + INTERMEDIATE_OUTPUTS
+
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def scale_unit_samples(unit: np.ndarray, factors: Dict = None) -> Tuple[np.ndarray, ...]:
+    """
+    Map unit-hypercube samples of shape (n, 4) to model inputs.
+    
+    Continuous factors are scaled linearly; discrete factors split [0, 1]
+    into equal-width bins, one per code.
+    """
+    
+    factors = factors or INPUT_FACTORS
+    columns = []
+    for column, (kind, (low, high)) in zip(unit.T, factors.values()):
+        if kind == 'discrete':
+            n_codes = int(high) - int(low) + 1
+            columns.append(int(low) + np.minimum(np.floor(column * n_codes), n_codes - 1).astype(int))
+        elif kind == 'continuous':
+            columns.append(low + column * (high - low))
+        else:
+            raise ValueError(f"Unknown factor kind '{kind}'")
+    return tuple(columns)
+
+
+def evaluate_unit_samples(model: SchoolCommuteFuzzyModel, unit: np.ndarray, factors: Dict = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, np.ndarray]:
+    """Evaluate unit-hypercube samples in chunks; returns one array per model output."""
+    
+    results = {name: np.empty(len(unit)) for name in MODEL_OUTPUTS}
+    for start in range(0, len(unit), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        probs, intermediate = model.predict_batch(*scale_unit_samples(unit[chunk], factors))
+        results['success_probability'][chunk] = probs
+        for name in MODEL_OUTPUTS[1:]:
+            results[name][chunk] = intermediate[name]
+    return results
+
+
+def _sobol_estimates(f_a: np.ndarray, f_b: np.ndarray, f_ab: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """First and total-order indices from f(A), f(B) and f(AB_i) of shape (d, N)."""
+    
+    variance = np.var(np.concatenate([f_a, f_b]))
+    if variance == 0:
+        return np.full(len(f_ab), np.nan), np.full(len(f_ab), np.nan)
+    first = np.mean(f_b * (f_ab - f_a), axis=1) / variance
+    total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance
+    return first, total
+
+
+def sobol_indices(model: SchoolCommuteFuzzyModel = None, n_base: int = 2 ** 14, seed: int = 0,
+                  factors: Dict = None, outputs: Sequence[str] = MODEL_OUTPUTS,
+                  num_resamples: int = 100, confidence: float = 0.95,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Sobol first-order (S1) and total-order (ST) indices of every input.
+    
+    Parameters:
+    -----------
+    model : SchoolCommuteFuzzyModel
+        Model to analyse (a default model if None)
+    n_base : int
+        Base sample size N (a power of 2); the model is evaluated
+        N * (d + 2) times
+    seed : int
+        Seed for the scrambled Sobol sequence and the bootstrap
+    factors : dict
+        Input factor definitions (INPUT_FACTORS if None)
+    outputs : sequence of str
+        Model outputs to analyse
+    num_resamples : int
+        Bootstrap resamples for the confidence intervals (0 to skip)
+    confidence : float
+        Confidence level of the reported interval half-widths
+    chunk_size : int
+        Samples per predict_batch call
+    
+    Returns:
+    --------
+    dict
+        Per output: 'S1', 'ST', 'S1_conf' and 'ST_conf' arrays in factor
+        order. Outputs that do not vary get NaN indices.
+    """
+    
+    model = model or SchoolCommuteFuzzyModel()
+    factors = factors or INPUT_FACTORS
+    d = len(factors)
+    rng = np.random.default_rng(seed)
+    
+    base = qmc.Sobol(d=2 * d, scramble=True, seed=rng).random(n_base)
+    a, b = base[:, :d], base[:, d:]
+    ab = np.repeat(a[None], d, axis=0)
+    for i in range(d):
+        ab[i, :, i] = b[:, i]
+    
+    samples = np.concatenate([a, b, ab.reshape(-1, d)])
+    values = evaluate_unit_samples(model, samples, factors, chunk_size)
+    
+    z = norm.ppf(0.5 + confidence / 2)
+    resamples = rng.integers(0, n_base, (num_resamples, n_base))
+    results = {}
+    for name in outputs:
+        f = values[name]
+        f_a, f_b, f_ab = f[:n_base], f[n_base:2 * n_base], f[2 * n_base:].reshape(d, n_base)
+        first, total = _sobol_estimates(f_a, f_b, f_ab)
+        
+        first_conf = np.full(d, np.nan)
+        total_conf = np.full(d, np.nan)
+        if num_resamples > 1 and not np.isnan(first).any():
+            boot = [_sobol_estimates(f_a[index], f_b[index], f_ab[:, index]) for index in resamples]
+            first_conf = z * np.std([estimate[0] for estimate in boot], axis=0, ddof=1)
+            total_conf = z * np.std([estimate[1] for estimate in boot], axis=0, ddof=1)
+        
+        results[name] = {'S1': first, 'ST': total, 'S1_conf': first_conf, 'ST_conf': total_conf}
+    return results
+
+
+def morris_trajectories(n_trajectories: int, d: int, levels: int,
+                        rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    One-at-a-time Morris trajectories on a ``levels``-point grid.
+    
+    Returns:
+    --------
+    tuple
+        (points of shape (r, d + 1, d), factor changed at each step (r, d),
+        signed step of every factor (r, d))
+    """
+    
+    delta = levels / (2 * (levels - 1))
+    start = rng.integers(0, levels, (n_trajectories, d)) / (levels - 1)
+    step = np.where(start + delta <= 1 + 1e-12, delta, -delta)
+    order = np.argsort(rng.random((n_trajectories, d)), axis=1)
+    
+    rows = np.arange(n_trajectories)
+    points = np.repeat(start[:, None, :], d + 1, axis=1)
+    for k in range(d):
+        changed = order[:, k]
+        later = np.arange(k + 1, d + 1)[None, :]
+        points[rows[:, None], later, changed[:, None]] += step[rows, changed][:, None]
+    return points, order, step
+
+
+def morris_effects(model: SchoolCommuteFuzzyModel = None, n_trajectories: int = 1000,
+                   levels: int = 4, seed: int = 0, factors: Dict = None,
+                   outputs: Sequence[str] = MODEL_OUTPUTS,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Morris elementary-effect screening of every input.
+    
+    Elementary effects are measured in unit-hypercube coordinates, i.e. per
+    full input range, so factors of different units are comparable.
+    
+    Parameters:
+    -----------
+    model : SchoolCommuteFuzzyModel
+        Model to analyse (a default model if None)
+    n_trajectories : int
+        Number of trajectories r; the model is evaluated r * (d + 1) times
+    levels : int
+        Grid levels p per factor (step p / (2 (p - 1)))
+    seed : int
+        Seed for the trajectory generator
+    factors : dict
+        Input factor definitions (INPUT_FACTORS if None)
+    outputs : sequence of str
+        Model outputs to analyse
+    chunk_size : int
+        Samples per predict_batch call
+    
+    Returns:
+    --------
+    dict
+        Per output: 'mu', 'mu_star' and 'sigma' arrays in factor order
+    """
+    
+    model = model or SchoolCommuteFuzzyModel()
+    factors = factors or INPUT_FACTORS
+    d = len(factors)
+    points, order, step = morris_trajectories(n_trajectories, d, levels, np.random.default_rng(seed))
+    values = evaluate_unit_samples(model, points.reshape(-1, d), factors, chunk_size)
+    
+    rows = np.arange(n_trajectories)[:, None]
+    results = {}
+    for name in outputs:
+        f = values[name].reshape(n_trajectories, d + 1)
+        effects = np.empty((n_trajectories, d))
+        effects[rows, order] = np.diff(f, axis=1) / step[rows, order]
+        results[name] = {
+            'mu': effects.mean(axis=0),
+            'mu_star': np.abs(effects).mean(axis=0),
+            'sigma': effects.std(axis=0, ddof=1),
+        }
+    return results
@@ -0,0 +1,276 @@
+"""
+Tests for the vectorized batch paths of the School Commute Fuzzy Logic Model
+"""
+
+import numpy as np
+import pytest
+from school_commute_model import SchoolCommuteFuzzyModel
+
+WEATHER_CONDITIONS = ['clear', 'cloudy', 'light_rain', 'heavy_rain', 'snow']
+
+# Wake times on and around the MF breakpoints and special-rule edges,
+# plus values just outside the 5.5-8.5 universe
+WAKE_TIMES = [5.4, 5.5, 5.75, 6.0, 6.1, 6.25, 6.4, 6.5, 6.75, 7.0, 7.25, 7.5, 8.0, 8.5, 8.6]
+
+
+def scenario_grid():
+    """All combinations of weather, day type and the edge-case wake times."""
+    rows = [(weather, day_type, pa_wake, pb_wake)
+            for weather in WEATHER_CONDITIONS
+            for day_type in ['weekday', 'weekend']
+            for pa_wake in WAKE_TIMES[::2]
+            for pb_wake in WAKE_TIMES]
+    return [list(column) for column in zip(*rows)]
+
+
+def test_predict_batch_matches_scalar_predict():
+    model = SchoolCommuteFuzzyModel()
+    weather, day_type, pa_wake, pb_wake = scenario_grid()
+    
+    probs, intermediate = model.predict_batch(weather, day_type, pa_wake, pb_wake)
+    
+    for i in range(len(weather)):
+        prob, expected = model.predict(weather[i], day_type[i], pa_wake[i], pb_wake[i])
+        assert probs[i] == prob
+        for key, value in expected.items():
+            assert intermediate[key][i] == value, (key, weather[i], day_type[i], pa_wake[i], pb_wake[i])
+
+
+def test_predict_batch_accepts_codes():
+    model = SchoolCommuteFuzzyModel()
+    weather, day_type, pa_wake, pb_wake = scenario_grid()
+    weather_codes = [model.weather_map[w] for w in weather]
+    day_codes = [1 if d == 'weekday' else 0 for d in day_type]
+    
+    by_name, _ = model.predict_batch(weather, day_type, pa_wake, pb_wake)
+    by_code, _ = model.predict_batch(weather_codes, day_codes, pa_wake, pb_wake)
+    
+    np.testing.assert_array_equal(by_name, by_code)
+
+
+def test_predict_batch_rejects_bad_inputs():
+    model = SchoolCommuteFuzzyModel()
+    
+    with pytest.raises(ValueError):
+        model.predict_batch(['clear', 'snow'], ['weekday'], [6.0, 6.0], [6.0, 6.0])
+    with pytest.raises(KeyError):
+        model.predict_batch(['clear', 'hail'], ['weekday'] * 2, [6.0, 6.0], [6.0, 6.0])
+
+
+def test_compiled_spec_is_reused_until_mf_params_change():
+    model = SchoolCommuteFuzzyModel()
+    spec = model.spec
+    
+    model.predict('clear', 'weekday', 6.0, 6.0)
+    model.mf_params = model.mf_params
+    assert model.spec is spec
+    with pytest.raises(ValueError):
+        spec.mfs['run_duration']['none'][0] = 0.5
+    
+    params = model.mf_params
+    params['run_duration']['terms']['long'] = ('trimf', (45, 60, 90))
+    model.mf_params = params
+    assert model.spec is not spec
+    
+    _, intermediate = model.predict('clear', 'weekday', 6.0, 6.0)
+    assert intermediate['run_duration'] == pytest.approx(65.0, abs=0.1)
+
+
+def test_analytic_defuzzification_matches_sampled_centroid():
+    model = SchoolCommuteFuzzyModel()
+    pb_wake = np.linspace(5.5, 8.4, 291)
+    
+    for weather in WEATHER_CONDITIONS:
+        for day_type in ['weekday', 'weekend']:
+            result = model.compare_defuzzification(
+                [weather] * len(pb_wake), [day_type] * len(pb_wake), pb_wake)
+            assert result['max_abs_difference'] < 1e-3
+
+
+def test_no_rule_fired_reports_explicit_run_duration():
+    from school_commute_model import NO_RULE_FIRED_RUN_DURATION
+    
+    for defuzz_method in ['analytic', 'sampled']:
+        model = SchoolCommuteFuzzyModel(defuzz_method=defuzz_method)
+        strengths = np.zeros((1, len(model.spec.terms['run_duration'])))
+        
+        run_duration, fired = model._defuzzify_run_duration(strengths)
+        assert not fired[0]
+        assert run_duration[0] == NO_RULE_FIRED_RUN_DURATION
+        
+        _, intermediate = model.predict('clear', 'weekday', 6.0, 9.0)
+        assert intermediate['run_duration'] == NO_RULE_FIRED_RUN_DURATION
+
+
+def test_run_decision_lookup_stays_within_its_error_bound():
+    exact = SchoolCommuteFuzzyModel()
+    model = SchoolCommuteFuzzyModel(run_decision_method='lookup')
+    lookup = model.run_decision_lookup
+    assert lookup.max_error < 2e-3
+    
+    rng = np.random.default_rng(0)
+    n = 20000
+    pb_wake = np.concatenate([rng.uniform(5.4, 8.6, n), WAKE_TIMES])
+    weather_num = rng.integers(1, 6, len(pb_wake))
+    day_type_num = rng.integers(0, 2, len(pb_wake))
+    
+    approx = lookup.lookup(pb_wake, weather_num, day_type_num)
+    reference = exact._compute_run_decision_batch(pb_wake, weather_num, day_type_num)
+    assert np.max(np.abs(approx - reference)) <= lookup.max_error + 1e-9
+    
+    # MF breakpoints are grid nodes, so they are reproduced exactly
+    np.testing.assert_allclose(approx[n:], reference[n:], rtol=0, atol=1e-9)
+    
+    _, scalar = model.predict('clear', 'weekend', 6.0, 5.75)
+    _, batch = model.predict_batch(['clear'], ['weekend'], [6.0], [5.75])
+    assert batch['run_duration'][0] == scalar['run_duration']
+
+
+def test_mamdani_engine_batch_matches_scalar_predict():
+    model = SchoolCommuteFuzzyModel(engine='mamdani')
+    weather, day_type, pa_wake, pb_wake = scenario_grid()
+    
+    probs, intermediate = model.predict_batch(weather, day_type, pa_wake, pb_wake)
+    
+    for i in range(len(weather)):
+        prob, expected = model.predict(weather[i], day_type[i], pa_wake[i], pb_wake[i])
+        assert probs[i] == prob
+        for key, value in expected.items():
+            assert intermediate[key][i] == value, (key, weather[i], day_type[i], pa_wake[i], pb_wake[i])
+
+
+def test_mamdani_engine_follows_matlab_evalfis_defaults():
+    from mamdani_engine import MamdaniFIS
+    
+    model = SchoolCommuteFuzzyModel(engine='mamdani')
+    breakfast = model.level_systems['breakfast_efficiency']
+    
+    # High availability fires only "Quick", so the output is that MF's sampled centroid
+    quick = breakfast.output_mfs[0]
+    expected = np.sum(quick * breakfast.output_grid) / np.sum(quick)
+    assert breakfast.evaluate([10.0])[0] == pytest.approx(expected)
+    
+    # No rule fired returns the middle of the output range
+    fis = MamdaniFIS('empty', [('x', (0, 10), {'a': ('trimf', (0, 1, 2))})],
+                     ('y', (10, 30), {'b': ('trimf', (10, 20, 30))}), [[1, 1, 1, 1]])
+    assert fis.evaluate([5.0])[0] == 20.0
+    
+    with pytest.raises(ValueError):
+        SchoolCommuteFuzzyModel(engine='fast')
+
+
+def test_rule_base_compiles_not_or_and_weights():
+    from mamdani_engine import RuleBase
+    
+    # Two inputs with two terms each, two output terms
+    rule_base = RuleBase([[1, -2, 1, 1.0, 1],    # A1 AND NOT B2 -> out1
+                          [2, 0, 2, 0.5, 1],     # A2 (weighted) -> out2
+                          [0, 1, 2, 1.0, 2]],    # B1 OR don't care -> out2
+                         [2, 2], 2)
+    a = np.array([[0.2, 0.8], [1.0, 0.0]])
+    b = np.array([[0.7, 0.4], [0.0, 0.9]])
+    
+    expected = np.array([[min(0.2, 1 - 0.4), max(0.5 * 0.8, 0.7)],
+                         [min(1.0, 1 - 0.9), max(0.5 * 0.0, 0.0)]])
+    np.testing.assert_allclose(rule_base.strengths([a, b]), expected)
+    
+    with pytest.raises(ValueError):
+        RuleBase([[3, 1, 1, 1, 1]], [2, 2], 2)
+    with pytest.raises(ValueError):
+        RuleBase([[0, 0, 1, 1, 1]], [2, 2], 2)
+
+
+def test_run_decision_rules_can_be_edited_as_a_table():
+    from school_commute_model import RUN_DECISION_RULES
+    
+    model = SchoolCommuteFuzzyModel()
+    spec = model.spec
+    model.run_decision_rules = RUN_DECISION_RULES
+    assert model.spec is spec
+    
+    # Very early, good weather, weekday now gives a very long run instead of a long one
+    rules = [rule if rule != (1, 1, 2, 4, 1, 1) else (1, 1, 2, 5, 1, 1) for rule in RUN_DECISION_RULES]
+    model.run_decision_rules = rules
+    assert model.spec is not spec
+    
+    _, intermediate = model.predict('clear', 'weekday', 6.0, 5.5)
+    assert intermediate['run_duration'] == pytest.approx(104.44, abs=0.01)
+
+
+def test_evaluate_batch_prunes_unrequested_nodes(monkeypatch):
+    model = SchoolCommuteFuzzyModel()
+    weather, day_type, pa_wake, pb_wake = scenario_grid()
+    _, expected = model.predict_batch(weather, day_type, pa_wake, pb_wake)
+    
+    called = []
+    for node in ['run_decision', 'base_parent_availability', 'final_parent_availability',
+                 'breakfast_efficiency', 'school_arrival_probability']:
+        method = getattr(model, f'_compute_{node}_batch')
+        monkeypatch.setattr(model, f'_compute_{node}_batch',
+                            lambda *args, node=node, method=method: called.append(node) or method(*args))
+    
+    results = model.evaluate_batch(weather, day_type, pa_wake, pb_wake,
+                                   outputs=['final_availability', 'run_duration'])
+    assert list(results) == ['final_availability', 'run_duration']
+    assert called == ['run_decision', 'base_parent_availability', 'final_parent_availability']
+    np.testing.assert_array_equal(results['run_duration'], expected['run_duration'])
+    np.testing.assert_array_equal(results['final_availability'], expected['final_availability'])
+    
+    called.clear()
+    model.evaluate_batch(weather, day_type, pa_wake, pb_wake, outputs=['run_duration'])
+    assert called == ['run_decision']
+
+
+def test_evaluate_batch_structured_output():
+    model = SchoolCommuteFuzzyModel()
+    weather, day_type, pa_wake, pb_wake = scenario_grid()
+    probs, expected = model.predict_batch(weather, day_type, pa_wake, pb_wake)
+    
+    table = model.evaluate_batch(weather, day_type, pa_wake, pb_wake,
+                                 outputs=['success_probability', 'breakfast_time'], structured=True)
+    assert table.dtype.names == ('success_probability', 'breakfast_time')
+    assert table.shape == (len(weather),)
+    np.testing.assert_array_equal(table['success_probability'], probs)
+    np.testing.assert_array_equal(table['breakfast_time'], expected['breakfast_time'])
+    
+    with pytest.raises(ValueError):
+        model.evaluate_batch(weather, day_type, pa_wake, pb_wake, outputs=['speed'])
+
+
+@pytest.mark.parametrize('settings, rows', [
+    ({}, 20000),
+    ({'defuzz_method': 'sampled'}, 4000),
+    ({'run_decision_method': 'lookup'}, 20000),
+])
+def test_float32_batches_stay_close_to_float64(settings, rows):
+    exact = SchoolCommuteFuzzyModel(**settings)
+    compact = SchoolCommuteFuzzyModel(dtype='float32', **settings)
+    assert compact._batch_chunk_size == 2 * exact._batch_chunk_size
+    
+    weather_num, day_type_num, pa_wake, _ = compact._encode_batch_inputs(*scenario_grid())
+    assert weather_num.dtype == day_type_num.dtype == np.uint8
+    assert pa_wake.dtype == np.float32
+    
+    # Edge-case grid: every output within float32 rounding of the float64 value
+    probs, intermediate = compact.predict_batch(*scenario_grid())
+    expected_probs, expected = exact.predict_batch(*scenario_grid())
+    assert probs.dtype == np.float32
+    np.testing.assert_allclose(probs, expected_probs, rtol=0, atol=1e-4)
+    for key, values in expected.items():
+        assert intermediate[key].dtype == np.float32
+        np.testing.assert_allclose(intermediate[key], values, rtol=0, atol=1e-3, err_msg=key)
+    
+    # Random inputs: run durations stay within 1e-3 minutes; other outputs only
+    # differ where a wake time rounds across a model threshold
+    rng = np.random.default_rng(7)
+    inputs = (rng.integers(1, 6, rows), rng.integers(0, 2, rows),
+              rng.uniform(5.5, 8.5, rows), rng.uniform(5.5, 8.5, rows))
+    outputs = ['success_probability', 'run_duration', 'final_availability']
+    approx = compact.evaluate_batch(*inputs, outputs=outputs)
+    reference = exact.evaluate_batch(*inputs, outputs=outputs)
+    assert np.max(np.abs(approx['run_duration'] - reference['run_duration'])) < 1e-3
+    for key in ('success_probability', 'final_availability'):
+        assert np.mean(np.abs(approx[key] - reference[key]) > 1e-3) < 1e-3, key
+    
+    with pytest.raises(ValueError):
+        SchoolCommuteFuzzyModel(dtype='float16')
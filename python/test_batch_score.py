@@ -0,0 +1,107 @@
+"""
+Tests for the streaming batch scorer
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from batch_score import main, score_file
+from school_commute_model import SchoolCommuteFuzzyModel
+
+
+def write_scenarios(path, n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    weather = np.array(['clear', 'cloudy', 'light_rain', 'heavy_rain', 'snow'])
+    frame = pd.DataFrame({
+        'id': np.arange(n),
+        'weather': weather[rng.integers(0, 5, n)],
+        'day_type': np.where(rng.integers(0, 2, n) == 1, 'weekday', 'weekend'),
+        'parent_a_wake': rng.uniform(5.5, 8.5, n).round(3),
+        'parent_b_wake': rng.uniform(5.5, 8.5, n).round(3),
+    })
+    if str(path).endswith('.parquet'):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return frame
+
+
+def expected_scores(frame, outputs):
+    probs, intermediate = SchoolCommuteFuzzyModel().predict_batch(
+        frame['weather'], frame['day_type'], frame['parent_a_wake'], frame['parent_b_wake'])
+    return probs, {name: intermediate[name] for name in outputs}
+
+
+def test_csv_scoring_matches_predict_batch(tmp_path, capsys):
+    scenarios = write_scenarios(tmp_path / 'scenarios.csv')
+    output = tmp_path / 'scores.csv'
+    
+    assert main([str(tmp_path / 'scenarios.csv'), str(output), '--chunk-size', '7',
+                 '--outputs', 'run_duration,routine_efficiency', '--keep-columns', 'id']) == 0
+    assert 'rows/sec' in capsys.readouterr().out
+    
+    scores = pd.read_csv(output)
+    probs, intermediate = expected_scores(scenarios, ['run_duration', 'routine_efficiency'])
+    assert list(scores.columns) == ['id', 'success_probability', 'run_duration', 'routine_efficiency']
+    np.testing.assert_array_equal(scores['id'], scenarios['id'])
+    np.testing.assert_allclose(scores['success_probability'], probs, rtol=1e-12)
+    np.testing.assert_allclose(scores['run_duration'], intermediate['run_duration'], rtol=1e-12)
+
+
+def test_interrupted_run_resumes_after_last_completed_chunk(tmp_path):
+    scenarios = write_scenarios(tmp_path / 'scenarios.csv')
+    output = str(tmp_path / 'scores.csv')
+    
+    def interrupt(rows, seconds):
+        if rows >= 20:
+            raise KeyboardInterrupt
+    
+    with pytest.raises(KeyboardInterrupt):
+        score_file(str(tmp_path / 'scenarios.csv'), output, chunk_size=10, keep_columns=['id'],
+                   report=interrupt)
+    
+    # A partially written chunk after the checkpoint is discarded on resume
+    with open(output, 'a') as handle:
+        handle.write('99,12.')
+    
+    summary = score_file(str(tmp_path / 'scenarios.csv'), output, chunk_size=10,
+                         keep_columns=['id'], resume=True)
+    assert (summary['rows'], summary['total_rows']) == (30, 50)
+    
+    scores = pd.read_csv(output)
+    probs, _ = expected_scores(scenarios, [])
+    np.testing.assert_array_equal(scores['id'], scenarios['id'])
+    np.testing.assert_allclose(scores['success_probability'], probs, rtol=1e-12)
+    
+    # Resuming a finished run is a no-op; different settings are rejected
+    assert score_file(str(tmp_path / 'scenarios.csv'), output, chunk_size=10,
+                      keep_columns=['id'], resume=True)['rows'] == 0
+    with pytest.raises(ValueError):
+        score_file(str(tmp_path / 'scenarios.csv'), output, chunk_size=5, resume=True)
+
+
+def test_parquet_scoring_resumes(tmp_path):
+    pytest.importorskip('pyarrow')
+    scenarios = write_scenarios(tmp_path / 'scenarios.parquet')
+    output = str(tmp_path / 'scores.parquet')
+    
+    def interrupt(rows, seconds):
+        if rows >= 16:
+            raise KeyboardInterrupt
+    
+    with pytest.raises(KeyboardInterrupt):
+        score_file(str(tmp_path / 'scenarios.parquet'), output, chunk_size=8, outputs=['run_duration'],
+                   report=interrupt)
+    score_file(str(tmp_path / 'scenarios.parquet'), output, chunk_size=8, outputs=['run_duration'],
+               resume=True)
+    
+    scores = pd.read_parquet(output)
+    probs, intermediate = expected_scores(scenarios, ['run_duration'])
+    np.testing.assert_array_equal(scores['success_probability'], probs)
+    np.testing.assert_array_equal(scores['run_duration'], intermediate['run_duration'])
+
+
+def test_unknown_outputs_are_rejected(tmp_path):
+    write_scenarios(tmp_path / 'scenarios.csv', n=5)
+    with pytest.raises(ValueError):
+        score_file(str(tmp_path / 'scenarios.csv'), str(tmp_path / 'scores.csv'), outputs=['speed'])
@@ -0,0 +1,54 @@
+"""
+Tests for the benchmark suite and its regression gate
+"""
+
+import json
+from benchmarks import (STARTUP_BENCHMARK, STARTUP_BUDGET_SECONDS, build_benchmarks, compare_results,
+                        main, run_benchmarks, time_call)
+
+
+def test_suite_covers_every_node_and_batch_size():
+    names = [name for name, _, _ in build_benchmarks(batch_sizes=(1, 10))]
+    
+    assert 'node/run_decision' in names
+    assert 'node_batch/school_arrival_probability[100000]' in names
+    assert {'predict/scalar', 'predict_batch[1]', 'predict_batch[10]', 'predict_batch_float32[10]',
+            'grid/sensitivity_analysis', 'grid/system_responses'} <= set(names)
+    assert len(names) == len(set(names))
+
+
+def test_run_writes_baseline_and_compare_flags_regressions(tmp_path):
+    document = run_benchmarks('node/(breakfast|dressing)', min_time=0.001, repeat=2)
+    assert set(document['results']) == {'node/breakfast_efficiency', 'node/dressing_efficiency'}
+    assert document['results']['node/breakfast_efficiency']['best'] > 0
+    
+    slower = json.loads(json.dumps(document))
+    slower['results']['node/dressing_efficiency']['best'] *= 1.5
+    rows = {row['name']: row for row in compare_results(document, slower, threshold=0.2)}
+    assert rows['node/dressing_efficiency']['regressed']
+    assert not rows['node/breakfast_efficiency']['regressed']
+    
+    baseline, current = tmp_path / 'baseline.json', tmp_path / 'current.json'
+    baseline.write_text(json.dumps(document))
+    current.write_text(json.dumps(slower))
+    assert main(['compare', str(baseline), str(baseline)]) == 0
+    assert main(['compare', str(baseline), str(current), '--threshold', '0.2']) == 1
+    assert main(['compare', str(baseline), str(current), '--threshold', '0.6']) == 0
+
+
+def test_time_call_reports_per_call_seconds():
+    result = time_call(lambda: sum(range(100)), min_time=0.001, repeat=3)
+    assert 0 < result['best'] <= result['median']
+    assert result['loops'] >= 1
+
+
+def test_startup_is_within_budget_and_gated():
+    document = run_benchmarks('^startup/', repeat=1)
+    result = document['results'][STARTUP_BENCHMARK]
+    assert list(document['results']) == [STARTUP_BENCHMARK]
+    assert 0 < result['best'] < STARTUP_BUDGET_SECONDS
+    
+    over_budget = json.loads(json.dumps(document))
+    over_budget['results'][STARTUP_BENCHMARK]['best'] = STARTUP_BUDGET_SECONDS * 1.01
+    baseline = json.loads(json.dumps(over_budget))
+    assert compare_results(baseline, over_budget, threshold=0.2)[0]['regressed']
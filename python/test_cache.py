@@ -0,0 +1,78 @@
+"""
+Tests for the opt-in prediction caches of the School Commute Fuzzy Logic Model
+"""
+
+import pytest
+from prediction_cache import LRUCache
+from school_commute_model import SchoolCommuteFuzzyModel
+
+
+def test_lru_cache_counts_hits_misses_and_evictions():
+    cache = LRUCache(2)
+    calls = []
+    
+    def compute(*key):
+        calls.append(key)
+        return sum(key)
+    
+    assert cache.get((1, 2), compute) == 3
+    assert cache.get((1, 2), compute) == 3
+    cache.get((2, 2), compute)
+    cache.get((1, 2), compute)      # refreshes (1, 2)
+    cache.get((3, 3), compute)      # evicts (2, 2), the least recently used
+    cache.get((2, 2), compute)
+    
+    assert calls == [(1, 2), (2, 2), (3, 3), (2, 2)]
+    assert cache.info() == (2, 4, 2, 2, 2)
+    
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 0, 2)
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+def test_cached_predictions_match_uncached_on_the_quantization_grid():
+    model = SchoolCommuteFuzzyModel(cache_size=64, cache_resolution=5)
+    reference = SchoolCommuteFuzzyModel()
+    
+    for weather in ['clear', 'light_rain', 'snow']:
+        for pb_wake in [5.5, 6.0, 6.25, 6.5, 7.0, 7.75]:
+            for _ in range(2):
+                prob, intermediate = model.predict(weather, 'weekday', 6.0, pb_wake)
+                expected_prob, expected = reference.predict(weather, 'weekday', 6.0, pb_wake)
+                assert prob == expected_prob
+                assert intermediate == expected
+    
+    # Off-grid wake times share the entry of the nearest 5-minute step
+    info = model.cache_info()['predict']
+    model.predict('clear', 'weekday', 6.01, 6.26)
+    assert model.cache_info()['predict'].hits == info.hits + 1
+    assert model.cache_info()['predict'].size <= 64
+
+
+def test_node_caches_are_shared_across_parent_a_wake():
+    model = SchoolCommuteFuzzyModel(cache_size=128)
+    
+    for pa_wake in [5.5, 6.0, 6.5, 7.0, 7.5]:
+        model.predict('cloudy', 'weekend', pa_wake, 6.25)
+    
+    run_decision = model.cache_info()['run_decision']
+    assert (run_decision.hits, run_decision.misses) == (4, 1)
+    assert model.cache_info()['predict'].misses == 5
+    
+    # Changing the compiled spec invalidates cached results
+    params = model.mf_params
+    params['run_duration']['terms']['long'] = ('trimf', (45, 60, 90))
+    model.mf_params = params
+    model.predict('cloudy', 'weekend', 6.0, 6.25)
+    assert model.cache_info()['run_decision'].misses == 1
+    assert model.cache_info()['run_decision'].hits == 0
+
+
+def test_caching_is_off_by_default():
+    model = SchoolCommuteFuzzyModel()
+    model.predict('clear', 'weekday', 6.0, 6.0)
+    assert model.cache_info() == {}
+    
+    with pytest.raises(ValueError):
+        SchoolCommuteFuzzyModel(cache_size=-1)
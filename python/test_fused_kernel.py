@@ -0,0 +1,76 @@
+"""
+Tests for the fused Numba backend and its NumPy fallback
+"""
+
+import numpy as np
+import pytest
+import fused_kernel
+from instrumentation import InMemorySink, Instrumentation
+from school_commute_model import INTERMEDIATE_OUTPUTS, SchoolCommuteFuzzyModel
+
+OUTPUTS = ('success_probability',) + INTERMEDIATE_OUTPUTS
+
+# Wake times on and around the MF breakpoints, plus values outside the universe
+EDGE_WAKE_TIMES = [5.4, 5.5, 5.75, 6.0, 6.1, 6.25, 6.4, 6.5, 6.75, 7.0, 7.25, 7.5, 8.0, 8.5, 8.6]
+
+
+def scenarios(n_random: int):
+    """Every weather, day type and pair of edge wake times, then random rows."""
+    grid = np.meshgrid(np.arange(1, 6), [0, 1], EDGE_WAKE_TIMES, EDGE_WAKE_TIMES, indexing='ij')
+    rng = np.random.default_rng(5)
+    random = (rng.integers(1, 6, n_random), rng.integers(0, 2, n_random),
+              rng.uniform(5.3, 8.7, n_random), rng.uniform(5.3, 8.7, n_random))
+    return [np.concatenate([axis.ravel(), extra]) for axis, extra in zip(grid, random)]
+
+
+def test_numba_backend_falls_back_to_numpy(monkeypatch):
+    inputs = scenarios(500)
+    expected = SchoolCommuteFuzzyModel().evaluate_batch(*inputs, outputs=OUTPUTS)
+    
+    monkeypatch.setattr(fused_kernel, 'NUMBA_AVAILABLE', False)
+    model = SchoolCommuteFuzzyModel(backend='numba')
+    assert model.fused_pipeline is None
+    results = model.evaluate_batch(*inputs, outputs=OUTPUTS)
+    for name in OUTPUTS:
+        np.testing.assert_array_equal(results[name], expected[name])
+    
+    monkeypatch.undo()
+    assert SchoolCommuteFuzzyModel(engine='mamdani', backend='numba').fused_pipeline is None
+    assert SchoolCommuteFuzzyModel().fused_pipeline is None
+    with pytest.raises(ValueError):
+        SchoolCommuteFuzzyModel(backend='cuda')
+
+
+@pytest.mark.parametrize('settings, n_random', [
+    ({}, 20000),
+    ({'defuzz_method': 'sampled'}, 2000),
+    ({'run_decision_method': 'lookup'}, 20000),
+])
+def test_fused_kernel_matches_numpy_batch(settings, n_random):
+    pytest.importorskip('numba')
+    inputs = scenarios(n_random)
+    numpy_model = SchoolCommuteFuzzyModel(**settings)
+    sink = InMemorySink()
+    fused_model = SchoolCommuteFuzzyModel(backend='numba', instrumentation=Instrumentation(sink),
+                                          **settings)
+    assert fused_model.fused_pipeline is not None
+    
+    expected = numpy_model.evaluate_batch(*inputs, outputs=OUTPUTS)
+    results = fused_model.evaluate_batch(*inputs, outputs=OUTPUTS)
+    for name in OUTPUTS:
+        np.testing.assert_array_equal(results[name], expected[name], err_msg=name)
+    
+    # Fallbacks are counted as on the NumPy path (wake times outside the universe)
+    fallbacks = sink.counters.get(('fallbacks', 'run_decision'), 0)
+    if settings.get('run_decision_method') == 'lookup':
+        assert fallbacks == 0
+    else:
+        assert fallbacks > 0
+    
+    # The tables are rebuilt when the MF parameters change
+    params = numpy_model.mf_params
+    params['parent_b_wake']['terms']['early'] = ('trimf', (6.0, 6.4, 7.0))
+    numpy_model.mf_params = fused_model.mf_params = params
+    expected = numpy_model.evaluate_batch(*inputs, outputs=['run_duration'])
+    results = fused_model.evaluate_batch(*inputs, outputs=['run_duration'])
+    np.testing.assert_array_equal(results['run_duration'], expected['run_duration'])
@@ -0,0 +1,57 @@
+"""
+Tests for the NumPy fuzzy kernels against scikit-fuzzy
+"""
+
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from fuzzy_kernels import centroid, interp_membership, trapmf, trimf
+
+SHAPES = [
+    (5.5, 5.5, 6.0, 6.25), (7.0, 7.5, 8.5, 8.5), (1, 1, 2, 2.5), (0, 0, 5, 10),
+    (6.0, 6.5, 6.5, 7.0), (2.0, 2.0, 2.0, 2.0), (3.0, 3.3, 3.3, 3.3),
+]
+
+
+def test_membership_functions_match_skfuzzy():
+    fuzz = pytest.importorskip('skfuzzy')
+    rng = np.random.default_rng(0)
+    for universe in (np.arange(5.5, 8.51, 0.01), np.arange(0, 120.1, 0.1), np.linspace(0, 11, 37)):
+        for a, b, c, d in SHAPES + [tuple(np.sort(rng.uniform(0, 10, 4))) for _ in range(20)]:
+            np.testing.assert_array_equal(trapmf(universe, (a, b, c, d)), fuzz.trapmf(universe, [a, b, c, d]))
+            np.testing.assert_array_equal(trimf(universe, (a, b, d)), fuzz.trimf(universe, [a, b, d]))
+            
+            mf = trapmf(universe, (a, b, c, d))
+            points = rng.uniform(universe[0] - 1, universe[-1] + 1, 50)
+            for zero_outside_x in (True, False):
+                np.testing.assert_array_equal(
+                    interp_membership(universe, mf, points, zero_outside_x),
+                    fuzz.interp_membership(universe, mf, points, zero_outside_x))
+
+
+def test_centroid_matches_skfuzzy():
+    fuzz = pytest.importorskip('skfuzzy')
+    universe = np.arange(0, 120.1, 0.1)
+    rng = np.random.default_rng(1)
+    rows = np.array([np.fmax(rng.uniform() * trimf(universe, (10, 20, 30)),
+                             rng.uniform() * trapmf(universe, (40, 50, 60, 120)))
+                     for _ in range(20)])
+    expected = [fuzz.defuzz(universe, row, 'centroid') for row in rows]
+    np.testing.assert_array_equal(centroid(universe, rows), expected)
+
+
+def test_invalid_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        trimf(np.arange(3.0), (2, 1, 3))
+    with pytest.raises(ValueError):
+        trapmf(np.arange(3.0), (0, 2, 1, 3))
+
+
+def test_model_import_avoids_heavy_dependencies():
+    code = ("import sys, school_commute_model\n"
+            "print(sorted(m for m in ('skfuzzy', 'scipy', 'matplotlib', 'pandas') if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    assert output.strip() == '[]'
@@ -0,0 +1,75 @@
+"""
+Tests for the opt-in timing and counter instrumentation
+"""
+
+import logging
+import numpy as np
+import pytest
+from instrumentation import InMemorySink, Instrumentation, LogSink, PrometheusSink
+from school_commute_model import NODE_LEVELS, SchoolCommuteFuzzyModel
+
+
+def test_predict_records_calls_levels_nodes_and_fallbacks():
+    sink = InMemorySink()
+    model = SchoolCommuteFuzzyModel(instrumentation=Instrumentation(sink))
+    reference = SchoolCommuteFuzzyModel()
+    
+    # Parent B waking after the wake universe fires no run decision rule
+    for pb_wake in (6.0, 9.0):
+        assert model.predict('clear', 'weekday', 6.0, pb_wake) == reference.predict(
+            'clear', 'weekday', 6.0, pb_wake)
+    
+    summary = sink.summary()
+    assert summary['timings']['call/predict']['count'] == 2
+    for node, level in NODE_LEVELS.items():
+        assert summary['timings'][f'node/{node}']['count'] == 2
+        assert summary['timings'][f'level/{level}']['count'] == 2
+    assert summary['counters'] == {'fallbacks/run_decision': 1}
+    
+    levels = sum(summary['timings'][f'level/{level}']['total'] for level in range(1, 6))
+    assert 0 < levels <= summary['timings']['call/predict']['total']
+
+
+def test_evaluate_batch_records_only_evaluated_nodes():
+    sink = InMemorySink()
+    model = SchoolCommuteFuzzyModel(instrumentation=Instrumentation(sink))
+    pb_wake = np.array([6.0, 9.0, 9.5, 7.0])
+    
+    values = model.evaluate_batch(['clear'] * 4, ['weekday'] * 4, np.full(4, 6.0), pb_wake,
+                                  outputs=['run_duration'])
+    expected = SchoolCommuteFuzzyModel().evaluate_batch(
+        ['clear'] * 4, ['weekday'] * 4, np.full(4, 6.0), pb_wake, outputs=['run_duration'])
+    np.testing.assert_array_equal(values['run_duration'], expected['run_duration'])
+    
+    summary = sink.summary()
+    assert set(summary['timings']) == {'call/evaluate_batch', 'level/1', 'node/run_decision'}
+    assert summary['counters'] == {'rows/evaluate_batch': 4, 'fallbacks/run_decision': 2}
+    
+    # predict_batch goes through evaluate_batch and is recorded once
+    model.predict_batch(['clear'], ['weekday'], [6.0], [6.0])
+    assert sink.summary()['timings']['call/evaluate_batch']['count'] == 2
+
+
+def test_failed_calls_are_counted():
+    sink = InMemorySink()
+    model = SchoolCommuteFuzzyModel(instrumentation=Instrumentation(sink))
+    with pytest.raises(KeyError):
+        model.predict('fog', 'weekday', 6.0, 6.0)
+    assert sink.counters == {('errors', 'predict'): 1}
+    assert model.instrumentation._timings is None
+
+
+def test_prometheus_and_log_sinks(caplog):
+    prometheus = PrometheusSink()
+    model = SchoolCommuteFuzzyModel(instrumentation=Instrumentation(prometheus, LogSink()))
+    
+    with caplog.at_level(logging.INFO, logger='school_commute.instrumentation'):
+        model.predict('snow', 'weekend', 7.0, 7.5)
+    assert len(caplog.records) == 1
+    assert 'call/predict=' in caplog.records[0].message
+    assert 'node/run_decision=' in caplog.records[0].message
+    
+    text = prometheus.render()
+    assert '# TYPE school_commute_node_seconds summary' in text
+    assert 'school_commute_node_seconds_count{node="run_decision"} 1' in text
+    assert 'school_commute_level_seconds_count{level="5"} 1' in text
@@ -0,0 +1,65 @@
+"""
+Tests for the inverse wake time queries
+"""
+
+import numpy as np
+import pytest
+from inverse import (DEFAULT_TOLERANCE, feasible_wake_intervals, feasible_wake_regions,
+                     latest_wake_curve, latest_wake_time)
+from school_commute_model import SchoolCommuteFuzzyModel
+
+MODEL = SchoolCommuteFuzzyModel()
+
+
+def _success(weather, day_type, parent_a, parent_b):
+    parent_a, parent_b = np.broadcast_arrays(np.atleast_1d(parent_a), np.atleast_1d(parent_b))
+    n = len(parent_a)
+    return MODEL.evaluate_batch(np.full(n, weather), np.full(n, day_type), parent_a, parent_b,
+                                outputs=['success_probability'])['success_probability']
+
+
+@pytest.mark.parametrize('weather, day_type, other_wake, target', [
+    ('clear', 'weekday', 6.0, 85.0),
+    ('light_rain', 'weekday', 6.25, 70.0),
+    ('cloudy', 'weekday', 6.0, 50.0),
+    ('snow', 'weekend', 7.0, 40.0),
+    ('heavy_rain', 'weekday', 5.75, 20.0),
+])
+def test_intervals_match_brute_force_scan(weather, day_type, other_wake, target):
+    intervals = feasible_wake_intervals(target, weather, day_type, other_wake, model=MODEL)
+    
+    dense = np.linspace(5.5, 8.5, 6001)
+    feasible = _success(weather, day_type, other_wake, dense) >= target
+    inside = np.zeros(len(dense), dtype=bool)
+    for start, end in intervals:
+        assert start <= end
+        # Reported boundaries lie on the feasible side
+        assert np.all(_success(weather, day_type, other_wake, [start, end]) >= target)
+        inside |= (dense >= start) & (dense <= end)
+    
+    # The scan agrees everywhere except within the tolerance of a boundary
+    edges = np.array([edge for interval in intervals for edge in interval])
+    disagree = dense[inside != feasible]
+    if len(disagree):
+        assert np.min(np.abs(disagree[:, None] - edges[None, :]), axis=1).max() <= 2 * DEFAULT_TOLERANCE
+
+
+def test_latest_wake_time_and_curve():
+    latest = latest_wake_time(70.0, 'light_rain', 'weekday', 6.25, model=MODEL)
+    assert _success('light_rain', 'weekday', 6.25, latest)[0] >= 70.0
+    assert _success('light_rain', 'weekday', 6.25, latest + 2 * DEFAULT_TOLERANCE)[0] < 70.0
+    assert latest_wake_time(99.0, 'snow', 'weekday', 6.0, model=MODEL) is None
+    
+    # Solving for Parent A with Parent B fixed
+    latest_a = latest_wake_time(60.0, 'clear', 'weekend', 6.0, solve_for='parent_a_wake', model=MODEL)
+    assert _success('clear', 'weekend', latest_a, 6.0)[0] >= 60.0
+    
+    other_wakes = np.linspace(5.5, 8.5, 13)
+    curve = latest_wake_curve(70.0, 'light_rain', 'weekday', other_wakes, model=MODEL)
+    expected = [latest_wake_time(70.0, 'light_rain', 'weekday', wake, model=MODEL) for wake in other_wakes]
+    np.testing.assert_array_equal(curve, [np.nan if value is None else value for value in expected])
+    
+    regions = feasible_wake_regions(70.0, 'light_rain', 'weekday', other_wakes, model=MODEL)
+    assert [region.other_wake for region in regions] == list(other_wakes)
+    with pytest.raises(ValueError):
+        latest_wake_time(70.0, 'clear', 'weekday', 6.0, solve_for='weather', model=MODEL)
@@ -6,6 +6,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from school_commute_model import SchoolCommuteFuzzyModel
+from parameter_sweep import parameter_sweep
 import pandas as pd
 
 def run_test_cases():
@@ -129,12 +130,8 @@ def sensitivity_analysis():
     
     # Plot 4: Combined heat map
     X, Y = np.meshgrid(wake_times, wake_times)
-    Z = np.zeros_like(X)
-    
-    for i, parent_a_time in enumerate(wake_times):
-        for j, parent_b_time in enumerate(wake_times):
-            prob, _ = model.predict('clear', 'weekday', parent_a_time, parent_b_time)
-            Z[j, i] = prob  # Note: j, i for proper orientation
+    grid = parameter_sweep(['clear'], ['weekday'], wake_times, wake_times, model=model)
+    Z = grid['success_probability'][0, 0].T  # Note: rows are Parent B for proper orientation
     
     im = axes[1, 1].contourf(X, Y, Z, levels=20, cmap='RdYlGn')
     axes[1, 1].set_xlabel('Parent A Wake Time (hours)')
@@ -0,0 +1,44 @@
+"""
+Tests for the parallel parameter sweep
+"""
+
+import numpy as np
+import pytest
+from parameter_sweep import parameter_sweep
+from school_commute_model import SchoolCommuteFuzzyModel
+
+WEATHER_CONDITIONS = ['clear', 'cloudy', 'light_rain', 'heavy_rain', 'snow']
+
+
+def test_sweep_grid_matches_scalar_predict():
+    model = SchoolCommuteFuzzyModel()
+    pa_wake = np.linspace(5.5, 8.5, 4)
+    pb_wake = np.linspace(5.5, 8.5, 7)
+    
+    grid = parameter_sweep(WEATHER_CONDITIONS, ['weekend', 'weekday'], pa_wake, pb_wake,
+                           model=model, outputs=['success_probability', 'run_duration'], workers=1,
+                           tile_size=13)
+    assert grid['success_probability'].shape == (5, 2, 4, 7)
+    
+    for w, weather in enumerate(WEATHER_CONDITIONS):
+        for d, day_type in enumerate(['weekend', 'weekday']):
+            for i, pa in enumerate(pa_wake):
+                for j, pb in enumerate(pb_wake):
+                    prob, intermediate = model.predict(weather, day_type, pa, pb)
+                    assert grid['success_probability'][w, d, i, j] == prob
+                    assert grid['run_duration'][w, d, i, j] == intermediate['run_duration']
+
+
+def test_process_pool_writes_the_same_shared_grid():
+    axes = (WEATHER_CONDITIONS, ['weekend', 'weekday'], np.linspace(5.5, 8.5, 9), np.linspace(5.5, 8.5, 11))
+    serial = parameter_sweep(*axes, outputs=['success_probability', 'final_availability'], workers=1)
+    parallel = parameter_sweep(*axes, outputs=['success_probability', 'final_availability'], workers=2,
+                               tile_size=50)
+    
+    for name in serial:
+        np.testing.assert_array_equal(parallel[name], serial[name])
+
+
+def test_sweep_rejects_unknown_outputs():
+    with pytest.raises(ValueError):
+        parameter_sweep(['clear'], ['weekday'], [6.0], [6.0], outputs=['speed'])
@@ -0,0 +1,83 @@
+"""
+Tests for the precomputed response surfaces
+"""
+
+import numpy as np
+import pytest
+from response_surface import (FORMAT_VERSION, MODEL_OUTPUTS, ResponseSurface, _deviation,
+                              build_response_surface)
+from school_commute_model import SchoolCommuteFuzzyModel
+
+MODEL = SchoolCommuteFuzzyModel()
+
+
+@pytest.fixture(scope='module')
+def surface_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('surface') / 'coarse.scsurf')
+    build_response_surface(path, MODEL, step_minutes=5.0, validation_samples=2000, workers=1)
+    return path
+
+
+def test_load_memory_maps_the_table(surface_path):
+    surface = ResponseSurface.load(surface_path)
+    assert isinstance(surface.table, np.memmap)
+    assert surface.table.shape == (len(MODEL_OUTPUTS), 5, 2, 37, 37)
+    assert surface.table.offset % 64 == 0
+    assert surface.matches(MODEL)
+    assert not surface.matches(SchoolCommuteFuzzyModel(defuzz_method='sampled'))
+    
+    # The recorded deviations are reproducible from the same validation points
+    deviation = surface.metadata['max_deviation']
+    assert deviation == _deviation(surface, MODEL, 2000, 0)
+    assert deviation['linear']['weather_travel_multiplier']['max'] == 0.0
+    assert deviation['linear']['success_probability']['mean'] < 1.0
+
+
+def test_lookup_at_grid_points_matches_model(surface_path):
+    surface = ResponseSurface.load(surface_path)
+    rng = np.random.default_rng(3)
+    n = 500
+    grid = np.linspace(5.5, 8.5, 37)
+    weather = rng.choice(list(MODEL.weather_map), n)
+    day_type = rng.choice(['weekday', 'weekend'], n)
+    parent_a, parent_b = rng.choice(grid, n), rng.choice(grid, n)
+    live = MODEL.evaluate_batch(weather, day_type, parent_a, parent_b, outputs=MODEL_OUTPUTS)
+    
+    nearest = surface.lookup(weather, day_type, parent_a, parent_b, outputs=MODEL_OUTPUTS,
+                             method='nearest')
+    linear = surface.lookup(weather, day_type, parent_a, parent_b, outputs=MODEL_OUTPUTS)
+    for name in MODEL_OUTPUTS:
+        np.testing.assert_array_equal(nearest[name], live[name])
+        np.testing.assert_allclose(linear[name], live[name], rtol=0, atol=1e-9)
+    
+    # Off grid, 'nearest' returns the closest grid point; out of range wake times are clamped
+    off_grid = surface.lookup(['clear', 'snow'], ['weekday', 'weekend'], [6.03, 4.0], [7.49, 9.0],
+                              method='nearest')['success_probability']
+    expected = MODEL.evaluate_batch(['clear', 'snow'], ['weekday', 'weekend'], [6.0, 5.5], [7.5, 8.5],
+                                    outputs=['success_probability'])['success_probability']
+    np.testing.assert_array_equal(off_grid, expected)
+
+
+def test_invalid_files_and_queries_raise(surface_path, tmp_path):
+    surface = ResponseSurface.load(surface_path)
+    with pytest.raises(ValueError):
+        surface.lookup(['clear'], ['weekday'], [6.0], [6.0], outputs=['unknown'])
+    with pytest.raises(ValueError):
+        surface.lookup(['clear'], ['weekday'], [6.0], [6.0], method='cubic')
+    with pytest.raises(KeyError):
+        surface.lookup(['fog'], ['weekday'], [6.0], [6.0])
+    
+    with open(surface_path, 'rb') as handle:
+        data = bytearray(handle.read())
+    newer = tmp_path / 'newer.scsurf'
+    data[8] = FORMAT_VERSION + 1
+    newer.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match='format version'):
+        ResponseSurface.load(str(newer))
+    
+    foreign = tmp_path / 'foreign.scsurf'
+    foreign.write_bytes(b'\x93NUMPY' + bytes(data[6:]))
+    with pytest.raises(ValueError):
+        ResponseSurface.load(str(foreign))
+    with pytest.raises(ValueError):
+        build_response_surface(str(tmp_path / 'bad.scsurf'), MODEL, step_minutes=7.0)
@@ -0,0 +1,64 @@
+"""
+Tests for incremental what-if scenarios
+"""
+
+import pytest
+from school_commute_model import NODE_GRAPH, RUN_DECISION_MF_PARAMS, SchoolCommuteFuzzyModel, dependent_nodes
+from scenario import Scenario
+
+
+def test_dependent_nodes_follow_the_graph():
+    assert dependent_nodes(['parent_a_wake']) == (
+        'base_availability', 'final_availability', 'breakfast_time', 'dressing_time',
+        'transport_efficiency', 'routine_efficiency', 'success_probability')
+    assert dependent_nodes(['weather_num']) == (
+        'run_duration', 'final_availability', 'weather_travel_multiplier', 'breakfast_time',
+        'dressing_time', 'transport_efficiency', 'routine_efficiency', 'success_probability')
+    assert dependent_nodes(['weather_travel_multiplier']) == ('success_probability',)
+    with pytest.raises(ValueError):
+        dependent_nodes(['wind'])
+
+
+def test_updates_recompute_only_downstream_nodes():
+    model = SchoolCommuteFuzzyModel()
+    scenario = Scenario(model, 'clear', 'weekday', 6.0, 6.5)
+    assert scenario.recomputed == tuple(NODE_GRAPH)
+    
+    steps = [
+        ({'parent_a_wake': 6.75}, 'clear', 'weekday', 6.75, 6.5),
+        ({'weather': 'snow'}, 'snow', 'weekday', 6.75, 6.5),
+        ({'day_type': 'weekend', 'parent_b_wake': 7.25}, 'snow', 'weekend', 6.75, 7.25),
+        ({'parent_b_wake': 9.0}, 'snow', 'weekend', 6.75, 9.0),
+    ]
+    for changes, *inputs in steps:
+        recomputed = scenario.update(**changes)
+        assert scenario.predict() == model.predict(*inputs)
+        encoded = [{'weather': 'weather_num', 'day_type': 'day_type_num'}.get(name, name)
+                   for name in changes]
+        assert set(recomputed) <= set(dependent_nodes(encoded))
+        if 'parent_a_wake' in changes:
+            assert 'run_duration' not in recomputed and 'weather_travel_multiplier' not in recomputed
+        if 'weather' in changes:
+            assert 'base_availability' not in recomputed
+    
+    # Unchanged values stop propagation: clear and cloudy share the same run
+    # duration and travel multiplier
+    assert scenario.update(parent_a_wake=6.75) == ()
+    scenario = Scenario(model, 'clear', 'weekday', 6.0, 6.5)
+    assert scenario.update(weather='cloudy') == ('run_duration', 'weather_travel_multiplier',
+                                                 'success_probability')
+
+
+def test_model_edits_invalidate_every_node():
+    model = SchoolCommuteFuzzyModel()
+    scenario = Scenario(model, 'light_rain', 'weekday', 6.0, 6.25)
+    params = {name: dict(definition, terms=dict(definition['terms']))
+              for name, definition in RUN_DECISION_MF_PARAMS.items()}
+    params['parent_b_wake']['terms']['early'] = ('trimf', (5.75, 6.25, 7.0))
+    model.mf_params = params
+    
+    assert scenario.update() == tuple(dependent_nodes(['weather_num', 'day_type_num', 'parent_a_wake',
+                                                       'parent_b_wake']))
+    assert scenario.predict() == model.predict('light_rain', 'weekday', 6.0, 6.25)
+    with pytest.raises(ValueError):
+        scenario.update(wind=3)
@@ -0,0 +1,103 @@
+"""
+Tests for the micro-batching scoring server
+"""
+
+import asyncio
+import json
+import pytest
+from school_commute_model import SchoolCommuteFuzzyModel
+from scoring_server import MicroBatcher, ScoringServer, ServerBusy, ServerClosed
+
+
+SCENARIOS = [(weather, day_type, 5.5 + 0.1 * i, 8.5 - 0.1 * i)
+             for i, (weather, day_type) in enumerate(
+                 [('clear', 'weekday'), ('snow', 'weekend'), ('light_rain', 'weekday'), (4, 0)] * 10)]
+
+
+def test_concurrent_requests_are_batched():
+    reference = SchoolCommuteFuzzyModel()
+    
+    async def run():
+        batcher = MicroBatcher(max_batch_size=16, max_delay=0.05,
+                               outputs=['success_probability', 'run_duration'])
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(*scenario) for scenario in SCENARIOS))
+        await batcher.close()
+        return results, batcher.stats()
+    
+    results, stats = asyncio.run(run())
+    for scenario, result in zip(SCENARIOS, results):
+        weather, day_type, pa_wake, pb_wake = scenario
+        if not isinstance(weather, str):
+            weather, day_type = 'heavy_rain', 'weekend'
+        prob, intermediate = reference.predict(weather, day_type, pa_wake, pb_wake)
+        assert result == {'success_probability': prob, 'run_duration': intermediate['run_duration']}
+    
+    assert stats['requests'] == len(SCENARIOS)
+    assert stats['max_batch_size'] == 16
+    assert stats['batches'] == 3
+    assert stats['pending'] == 0
+    assert 0 < stats['latency_p50_ms'] <= stats['latency_p99_ms']
+
+
+def test_backpressure_invalid_inputs_and_drain():
+    async def run():
+        batcher = MicroBatcher(max_batch_size=4, max_delay=0.01, max_pending=5)
+        with pytest.raises(ServerClosed):
+            await batcher.submit(*SCENARIOS[0])
+        await batcher.start()
+        with pytest.raises(ValueError):
+            await batcher.submit('fog', 'weekday', 6.0, 6.0)
+        with pytest.raises(ValueError):
+            await batcher.submit('clear', 'holiday', 6.0, 6.0)
+        
+        requests = [asyncio.ensure_future(batcher.submit(*scenario)) for scenario in SCENARIOS[:8]]
+        await asyncio.sleep(0)
+        # Drain answers every accepted request before stopping
+        await batcher.close()
+        outcomes = await asyncio.gather(*requests, return_exceptions=True)
+        with pytest.raises(ServerClosed):
+            await batcher.submit(*SCENARIOS[0])
+        return outcomes, batcher.stats()
+    
+    outcomes, stats = asyncio.run(run())
+    assert [type(outcome) for outcome in outcomes] == [dict] * 5 + [ServerBusy] * 3
+    assert stats['requests'] == 5 and stats['rejected'] == 3 and stats['pending'] == 0
+
+
+async def _http(address, method, path, body=None):
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address[:2])
+    payload = json.dumps(body).encode() if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + payload)
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(content)
+
+
+@pytest.mark.parametrize('unix', [False, True])
+def test_http_routes(tmp_path, unix):
+    scenario = {'weather': 'cloudy', 'day_type': 'weekday', 'parent_a_wake': 6.25, 'parent_b_wake': 6.75}
+    expected, _ = SchoolCommuteFuzzyModel().predict(*scenario.values())
+    
+    async def run():
+        server = ScoringServer(MicroBatcher(max_delay=0.001), port=0,
+                               unix_path=str(tmp_path / 'scoring.sock') if unix else None)
+        await server.start()
+        responses = await asyncio.gather(*(_http(server.address, 'POST', '/predict', scenario)
+                                           for _ in range(10)))
+        responses.append(await _http(server.address, 'POST', '/predict', dict(scenario, weather='fog')))
+        responses.append(await _http(server.address, 'GET', '/predict'))
+        responses.append(await _http(server.address, 'GET', '/stats'))
+        responses.append(await _http(server.address, 'GET', '/healthz'))
+        await server.close()
+        return responses
+    
+    responses = asyncio.run(run())
+    assert responses[:10] == [(200, {'success_probability': expected})] * 10
+    assert [status for status, _ in responses[10:]] == [400, 405, 200, 200]
+    assert responses[12][1]['requests'] == 10
@@ -0,0 +1,48 @@
+"""
+Tests for the Sobol and Morris global sensitivity analysis
+"""
+
+import numpy as np
+from sensitivity import MODEL_OUTPUTS, morris_effects, scale_unit_samples, sobol_indices
+
+
+def test_unit_samples_map_to_every_input_code():
+    unit = np.array([[0.0, 0.0, 0.0, 0.0], [0.5, 0.49, 0.5, 0.25], [1.0, 1.0, 1.0, 1.0]])
+    weather, day_type, pa_wake, pb_wake = scale_unit_samples(unit)
+    
+    np.testing.assert_array_equal(weather, [1, 3, 5])
+    np.testing.assert_array_equal(day_type, [0, 0, 1])
+    np.testing.assert_allclose(pa_wake, [5.5, 7.0, 8.5])
+    np.testing.assert_allclose(pb_wake, [5.5, 6.25, 8.5])
+
+
+def test_sobol_indices_identify_the_inputs_of_each_node():
+    indices = sobol_indices(n_base=2 ** 10, num_resamples=20, chunk_size=1000)
+    assert set(indices) == set(MODEL_OUTPUTS)
+    
+    # The weather multiplier depends on weather alone
+    multiplier = indices['weather_travel_multiplier']
+    np.testing.assert_allclose(multiplier['ST'], [1.0, 0.0, 0.0, 0.0], atol=0.05)
+    assert multiplier['S1'][0] > 0.9
+    
+    # Base availability ignores weather and day type exactly
+    base = indices['base_availability']
+    np.testing.assert_array_equal(base['ST'][:2], [0.0, 0.0])
+    assert np.all(base['ST'][2:] > 0.3)
+    
+    # Total effects dominate first-order effects within the sampling error
+    for result in indices.values():
+        assert np.all(result['ST'] >= result['S1'] - result['S1_conf'] - result['ST_conf'] - 0.02)
+    
+    repeat = sobol_indices(n_base=2 ** 10, num_resamples=20, outputs=['success_probability'])
+    np.testing.assert_array_equal(repeat['success_probability']['S1'],
+                                  indices['success_probability']['S1'])
+
+
+def test_morris_screening_separates_influential_inputs():
+    effects = morris_effects(n_trajectories=200, chunk_size=100)
+    
+    np.testing.assert_array_equal(effects['base_availability']['mu_star'][:2], [0.0, 0.0])
+    np.testing.assert_array_equal(effects['run_duration']['mu_star'][2], 0.0)
+    assert effects['run_duration']['mu_star'][3] > 0
+    assert np.all(effects['success_probability']['sigma'] >= 0)
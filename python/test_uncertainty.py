@@ -0,0 +1,62 @@
+"""
+Tests for Monte Carlo uncertainty propagation
+"""
+
+import numpy as np
+import pytest
+from school_commute_model import SchoolCommuteFuzzyModel
+from uncertainty import Categorical, TruncatedNormal, Uniform, propagate_uncertainty
+
+
+def test_fixed_inputs_reproduce_the_point_prediction():
+    prob, intermediate = SchoolCommuteFuzzyModel().predict('light_rain', 'weekday', 6.25, 6.5)
+    result = propagate_uncertainty('light_rain', 'weekday', 6.25, 6.5, n_samples=1000, chunk_size=300)
+    
+    assert result.n_samples == 1000
+    assert result.mean['success_probability'] == pytest.approx(prob)
+    assert result.std['run_duration'] == pytest.approx(0.0, abs=1e-9)
+    np.testing.assert_allclose(result.quantiles('run_duration'), intermediate['run_duration'])
+    assert result.prob_at_least(prob - 1e-6) == 1.0
+
+
+def test_streamed_summaries_match_the_full_sample():
+    distributions = (Categorical({'clear': 0.5, 'light_rain': 0.3, 'snow': 0.2}),
+                     Categorical({'weekday': 5, 'weekend': 2}),
+                     Uniform(5.5, 7.0), TruncatedNormal(6.4, 0.2))
+    n = 20000
+    result = propagate_uncertainty(*distributions, n_samples=n, chunk_size=n, seed=3)
+    
+    # Same stream, evaluated in one piece
+    rng = np.random.default_rng(3)
+    samples = [dist.sample(rng, n) for dist in distributions]
+    assert samples[3].min() >= 5.5 and samples[3].max() <= 8.5
+    probs, intermediate = SchoolCommuteFuzzyModel().predict_batch(*samples)
+    
+    assert result.mean['success_probability'] == pytest.approx(probs.mean())
+    assert result.std['final_availability'] == pytest.approx(intermediate['final_availability'].std(ddof=1))
+    for x in result.thresholds:
+        assert result.prob_at_least(x) == np.mean(probs >= x)
+    
+    bin_width = 100.0 / 2000
+    q = [0.1, 0.5, 0.9]
+    np.testing.assert_allclose(result.quantiles(q=q), np.quantile(probs, q), atol=2 * bin_width)
+    
+    # Chunking changes the stream but not the summaries' accuracy
+    chunked = propagate_uncertainty(*distributions, n_samples=n, chunk_size=777, seed=3)
+    assert chunked.n_samples == n
+    assert chunked.mean['success_probability'] == pytest.approx(probs.mean(), abs=1.0)
+
+
+def test_early_stop_once_converged():
+    result = propagate_uncertainty('clear', 'weekday', Uniform(5.5, 8.5), TruncatedNormal(6.4, 0.2),
+                                   n_samples=1_000_000, chunk_size=5000, tolerance=1.0,
+                                   min_samples=20000)
+    assert result.converged
+    assert result.n_samples == 20000
+    samples, mean, mean_error, threshold_error = result.history[-1]
+    assert mean_error < 1.0 and threshold_error < 0.01
+    
+    repeat = propagate_uncertainty('clear', 'weekday', Uniform(5.5, 8.5), TruncatedNormal(6.4, 0.2),
+                                   n_samples=1_000_000, chunk_size=5000, tolerance=1.0,
+                                   min_samples=20000)
+    assert repeat.mean == result.mean
@@ -0,0 +1,282 @@
+"""
+Monte Carlo uncertainty propagation for the School Commute Fuzzy Logic Model
+
+Propagates distributions of the inputs (e.g. Parent B waking at
+N(6.4, 0.2) truncated to [5.5, 8.5], or a weather forecast) to
+distributions of the success probability and every intermediate node.
+Samples are drawn and evaluated in streamed ``predict_batch`` chunks, and
+only fixed-size summaries are kept: running moments, fine histograms over
+each output's range and exact threshold counts. Memory use therefore does
+not depend on the number of samples.
+"""
+
+import numpy as np
+from scipy.special import ndtr, ndtri
+from typing import Dict, Sequence
+
+try:
+    from .school_commute_model import INTERMEDIATE_OUTPUTS, SchoolCommuteFuzzyModel
+except ImportError:
+    from school_commute_model import INTERMEDIATE_OUTPUTS, SchoolCommuteFuzzyModel
+
+
+MODEL_OUTPUTS = ('success_probability',) + INTERMEDIATE_OUTPUTS
+
+# Histogram range of every output; values outside fall into the edge bins
+OUTPUT_RANGES = {
+    'success_probability': (0.0, 100.0),
+    'run_duration': (0.0, 120.0),
+    'base_availability': (0.0, 10.0),
+    'final_availability': (0.0, 10.0),
+    'weather_travel_multiplier': (1.0, 2.2),
+    'breakfast_time': (10.0, 45.0),
+    'dressing_time': (10.0, 40.0),
+    'transport_efficiency': (0.0, 10.0),
+    'routine_efficiency': (0.0, 10.0),
+}
+
+DEFAULT_CHUNK_SIZE = 65536
+HISTOGRAM_BINS = 2000
+
+
+class Fixed:
+    """A known input value."""
+    
+    def __init__(self, value):
+        self.value = value
+    
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return np.full(n, self.value)
+
+
+class Uniform:
+    """Uniform distribution on [low, high]."""
+    
+    def __init__(self, low: float, high: float):
+        if high < low:
+            raise ValueError("high must be >= low")
+        self.low, self.high = low, high
+    
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, n)
+
+
+class TruncatedNormal:
+    """
+    Normal distribution N(mean, sd) truncated to [low, high].
+    
+    Sampled by inverting the CDF, so every draw falls in range.
+    """
+    
+    def __init__(self, mean: float, sd: float, low: float = 5.5, high: float = 8.5):
+        if sd <= 0 or high <= low:
+            raise ValueError("sd must be positive and high > low")
+        self.mean, self.sd, self.low, self.high = mean, sd, low, high
+        self._cdf_low = ndtr((low - mean) / sd)
+        self._cdf_high = ndtr((high - mean) / sd)
+        if self._cdf_high <= self._cdf_low:
+            raise ValueError("Truncation interval has no probability mass")
+    
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        u = rng.uniform(self._cdf_low, self._cdf_high, n)
+        return np.clip(self.mean + self.sd * ndtri(u), self.low, self.high)
+
+
+class Categorical:
+    """
+    Discrete distribution over values, e.g. a weather forecast.
+    
+    Parameters:
+    -----------
+    probabilities : dict
+        value -> probability (normalized to sum to 1)
+    """
+    
+    def __init__(self, probabilities: Dict):
+        weights = np.array(list(probabilities.values()), dtype=float)
+        if np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("probabilities must be non-negative with a positive sum")
+        self.values = np.array(list(probabilities))
+        self.probabilities = weights / weights.sum()
+    
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return self.values[rng.choice(len(self.values), n, p=self.probabilities)]
+
+
+def _as_distribution(value):
+    return value if hasattr(value, 'sample') else Fixed(value)
+
+
+class UncertaintyResult:
+    """
+    Streamed summary of the propagated output distributions.
+    
+    Attributes:
+    -----------
+    n_samples : int
+        Samples evaluated
+    converged : bool
+        Whether the convergence tolerance was met before n_samples ran out
+    mean, std, minimum, maximum : dict
+        Per-output moments and extremes
+    histograms : dict
+        Per-output (counts, edges) over OUTPUT_RANGES
+    thresholds : tuple
+        Success probabilities x for which P(success >= x) was counted exactly
+    history : list
+        (samples, mean success, standard error of the mean, largest
+        standard error of the threshold probabilities) after every chunk
+    """
+    
+    def __init__(self, outputs: Sequence[str], thresholds: Sequence[float], bins: int):
+        self.outputs = tuple(outputs)
+        self.thresholds = tuple(thresholds)
+        self.n_samples = 0
+        self.converged = False
+        self.mean = dict.fromkeys(self.outputs, 0.0)
+        self._m2 = dict.fromkeys(self.outputs, 0.0)
+        self.minimum = dict.fromkeys(self.outputs, np.inf)
+        self.maximum = dict.fromkeys(self.outputs, -np.inf)
+        self.histograms = {
+            name: (np.zeros(bins, dtype=np.int64), np.linspace(*OUTPUT_RANGES[name], bins + 1))
+            for name in self.outputs
+        }
+        self._exceedance_counts = np.zeros(len(self.thresholds), dtype=np.int64)
+        self.history = []
+    
+    def update(self, values: Dict[str, np.ndarray]):
+        """Fold one evaluated chunk into the running summaries."""
+        
+        n_chunk = len(next(iter(values.values())))
+        total = self.n_samples + n_chunk
+        for name in self.outputs:
+            x = values[name]
+            # Chan et al. parallel update of the mean and sum of squares
+            chunk_mean = x.mean()
+            delta = chunk_mean - self.mean[name]
+            self._m2[name] += (np.sum((x - chunk_mean) ** 2)
+                               + delta ** 2 * self.n_samples * n_chunk / total)
+            self.mean[name] += delta * n_chunk / total
+            self.minimum[name] = min(self.minimum[name], x.min())
+            self.maximum[name] = max(self.maximum[name], x.max())
+            
+            counts, edges = self.histograms[name]
+            width = (edges[-1] - edges[0]) / len(counts)
+            index = np.clip(((x - edges[0]) / width).astype(np.int64), 0, len(counts) - 1)
+            counts += np.bincount(index, minlength=len(counts))
+        
+        if self.thresholds:
+            success = values['success_probability']
+            self._exceedance_counts += np.sum(success[:, None] >= np.array(self.thresholds), axis=0)
+        self.n_samples = total
+    
+    @property
+    def std(self) -> Dict[str, float]:
+        return {name: np.sqrt(self._m2[name] / max(self.n_samples - 1, 1)) for name in self.outputs}
+    
+    def standard_errors(self) -> tuple:
+        """(standard error of the mean success, largest standard error of P(success >= x))."""
+        n = max(self.n_samples, 1)
+        mean_error = self.std['success_probability'] / np.sqrt(n)
+        p = self._exceedance_counts / n
+        threshold_error = float(np.max(np.sqrt(p * (1 - p) / n), initial=0.0))
+        return mean_error, threshold_error
+    
+    def prob_at_least(self, x: float) -> float:
+        """
+        P(success_probability >= x).
+        
+        Exact for the thresholds counted during the run, otherwise read from
+        the histogram (accurate to one bin width).
+        """
+        if x in self.thresholds:
+            return float(self._exceedance_counts[self.thresholds.index(x)] / self.n_samples)
+        counts, edges = self.histograms['success_probability']
+        fraction = np.interp(x, edges, np.concatenate([[0], np.cumsum(counts)])) / self.n_samples
+        return float(1.0 - fraction)
+    
+    def quantiles(self, output: str = 'success_probability',
+                  q: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> np.ndarray:
+        """Quantiles interpolated from the output's histogram (accurate to one bin width)."""
+        counts, edges = self.histograms[output]
+        cdf = np.concatenate([[0], np.cumsum(counts)]) / self.n_samples
+        # Interpolate inside the first bin whose upper edge reaches q
+        upper = np.clip(np.searchsorted(cdf, q, side='left'), 1, len(counts))
+        below, above = cdf[upper - 1], cdf[upper]
+        fraction = np.where(above > below, (np.asarray(q) - below) / np.maximum(above - below, 1e-300), 0.0)
+        values = edges[upper - 1] + np.clip(fraction, 0, 1) * (edges[upper] - edges[upper - 1])
+        return np.clip(values, self.minimum[output], self.maximum[output])
+
+
+def propagate_uncertainty(weather, day_type, parent_a_wake, parent_b_wake,
+                          model: SchoolCommuteFuzzyModel = None, n_samples: int = 1_000_000,
+                          seed: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          outputs: Sequence[str] = MODEL_OUTPUTS,
+                          thresholds: Sequence[float] = (50.0, 70.0, 80.0, 90.0),
+                          tolerance: float = None, min_samples: int = 100_000,
+                          bins: int = HISTOGRAM_BINS) -> UncertaintyResult:
+    """
+    Propagate input distributions through the model by Monte Carlo.
+    
+    Parameters:
+    -----------
+    weather, day_type, parent_a_wake, parent_b_wake :
+        A distribution (Fixed, Uniform, TruncatedNormal, Categorical or any
+        object with ``sample(rng, n)``) or a plain value for each input
+    model : SchoolCommuteFuzzyModel
+        Model to evaluate (a default model if None)
+    n_samples : int
+        Maximum number of samples
+    seed : int
+        Seed of the sample stream; results are reproducible for a given
+        seed and chunk_size
+    chunk_size : int
+        Samples drawn and evaluated at a time
+    outputs : sequence of str
+        Outputs to summarize ('success_probability' is always included)
+    thresholds : sequence of float
+        Success probabilities x for which P(success >= x) is counted exactly
+    tolerance : float
+        Stop early once the standard error of the mean success probability
+        (in percentage points) is below ``tolerance`` and the standard errors
+        of the threshold probabilities are below ``tolerance / 100``, after
+        at least ``min_samples`` samples. None always runs n_samples.
+    min_samples : int
+        Samples evaluated before early stopping is considered
+    bins : int
+        Histogram bins per output
+    
+    Returns:
+    --------
+    UncertaintyResult
+    """
+    
+    if chunk_size < 1 or n_samples < 1:
+        raise ValueError("chunk_size and n_samples must be positive")
+    model = model or SchoolCommuteFuzzyModel()
+    outputs = ['success_probability'] + [name for name in outputs if name != 'success_probability']
+    unknown = set(outputs) - set(MODEL_OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown outputs {sorted(unknown)}")
+    
+    distributions = [_as_distribution(value)
+                     for value in (weather, day_type, parent_a_wake, parent_b_wake)]
+    rng = np.random.default_rng(seed)
+    result = UncertaintyResult(outputs, thresholds, bins)
+    
+    while result.n_samples < n_samples:
+        n = min(chunk_size, n_samples - result.n_samples)
+        probs, intermediate = model.predict_batch(*(dist.sample(rng, n) for dist in distributions))
+        values = {name: probs if name == 'success_probability' else intermediate[name]
+                  for name in outputs}
+        result.update(values)
+        
+        mean_error, threshold_error = result.standard_errors()
+        result.history.append((result.n_samples, result.mean['success_probability'], mean_error,
+                               threshold_error))
+        if (tolerance is not None and result.n_samples >= min_samples
+                and mean_error < tolerance and threshold_error < tolerance / 100):
+            result.converged = True
+            break
+    
+    return result
@@ -6,7 +6,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from school_commute_model import SchoolCommuteFuzzyModel
-import skfuzzy as fuzz
+from parameter_sweep import parameter_sweep
+import fuzzy_kernels as fuzz
 
 def plot_membership_functions():
     """Plot membership functions for key fuzzy variables."""
@@ -129,12 +130,8 @@ def plot_system_responses():
     # Response surface: Parent wake times vs success probability
     wake_times = np.linspace(5.5, 8.5, 20)
     pa_mesh, pb_mesh = np.meshgrid(wake_times, wake_times)
-    success_mesh = np.zeros_like(pa_mesh)
-    
-    for i in range(len(wake_times)):
-        for j in range(len(wake_times)):
-            prob, _ = model.predict('clear', 'weekday', wake_times[i], wake_times[j])
-            success_mesh[j, i] = prob
+    grid = parameter_sweep(['clear'], ['weekday'], wake_times, wake_times, model=model)
+    success_mesh = grid['success_probability'][0, 0].T
     
     im1 = axes[0, 0].contourf(pa_mesh, pb_mesh, success_mesh, levels=15, cmap='RdYlGn')
     axes[0, 0].set_xlabel('Parent A Wake Time (hours)')